@@ -1,72 +1,176 @@
 import os
+import sys
 import json
 import asyncio
-from llm.call import schedule
-from llm.analyze import analyze_contract
-from utils.save import save_results, save_summary
+import argparse
+from llm.call import schedule, router
+from llm.analyze import analyze_contract, MINIFY_PROMPTS, BATCH_API, FUSED_SCORING, NEAR_DUPLICATES, PRESCORE_THRESHOLD, GROUP_FILES
+from utils.save import compact_results, save_summary
 from utils.summary import calculate_summary_statistics
+from utils.cache import evict_verdicts, cache_report
+from utils.minify import minify_report
+from utils.prescore import prescore_report
+from llm.usage import usage_report
+from utils.incremental import load_previous_report
+from utils.journal import RunJournal
+from utils.run_profile import RunProfile, current_profile, span, flush_telemetry
 from utils.adjusted_time import calculate_adjusted_time_estimate_base, calculate_adjusted_time_estimate_loc_weighted
 
-# User input
+LLM_ENGINES = ["claude", "gpt"]
+ECOSYSTEMS = ["sol", "evm", "move", "go", "ts"]
 
-PROJECT_NAME = input("👋 Welcome! Please enter the project name: ").strip().lower()
-
-while True:
-    LLM_ENGINE = input("🤖 Should we analyze it using Claude or GPT? (CLAUDE/GPT): ").strip().lower()
-    if LLM_ENGINE in ["claude", "gpt"]:
-        break
-    else:
-        print("❌ Invalid input. Please choose CLAUDE or GPT.")
-
-while True:
-    ecosystem = input("🌐 Great! Which ecosystem is the project based on? (SOL/EVM/MOVE/GO/TS): ").strip().lower()
-    if ecosystem in ["sol", "evm", "move", "go", "ts"]:
-        LANGUAGE = ecosystem
-        break
-    else:
-        print("❌ Invalid input. Please choose SOL, EVM, MOVE, TS or GO.")
-        
-print(f"🚀 Excellent! Let's use {LLM_ENGINE.capitalize()} to analyze {PROJECT_NAME.capitalize()} built on the {LANGUAGE.upper()} ecosystem.")
-
-   
-## Main function
-async def main():
+## Programmatic entry point
+async def run_analysis(project, engine, language, files_dir='./files', reports_dir='./reports', incremental=False, resume=False, limiter=None, minify=MINIFY_PROMPTS, batch_api=BATCH_API, fused=FUSED_SCORING, near_duplicates=NEAR_DUPLICATES, prescore_threshold=PRESCORE_THRESHOLD, group_files=GROUP_FILES):
+    project = project.strip().lower()
+    engine = engine.strip().lower()
+    language = language.strip().lower()
+    if engine not in LLM_ENGINES:
+        raise ValueError(f"Unknown LLM engine '{engine}', expected one of {LLM_ENGINES}")
+    if language not in ECOSYSTEMS:
+        raise ValueError(f"Unknown ecosystem '{language}', expected one of {ECOSYSTEMS}")
     
     # Define files 
-    output_folder = f'./reports/{PROJECT_NAME}/'
-    complexity_report_file = f'{output_folder}{PROJECT_NAME}_complexity_report.json'
-    summary_file = f'{output_folder}{PROJECT_NAME}_project_summary.txt'
-    output_schedule_file = f"{output_folder}{PROJECT_NAME}_schedule.md"
+    output_folder = os.path.join(reports_dir, project, '')
+    complexity_report_file = f'{output_folder}{project}_complexity_report.json'
+    complexity_stream_file = f'{output_folder}{project}_complexity_report.jsonl'
+    journal_file = f'{output_folder}{project}_run_journal.jsonl'
+    summary_file = f'{output_folder}{project}_project_summary.txt'
+    output_schedule_file = f"{output_folder}{project}_schedule.md"
+    profile_file = f'{output_folder}{project}_run_profile.json'
     
     # Check if the output folder exists, if not create it
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
         print(f"Created output folder: {output_folder} 📁")
     
+    previous_report = None
+    if incremental and os.path.exists(complexity_report_file):
+        previous_report = await load_previous_report(complexity_report_file)
+    
+    # Start a fresh stream, each file result is appended to it as soon as it completes
+    open(complexity_stream_file, 'w').close()
+    
+    # Record completed units so an interrupted run can pick up where it stopped
+    journal = RunJournal(journal_file)
+    if resume:
+        completed = await journal.load()
+        print(f"Resuming run, {completed} unit(s) already completed ⏭️")
+    else:
+        journal.reset()
+    
+    # Time every stage of this project's run, concurrent projects of a batch each get their own profile
+    profile = RunProfile(project)
+    current_profile.set(profile)
+    
     print("Analyzing files...🕵️‍♂️")
-    results, program_counter = await analyze_contract(LANGUAGE, LLM_ENGINE, PROJECT_NAME)
+    results, program_counter = await analyze_contract(language, engine, project, previous_report=previous_report, jsonl_file=complexity_stream_file, journal=journal, files_dir=files_dir, limiter=limiter, minify=minify, batch_api=batch_api, fused=fused, near_duplicates=near_duplicates, prescore_threshold=prescore_threshold, group_files=group_files)
     
-    await save_results(results, complexity_report_file)
+    async with span("save", file=complexity_report_file):
+        await compact_results(complexity_stream_file, complexity_report_file, order=[result['file'] for result in results])
     print(f"Analysis complete. Complexity report saved to {complexity_report_file} 💾✅")
     
     print("Calculating summary statistics...🤔")
     total_cloc, avg_complexity, median_complexity, avg_complexity_fv = await calculate_summary_statistics(results)
     
     # Calculate adjusted time estimate
-    adjusted_time_estimate = await calculate_adjusted_time_estimate_base(total_cloc, avg_complexity, avg_complexity_fv, LANGUAGE)
+    adjusted_time_estimate = await calculate_adjusted_time_estimate_base(total_cloc, avg_complexity, avg_complexity_fv, language)
 
-    await save_summary(total_cloc, avg_complexity, avg_complexity_fv, median_complexity, adjusted_time_estimate, summary_file, program_counter, PROJECT_NAME)
+    async with span("save", file=summary_file):
+        await save_summary(total_cloc, avg_complexity, avg_complexity_fv, median_complexity, adjusted_time_estimate, summary_file, program_counter, project)
     print(f"Project summary saved to {summary_file} 💾✅")
     
     print("Preparing schedule...🗓️")
     with open(complexity_report_file, 'r') as file:
         report = json.load(file)
-    schedule_result = await schedule(adjusted_time_estimate, report, PROJECT_NAME.capitalize())
-    with open(output_schedule_file, 'w') as md_file:
-        md_file.write(schedule_result)
+    schedule_result = await schedule(adjusted_time_estimate, report, project.capitalize(), language)
+    async with span("save", file=output_schedule_file):
+        with open(output_schedule_file, 'w') as md_file:
+            md_file.write(schedule_result)
     print(f"Schedule has been written to {output_schedule_file}💾✅")
     
     print(f"Estimated time for audit: {adjusted_time_estimate} week(s) 🗓️✅")
+    
+    profile.save(profile_file)
+    print(f"{profile.report()} 📊")
+    print(f"Run profile saved to {profile_file} 💾✅")
+    
+    summary = {
+        "total_cloc": total_cloc,
+        "program_counter": program_counter,
+        "avg_complexity": avg_complexity,
+        "median_complexity": median_complexity,
+        "avg_complexity_fv": avg_complexity_fv,
+        "estimated_weeks": adjusted_time_estimate
+    }
+    return results, summary, schedule_result
+
+# Function to parse command line options, falling back to environment variables
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score the complexity of the files in ./files and plan the audit.")
+    parser.add_argument('--project', default=os.getenv('PROJECT_NAME'), help="project name, used to name the reports")
+    parser.add_argument('--engine', default=os.getenv('LLM_ENGINE'), type=str.lower, choices=LLM_ENGINES, help="LLM to analyze the files with")
+    parser.add_argument('--language', default=os.getenv('LANGUAGE'), type=str.lower, choices=ECOSYSTEMS, help="ecosystem the project is built on")
+    parser.add_argument('--files', default=os.getenv('FILES_DIR', './files'), help="directory holding the files to analyze")
+    parser.add_argument('--reports', default=os.getenv('REPORTS_DIR', './reports'), help="directory to write the reports to")
+    parser.add_argument('--incremental', action='store_true', help="only re-score files added or modified since the previous report")
+    parser.add_argument('--resume', action='store_true', help="skip the files already scored by an interrupted run of the same project")
+    parser.add_argument('--minify', action='store_true', default=MINIFY_PROMPTS, help="strip comments, blank runs and import lists from the code sent to the LLM")
+    parser.add_argument('--batch-api', action='store_true', default=BATCH_API, help="send every request as one provider batch job and wait for it (offline runs, lower cost)")
+    parser.add_argument('--split-scoring', dest='fused', action='store_false', default=FUSED_SCORING, help="score sol/evm files with separate manual and FV requests instead of a single one")
+    parser.add_argument('--near-duplicates', action='store_true', default=NEAR_DUPLICATES, help="also score only one file of each group of nearly identical files")
+    parser.add_argument('--prescore-threshold', type=int, default=PRESCORE_THRESHOLD, help="score files whose local pre-score is at or below this without the LLM, 0 (the default) sends every file")
+    parser.add_argument('--group-files', action='store_true', default=GROUP_FILES, help="score small files importing one another together, in requests sharing their context")
+    return parser.parse_args(argv)
+
+# Function to ask for whatever wasn't given on the command line
+def prompt_missing_args(args):
+    if args.project is None:
+        args.project = input("👋 Welcome! Please enter the project name: ").strip().lower()
+
+    while args.engine is None:
+        engine = input("🤖 Should we analyze it using Claude or GPT? (CLAUDE/GPT): ").strip().lower()
+        if engine in LLM_ENGINES:
+            args.engine = engine
+        else:
+            print("❌ Invalid input. Please choose CLAUDE or GPT.")
+
+    while args.language is None:
+        ecosystem = input("🌐 Great! Which ecosystem is the project based on? (SOL/EVM/MOVE/GO/TS): ").strip().lower()
+        if ecosystem in ECOSYSTEMS:
+            args.language = ecosystem
+        else:
+            print("❌ Invalid input. Please choose SOL, EVM, MOVE, TS or GO.")
+
+    previous_report_file = os.path.join(args.reports, args.project, f'{args.project}_complexity_report.json')
+    if not args.incremental and not args.resume and os.path.exists(previous_report_file):
+        while True:
+            rerun = input("🔁 A previous report exists. Only re-score added or modified files? (Y/N): ").strip().lower()
+            if rerun in ["y", "n"]:
+                args.incremental = rerun == "y"
+                break
+            else:
+                print("❌ Invalid input. Please choose Y or N.")
+    return args
+
+## Main function
+async def main(argv=None):
+    args = parse_args(argv)
+    if sys.stdin.isatty():
+        args = prompt_missing_args(args)
+    elif None in (args.project, args.engine, args.language):
+        raise SystemExit("❌ --project, --engine and --language (or PROJECT_NAME, LLM_ENGINE and LANGUAGE) are required when not running interactively.")
+    
+    print(f"🚀 Excellent! Let's use {args.engine.capitalize()} to analyze {args.project.capitalize()} built on the {args.language.upper()} ecosystem.")
+    await run_analysis(args.project, args.engine, args.language, files_dir=args.files, reports_dir=args.reports, incremental=args.incremental, resume=args.resume, minify=args.minify, batch_api=args.batch_api, fused=args.fused, near_duplicates=args.near_duplicates, prescore_threshold=args.prescore_threshold, group_files=args.group_files)
+    
+    evict_verdicts()
+    print(f"{cache_report()} 🗄️")
+    print(f"{usage_report()} 🧾")
+    print(f"{router.report()} 🛰️")
+    print(f"{prescore_report()} 🧮")
+    if args.minify:
+        print(f"{minify_report()} ✂️")
+    flush_telemetry()
 
 # Run the async main function
 if __name__ == "__main__":
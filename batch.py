@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+from app import run_analysis, LLM_ENGINES, ECOSYSTEMS, MINIFY_PROMPTS, BATCH_API, FUSED_SCORING, NEAR_DUPLICATES, PRESCORE_THRESHOLD, GROUP_FILES
+from utils.workers import FairLimiter
+from utils.cache import evict_verdicts, cache_report
+from utils.minify import minify_report
+from utils.prescore import prescore_report
+from llm.usage import usage_report
+from utils.run_profile import flush_telemetry
+from llm.call import router
+
+# Total number of files scored at once across every project of the batch
+BATCH_MAX_IN_FLIGHT = int(os.getenv('BATCH_MAX_IN_FLIGHT', 16))
+
+# Function to load and validate a batch manifest
+def load_manifest(manifest_file):
+    """
+    Load a JSON manifest listing the projects to analyze, e.g.:
+
+    [
+      {"project": "acme", "language": "evm", "path": "./intake/acme"},
+      {"project": "orca", "language": "sol", "path": "./intake/orca", "engine": "gpt"}
+    ]
+    """
+    with open(manifest_file, 'r') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = manifest.get('projects', [])
+
+    projects = []
+    for entry in manifest:
+        project = str(entry['project']).strip().lower()
+        language = str(entry['language']).strip().lower()
+        if language not in ECOSYSTEMS:
+            raise ValueError(f"Unknown ecosystem '{language}' for project '{project}', expected one of {ECOSYSTEMS}")
+        engine = entry.get('engine')
+        if engine is not None and engine.strip().lower() not in LLM_ENGINES:
+            raise ValueError(f"Unknown LLM engine '{engine}' for project '{project}', expected one of {LLM_ENGINES}")
+        projects.append({
+            "project": project,
+            "language": language,
+            "path": entry.get('path', './files'),
+            "engine": engine.strip().lower() if engine else None
+        })
+    return projects
+
+# Function to analyze every project of a manifest in this process, interleaving their files
+async def run_batch(projects, engine="claude", reports_dir='./reports', incremental=False, resume=False, max_in_flight=BATCH_MAX_IN_FLIGHT, minify=MINIFY_PROMPTS, batch_api=BATCH_API, fused=FUSED_SCORING, near_duplicates=NEAR_DUPLICATES, prescore_threshold=PRESCORE_THRESHOLD, group_files=GROUP_FILES):
+    limiter = FairLimiter(max_in_flight)
+    if batch_api:
+        print(f"📦 Running {len(projects)} project(s) through provider batch jobs")
+    else:
+        print(f"📦 Running {len(projects)} project(s) with {max_in_flight} file(s) in flight overall")
+
+    outcomes = await asyncio.gather(
+        *(
+            run_analysis(
+                entry['project'],
+                entry['engine'] or engine,
+                entry['language'],
+                files_dir=entry['path'],
+                reports_dir=reports_dir,
+                incremental=incremental,
+                resume=resume,
+                limiter=limiter,
+                minify=minify,
+                batch_api=batch_api,
+                fused=fused,
+                near_duplicates=near_duplicates,
+                prescore_threshold=prescore_threshold,
+                group_files=group_files
+            )
+            for entry in projects
+        ),
+        return_exceptions=True
+    )
+
+    batch = {}
+    for entry, outcome in zip(projects, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"❌ {entry['project'].capitalize()} failed: {outcome}")
+            batch[entry['project']] = None
+        else:
+            results, summary, _ = outcome
+            print(f"✅ {entry['project'].capitalize()}: {len(results)} file(s), estimated {summary['estimated_weeks']} week(s)")
+            batch[entry['project']] = outcome
+    return batch
+
+## Main function
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze several projects in one process.")
+    parser.add_argument('manifest', help="JSON manifest of {project, language, path[, engine]} entries")
+    parser.add_argument('--engine', default=os.getenv('LLM_ENGINE', 'claude'), type=str.lower, choices=LLM_ENGINES, help="default LLM for projects that don't set one")
+    parser.add_argument('--reports', default=os.getenv('REPORTS_DIR', './reports'), help="directory to write the reports to")
+    parser.add_argument('--max-in-flight', type=int, default=BATCH_MAX_IN_FLIGHT, help="files scored at once across all projects")
+    parser.add_argument('--incremental', action='store_true', help="only re-score files added or modified since each project's previous report")
+    parser.add_argument('--resume', action='store_true', help="skip the files already scored by an interrupted batch")
+    parser.add_argument('--minify', action='store_true', default=MINIFY_PROMPTS, help="strip comments, blank runs and import lists from the code sent to the LLM")
+    parser.add_argument('--batch-api', action='store_true', default=BATCH_API, help="send the requests of every project as provider batch jobs and wait for them")
+    parser.add_argument('--split-scoring', dest='fused', action='store_false', default=FUSED_SCORING, help="score sol/evm files with separate manual and FV requests instead of a single one")
+    parser.add_argument('--near-duplicates', action='store_true', default=NEAR_DUPLICATES, help="also score only one file of each group of nearly identical files")
+    parser.add_argument('--prescore-threshold', type=int, default=PRESCORE_THRESHOLD, help="score files whose local pre-score is at or below this without the LLM, 0 (the default) sends every file")
+    parser.add_argument('--group-files', action='store_true', default=GROUP_FILES, help="score small files importing one another together, in requests sharing their context")
+    args = parser.parse_args(argv)
+
+    projects = load_manifest(args.manifest)
+    batch = await run_batch(projects, engine=args.engine, reports_dir=args.reports, incremental=args.incremental, resume=args.resume, max_in_flight=args.max_in_flight, minify=args.minify, batch_api=args.batch_api, fused=args.fused, near_duplicates=args.near_duplicates, prescore_threshold=args.prescore_threshold, group_files=args.group_files)
+
+    evict_verdicts()
+    print(f"{cache_report()} 🗄️")
+    print(f"{usage_report()} 🧾")
+    print(f"{router.report()} 🛰️")
+    print(f"{prescore_report()} 🧮")
+    if args.minify:
+        print(f"{minify_report()} ✂️")
+    flush_telemetry()
+    if any(outcome is None for outcome in batch.values()):
+        sys.exit(1)
+
+# Run the async main function
+if __name__ == "__main__":
+    asyncio.run(main())
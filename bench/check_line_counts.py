@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import argparse
+
+from utils.line_counter import LANGUAGES, find_files, count_content, cloc_counts
+
+# Checks the line counter against cloc's counts on a committed corpus of edge cases (comment markers
+# in strings, mid-line block comments, raw strings, template literals, Move's line-only comments).
+# The expected counts are cloc's output stored next to the fixtures (--regenerate, never edited by hand),
+# so the check runs without cloc installed.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'line_counts')
+EXPECTED_FILE = os.path.join(FIXTURES_DIR, 'expected.json')
+
+# Function to count the fixtures of every language, keyed by their path relative to the fixtures directory
+def count_fixtures(fixtures_dir=FIXTURES_DIR):
+    counted = {}
+    for language in sorted(LANGUAGES):
+        for file_path in find_files(os.path.join(fixtures_dir, language), language):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                counts = count_content(f.read(), language)
+            counted[os.path.relpath(file_path, fixtures_dir).replace(os.sep, '/')] = counts
+    return counted
+
+# Function to ask cloc for the counts of every fixture, to refresh the expected counts
+def cloc_fixtures(fixtures_dir=FIXTURES_DIR):
+    expected = {}
+    for language in sorted(LANGUAGES):
+        for file_path, (blank, comment, code) in cloc_counts(os.path.join(fixtures_dir, language), language).items():
+            expected[os.path.relpath(file_path, fixtures_dir).replace(os.sep, '/')] = {"blank": blank, "comment": comment, "code": code}
+    return expected
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the line counter against cloc's counts of the fixture corpus.")
+    parser.add_argument('--regenerate', action='store_true', help="rewrite the expected counts from cloc (needs cloc installed)")
+    args = parser.parse_args(argv)
+
+    if args.regenerate:
+        expected = cloc_fixtures()
+        with open(EXPECTED_FILE, 'w') as f:
+            json.dump(expected, f, indent=2)
+            f.write('\n')
+        print(f"Expected counts of {len(expected)} fixture(s) saved to {EXPECTED_FILE} 💾✅")
+        return
+
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f)
+    counted = count_fixtures()
+    mismatches = []
+    for path in sorted(set(expected) | set(counted)):
+        if expected.get(path) != counted.get(path):
+            mismatches.append(f"{path}: cloc {expected.get(path)}, ours {counted.get(path)}")
+    if mismatches:
+        print("❌ Line counts differ from cloc:\n  " + "\n  ".join(mismatches))
+        sys.exit(1)
+    print(f"✅ Line counts of {len(counted)} fixture(s) match cloc's")
+
+if __name__ == "__main__":
+    # Usage: python3 -m bench.check_line_counts [--regenerate]
+    main()
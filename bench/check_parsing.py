@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import argparse
+
+from utils.line_counter import LANGUAGES, find_files, strip_comments
+from utils.parsing import GRAMMARS, NODE_TYPES, get_parser, parse_source
+
+# Checks the tree-sitter outlines against one hand-checked fixture per language: every node type and
+# field name outline_tree looks for must exist in the installed grammar (a renamed node would silently
+# count nothing), and each fixture's outline (0-based import lines, declaration lines, functions,
+# branches) must match the committed one. A language without a grammar is expected to outline to null,
+# its callers then use the regex heuristics.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'parsing')
+EXPECTED_FILE = os.path.join(FIXTURES_DIR, 'expected.json')
+
+# Fields outline_tree reads, and the languages whose nodes have them
+FIELDS = {'body': set(GRAMMARS), 'operator': set(GRAMMARS), 'source': {'ts'}}
+
+# Function to list the node types and fields outline_tree expects that the grammar of a language doesn't have
+def unknown_names(language):
+    grammar = get_parser(language).language
+    kinds = {grammar.node_kind_for_id(kind_id) for kind_id in range(grammar.node_kind_count)}
+    unknown = [f"node type {name}" for names in NODE_TYPES[language].values() for name in sorted(names) if name not in kinds]
+    unknown += [f"field {field}" for field, languages in FIELDS.items() if language in languages and grammar.field_id_for_name(field) is None]
+    return unknown
+
+# Function to outline the fixtures of every language, keyed by their path relative to the fixtures directory
+def outline_fixtures(fixtures_dir=FIXTURES_DIR):
+    outlines = {}
+    for language in sorted(LANGUAGES):
+        for file_path in find_files(os.path.join(fixtures_dir, language), language):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                outline = parse_source(strip_comments(f.read(), language), language)
+            # Through JSON, so (first_line, last_line) tuples compare equal to the stored lists
+            outlines[os.path.relpath(file_path, fixtures_dir).replace(os.sep, '/')] = json.loads(json.dumps(outline))
+    return outlines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the tree-sitter outlines against the fixture corpus.")
+    parser.add_argument('--regenerate', action='store_true', help="rewrite the expected outlines (check them by hand before committing)")
+    args = parser.parse_args(argv)
+
+    try:
+        import tree_sitter_language_pack  # noqa: F401
+    except ImportError:
+        print("❌ tree-sitter-language-pack isn't installed, see requirements.txt")
+        sys.exit(1)
+
+    problems = []
+    for language in sorted(GRAMMARS):
+        if get_parser(language) is None:
+            print(f"No {GRAMMARS[language]} grammar installed, {language} files use the regex heuristics")
+            continue
+        problems += [f"{language}: the {GRAMMARS[language]} grammar has no {name}" for name in unknown_names(language)]
+
+    outlines = outline_fixtures()
+    if args.regenerate:
+        with open(EXPECTED_FILE, 'w') as f:
+            json.dump(outlines, f, indent=2)
+            f.write('\n')
+        print(f"Expected outlines of {len(outlines)} fixture(s) saved to {EXPECTED_FILE} 💾✅")
+        return
+
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f)
+    for path in sorted(set(expected) | set(outlines)):
+        if expected.get(path) != outlines.get(path):
+            problems.append(f"{path}: expected {expected.get(path)}, got {outlines.get(path)}")
+    if problems:
+        print("❌ Tree-sitter outlines are off:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print(f"✅ Outlines of {len(outlines)} fixture(s) match")
+
+if __name__ == "__main__":
+    # Usage: python3 -m bench.check_parsing [--regenerate]
+    main()
@@ -0,0 +1,50 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+/// @notice Minimal upgradeable proxy with an admin-controlled implementation slot
+contract Proxy {
+    // keccak256("eip1967.proxy.implementation") - 1
+    bytes32 private constant IMPLEMENTATION_SLOT = 0x360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc;
+    // keccak256("eip1967.proxy.admin") - 1
+    bytes32 private constant ADMIN_SLOT = 0xb53127684a568b3173ae13b9f8a6016e243e63b6e8ee1178d6a717850b5d6103;
+
+    constructor(address implementation, bytes memory data) {
+        _setSlot(ADMIN_SLOT, msg.sender);
+        _setSlot(IMPLEMENTATION_SLOT, implementation);
+        if (data.length > 0) {
+            (bool ok, ) = implementation.delegatecall(data);
+            require(ok, "init failed");
+        }
+    }
+
+    function upgradeTo(address implementation) external {
+        require(msg.sender == _getSlot(ADMIN_SLOT), "not admin");
+        _setSlot(IMPLEMENTATION_SLOT, implementation);
+    }
+
+    fallback() external payable {
+        address implementation = _getSlot(IMPLEMENTATION_SLOT);
+        assembly {
+            calldatacopy(0, 0, calldatasize())
+            let result := delegatecall(gas(), implementation, 0, calldatasize(), 0, 0)
+            returndatacopy(0, 0, returndatasize())
+            switch result
+            case 0 { revert(0, returndatasize()) }
+            default { return(0, returndatasize()) }
+        }
+    }
+
+    receive() external payable {}
+
+    function _getSlot(bytes32 slot) private view returns (address value) {
+        assembly {
+            value := sload(slot)
+        }
+    }
+
+    function _setSlot(bytes32 slot, address value) private {
+        assembly {
+            sstore(slot, value)
+        }
+    }
+}
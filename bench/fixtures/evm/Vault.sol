@@ -0,0 +1,47 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import {IERC20} from "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import {SafeERC20} from "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import {ReentrancyGuard} from "@openzeppelin/contracts/utils/ReentrancyGuard.sol";
+
+/// @title Vault
+/// @notice Share-based vault holding a single ERC20 asset
+contract Vault is ReentrancyGuard {
+    using SafeERC20 for IERC20;
+
+    IERC20 public immutable asset;
+    uint256 public totalShares;
+    mapping(address => uint256) public sharesOf;
+
+    event Deposit(address indexed user, uint256 assets, uint256 shares);
+    event Withdraw(address indexed user, uint256 assets, uint256 shares);
+
+    constructor(IERC20 _asset) {
+        asset = _asset;
+    }
+
+    function totalAssets() public view returns (uint256) {
+        return asset.balanceOf(address(this));
+    }
+
+    // Shares are minted pro rata to the assets already held
+    function deposit(uint256 assets) external nonReentrant returns (uint256 shares) {
+        uint256 supply = totalShares;
+        shares = supply == 0 ? assets : (assets * supply) / totalAssets();
+        require(shares > 0, "zero shares");
+        sharesOf[msg.sender] += shares;
+        totalShares = supply + shares;
+        asset.safeTransferFrom(msg.sender, address(this), assets);
+        emit Deposit(msg.sender, assets, shares);
+    }
+
+    function withdraw(uint256 shares) external nonReentrant returns (uint256 assets) {
+        require(sharesOf[msg.sender] >= shares, "insufficient shares");
+        assets = (shares * totalAssets()) / totalShares;
+        sharesOf[msg.sender] -= shares;
+        totalShares -= shares;
+        asset.safeTransfer(msg.sender, assets);
+        emit Withdraw(msg.sender, assets, shares);
+    }
+}
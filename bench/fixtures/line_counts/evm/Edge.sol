@@ -0,0 +1,24 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+/**
+ * @title Comment markers in odd places
+ *
+ * @notice Blank lines inside a comment are still blank:
+
+ */
+contract Edge {
+    string public url = "https://example.org//path"; // trailing comment
+    string public glob = "/* not a comment */";
+    bytes public raw = '//';
+    uint256 public a = 1; /* inline */ uint256 public b = 2;
+    uint256 public c /* mid-line */ = 3;
+    /* a block comment on its own line */
+    /* a block comment
+       over two lines */
+    /// @notice NatSpec line comment
+    function f() external pure returns (uint256) {
+        return 1 /* one */ + /* two */ 2;
+    }
+  
+}
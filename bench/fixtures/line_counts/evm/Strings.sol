@@ -0,0 +1,14 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+contract Strings {
+    string public a = "/*";
+    uint256 public b = 1;
+    string public c = "*/";
+    // unicode strings and single quotes
+    string public d = unicode"// not a comment";
+    string public e = '/* not a comment either */';
+    /* block
+    // inside
+    */
+}
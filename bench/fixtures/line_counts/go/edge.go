@@ -0,0 +1,21 @@
+// Package edge exercises comment markers in strings.
+package edge
+
+import "fmt"
+
+/*
+Block comment before a declaration.
+*/
+const url = "https://example.org//path" // trailing
+
+var query = `SELECT * FROM t /* not a comment */`
+var path = `C:\dir\// raw`
+
+func Sum(a, b int) int {
+	/* inline */ return a + b
+}
+
+func Print() {
+	fmt.Println("/*", "*/") // markers in strings
+	// nothing else
+}
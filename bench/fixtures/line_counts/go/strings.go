@@ -0,0 +1,19 @@
+package strings
+
+// Raw strings span lines, and their lines may look like comments
+var usage = `
+// not a comment: the first line of the usage text
+/* neither is this */
+plain text
+`
+
+var sql = `SELECT *
+/* hint */ FROM t
+-- trailing`
+
+/* a block comment
+// with a line comment inside
+*/
+func Usage() string {
+	return usage + sql // joined
+}
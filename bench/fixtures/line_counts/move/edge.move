@@ -0,0 +1,15 @@
+/// Move only has line comments in cloc's definition
+module edge::vault {
+    use std::signer;
+
+    // a line comment
+    const URL: vector<u8> = b"https://example.org//path";
+    /* block comments are not comments to cloc's Move definition */
+
+    struct Pool has key { total: u64 } // trailing
+
+    public fun withdraw(account: &signer, amount: u64) acquires Pool {
+        let pool = borrow_global_mut<Pool>(signer::address_of(account));
+        pool.total = pool.total - amount; // checked by the VM
+    }
+}
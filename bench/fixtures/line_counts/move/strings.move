@@ -0,0 +1,11 @@
+module edge::strings {
+    // Move strings are byte vectors
+    const A: vector<u8> = b"// not a comment";
+    const B: vector<u8> = x"00ff"; // hex
+    /*
+    block comment lines are code to cloc's Move definition
+    */
+    // a line comment
+        // an indented line comment
+    fun f(): u64 { 1 } // trailing
+}
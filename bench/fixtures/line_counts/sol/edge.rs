@@ -0,0 +1,21 @@
+//! Crate-level doc comment
+use std::fmt;
+
+/// Raw strings keep comment markers as text
+pub const PATTERN: &str = r#"// not a comment, "quoted" /* either */"#;
+pub const PLAIN: &str = r"https://example.org//path";
+pub const BYTES: &[u8] = br#"/* bytes */"#;
+
+/*
+ * Block comment
+ */
+pub fn add(a: u64, b: u64) -> u64 {
+    let url = "http://localhost:8899"; // local validator
+    a /* left */ + b // right
+}
+
+impl fmt::Display for Wrapper<'_> {
+    fn fmt(&self, f: &mut fmt::Formatter) -> fmt::Result {
+        write!(f, "{}", '/')
+    }
+}
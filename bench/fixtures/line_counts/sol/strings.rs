@@ -0,0 +1,25 @@
+// Multi-line strings and nested block comments
+pub const HELP: &str = "
+// not a comment: a line of the help text
+/* neither is this */
+";
+
+pub const RAW: &str = r#"
+// raw string line
+/* raw string block */
+"#;
+
+/* outer comment
+   /* nested comment */
+   still inside the outer comment
+*/
+pub fn help() -> &'static str {
+    /* one /* nested */ line */ HELP
+}
+
+/*
+ * /* nested */
+ */
+pub fn raw() -> &'static str {
+    RAW
+}
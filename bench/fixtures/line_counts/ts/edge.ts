@@ -0,0 +1,18 @@
+/**
+ * Template literals and comment markers in strings.
+ */
+import { fetchJson } from './http'; // local helper
+
+const base = 'https://example.org//api';
+const route = `${base}/v1//items`; /* versioned */
+const label = `a /* b */ c ${route}`;
+
+export async function load(id: string): Promise<unknown> {
+  // fetch one item
+  const url = `${route}/${id}`;
+  /* no cache */ return fetchJson(url);
+}
+
+export const multiline = `first line
+second line with "quotes"
+`;
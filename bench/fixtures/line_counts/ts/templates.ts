@@ -0,0 +1,22 @@
+// Template literals span lines, and their lines may look like comments
+export const banner = `
+// not a comment: part of the banner
+/* neither is this */
+  ${'indented'}
+`;
+
+export const query = `
+  query {
+    items /* inline */ { id }
+  }
+`;
+
+/* a block comment
+// with a line comment inside
+*/
+export function render(name: string): string {
+  const url = "http://example.org"; /* trailing */
+  return `${banner}
+// still the template, ${name}
+`;
+}
@@ -0,0 +1,33 @@
+package vault
+
+import (
+	"errors"
+	"fmt"
+)
+
+const Max = 10
+
+type Vault struct {
+	balances map[string]uint64
+}
+
+var ErrZero = errors.New("zero amount")
+
+func New() *Vault {
+	return &Vault{balances: map[string]uint64{}}
+}
+
+func (v *Vault) Deposit(user string, amount uint64) error {
+	if amount == 0 || user == "" {
+		return ErrZero
+	}
+	for i := 0; i < 1; i++ {
+		v.balances[user] += amount
+	}
+	switch {
+	case amount > Max:
+		fmt.Println("large")
+	default:
+	}
+	return nil
+}
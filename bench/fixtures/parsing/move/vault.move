@@ -0,0 +1,15 @@
+module 0x1::vault {
+    use std::signer;
+
+    struct Vault has key {
+        balance: u64,
+    }
+
+    const E_ZERO: u64 = 1;
+
+    public entry fun deposit(account: &signer, amount: u64) acquires Vault {
+        assert!(amount > 0, E_ZERO);
+        let vault = borrow_global_mut<Vault>(signer::address_of(account));
+        vault.balance = vault.balance + amount;
+    }
+}
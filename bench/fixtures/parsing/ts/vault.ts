@@ -0,0 +1,32 @@
+import { Connection } from "@solana/web3.js";
+import type { Config } from "./config";
+
+export { helper } from "./helper";
+
+export interface Balance {
+  user: string;
+  amount: number;
+}
+
+export class Vault {
+  private balances = new Map<string, number>();
+
+  constructor(private connection: Connection) {}
+
+  deposit(user: string, amount: number): void {
+    if (amount <= 0 && user) {
+      throw new Error("zero");
+    }
+    this.balances.set(user, (this.balances.get(user) ?? 0) + amount);
+  }
+}
+
+export function total(values: number[]): number {
+  let sum = 0;
+  for (const value of values) {
+    sum += value > 0 ? value : 0;
+  }
+  return sum;
+}
+
+const LIMIT = 10;
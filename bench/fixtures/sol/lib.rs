@@ -0,0 +1,77 @@
+use anchor_lang::prelude::*;
+use anchor_spl::token::{self, Token, TokenAccount, Transfer};
+
+declare_id!("Fg6PaFpoGXkYsidMpWTK6W2BeZ7FEfcYkg476zPFsLnS");
+
+#[program]
+pub mod escrow {
+    use super::*;
+
+    /// Locks `amount` tokens of the maker until the taker pays `expected`
+    pub fn initialize(ctx: Context<Initialize>, amount: u64, expected: u64) -> Result<()> {
+        let escrow = &mut ctx.accounts.escrow;
+        escrow.maker = ctx.accounts.maker.key();
+        escrow.amount = amount;
+        escrow.expected = expected;
+        escrow.bump = ctx.bumps.escrow;
+
+        let cpi = CpiContext::new(
+            ctx.accounts.token_program.to_account_info(),
+            Transfer {
+                from: ctx.accounts.maker_token.to_account_info(),
+                to: ctx.accounts.vault.to_account_info(),
+                authority: ctx.accounts.maker.to_account_info(),
+            },
+        );
+        token::transfer(cpi, amount)
+    }
+
+    pub fn cancel(ctx: Context<Cancel>) -> Result<()> {
+        let seeds: &[&[u8]] = &[b"escrow", ctx.accounts.maker.key.as_ref(), &[ctx.accounts.escrow.bump]];
+        let cpi = CpiContext::new_with_signer(
+            ctx.accounts.token_program.to_account_info(),
+            Transfer {
+                from: ctx.accounts.vault.to_account_info(),
+                to: ctx.accounts.maker_token.to_account_info(),
+                authority: ctx.accounts.escrow.to_account_info(),
+            },
+            &[seeds],
+        );
+        token::transfer(cpi, ctx.accounts.escrow.amount)
+    }
+}
+
+#[account]
+pub struct Escrow {
+    pub maker: Pubkey,
+    pub amount: u64,
+    pub expected: u64,
+    pub bump: u8,
+}
+
+#[derive(Accounts)]
+pub struct Initialize<'info> {
+    #[account(mut)]
+    pub maker: Signer<'info>,
+    #[account(init, payer = maker, space = 8 + 32 + 8 + 8 + 1, seeds = [b"escrow", maker.key().as_ref()], bump)]
+    pub escrow: Account<'info, Escrow>,
+    #[account(mut)]
+    pub maker_token: Account<'info, TokenAccount>,
+    #[account(mut)]
+    pub vault: Account<'info, TokenAccount>,
+    pub token_program: Program<'info, Token>,
+    pub system_program: Program<'info, System>,
+}
+
+#[derive(Accounts)]
+pub struct Cancel<'info> {
+    #[account(mut)]
+    pub maker: Signer<'info>,
+    #[account(mut, has_one = maker, seeds = [b"escrow", maker.key().as_ref()], bump = escrow.bump, close = maker)]
+    pub escrow: Account<'info, Escrow>,
+    #[account(mut)]
+    pub maker_token: Account<'info, TokenAccount>,
+    #[account(mut)]
+    pub vault: Account<'info, TokenAccount>,
+    pub token_program: Program<'info, Token>,
+}
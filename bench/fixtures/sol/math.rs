@@ -0,0 +1,35 @@
+//! Fixed-point helpers used by the pricing curve
+
+pub const SCALE: u128 = 1_000_000_000_000;
+
+/// Multiplies two scaled values, rounding down
+pub fn mul_down(a: u128, b: u128) -> Option<u128> {
+    a.checked_mul(b)?.checked_div(SCALE)
+}
+
+/// Divides two scaled values, rounding up
+pub fn div_up(a: u128, b: u128) -> Option<u128> {
+    if b == 0 {
+        return None;
+    }
+    let numerator = a.checked_mul(SCALE)?;
+    Some((numerator + b - 1) / b)
+}
+
+/// Constant-product output amount for an input, after a fee in basis points
+pub fn swap_out(reserve_in: u128, reserve_out: u128, amount_in: u128, fee_bps: u128) -> Option<u128> {
+    let amount_in_after_fee = amount_in.checked_mul(10_000 - fee_bps)?.checked_div(10_000)?;
+    let numerator = amount_in_after_fee.checked_mul(reserve_out)?;
+    let denominator = reserve_in.checked_add(amount_in_after_fee)?;
+    numerator.checked_div(denominator)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn swap_is_bounded_by_reserves() {
+        assert!(swap_out(1_000, 1_000, 1_000_000, 30).unwrap() < 1_000);
+    }
+}
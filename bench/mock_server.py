@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+from aiohttp import web
+
+# Local stand-in for the Anthropic and OpenAI endpoints the analyzer uses (messages, chat completions
+# and both batch APIs), answering with deterministic verdicts so runs can be exercised without API keys.
+# Latency, server errors and 429s can be injected on the messages and chat completions endpoints:
+#
+#   python3 -m bench.mock_server --port 8089 --latency 0.5 --error-rate 0.02 --rate-limit-rate 0.05
+#   ANTHROPIC_BASE_URL=http://localhost:8089 OPENAI_BASE_URL=http://localhost:8089/v1 python3 app.py --batch-api ...
+
+# Seconds a batch job stays in progress before it ends
+MOCK_BATCH_SECONDS = float(os.getenv('MOCK_BATCH_SECONDS', 2))
+# Mean response time of a request, and the +/- fraction it varies by
+MOCK_LATENCY_SECONDS = float(os.getenv('MOCK_LATENCY_SECONDS', 0))
+MOCK_LATENCY_JITTER = float(os.getenv('MOCK_LATENCY_JITTER', 0.5))
+# Share of requests answered with a 500 (Anthropic: 529 overloaded) or a 429
+MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', 0))
+MOCK_RATE_LIMIT_RATE = float(os.getenv('MOCK_RATE_LIMIT_RATE', 0))
+# Retry-after hint sent with 429s
+MOCK_RETRY_AFTER_SECONDS = float(os.getenv('MOCK_RETRY_AFTER_SECONDS', 1))
+# Share of replies written sloppily ("7/10" scores, code fences, trailing commas), as models sometimes do
+MOCK_SLOPPY_RATE = float(os.getenv('MOCK_SLOPPY_RATE', 0))
+# Shortest prefix cached, like Claude Sonnet's prompt cache
+MOCK_CACHE_MIN_TOKENS = int(os.getenv('MOCK_CACHE_MIN_TOKENS', 1024))
+
+# Function to derive a stable verdict from the text of a request
+def verdict_for(text):
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return {
+        "purpose": "Mock verdict",
+        "complexity": 1 + digest[0] % 10,
+        "rationale": f"Deterministic mock score derived from a {len(text)}-character prompt.",
+        # Only read by fused requests, ignored by the others
+        "complexity_fv": digest[1] % 11,
+        "rationale_fv": f"Deterministic mock FV score derived from a {len(text)}-character prompt."
+    }
+
+# Function to answer a request, with one verdict per <file> block for grouped requests
+def answer_for(text):
+    paths = re.findall(r'<file path="([^"]+)">', text)
+    if paths:
+        return {"files": [{"file": path, **verdict_for(f'{text}\n{path}')} for path in paths]}
+    return verdict_for(text)
+
+# Function to tell, from the text of a request, whether its reply is written sloppily
+def is_sloppy(text, sloppy_rate):
+    return hashlib.sha256(f'sloppy:{text}'.encode('utf-8')).digest()[0] < sloppy_rate * 256
+
+# Function to write scores the way models get them wrong
+def loosen(answer):
+    if "files" in answer:
+        return {"files": [loosen(verdict) for verdict in answer["files"]]}
+    return {**answer, **{field: f"{answer[field]}/10" for field in ("complexity", "complexity_fv") if field in answer}}
+
+# Function to write a reply as text, sloppy ones wrapped in prose and fences with a trailing comma
+def reply_text(answer, sloppy):
+    if not sloppy:
+        return json.dumps(answer)
+    body = json.dumps(loosen(answer), indent=2)
+    return f"Here is my analysis:\n```json\n{body[:-1].rstrip()},\n}}\n```"
+
+# Function to flatten the text of a request's messages (string or content block contents)
+def request_text(params):
+    parts = [params.get("system") or ""]
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get("text", "") for block in content or [])
+    return "\n".join(parts)
+
+# Claude replies through the forced tool when the request has one, in text otherwise
+def anthropic_message(params, sloppy_rate=MOCK_SLOPPY_RATE):
+    text = request_text(params)
+    sloppy = is_sloppy(text, sloppy_rate)
+    if params.get("tools"):
+        answer = answer_for(text)
+        content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex}", "name": params["tools"][0]["name"], "input": loosen(answer) if sloppy else answer}]
+    else:
+        content = [{"type": "text", "text": reply_text(answer_for(text), sloppy)}]
+    cached = sum(
+        len(block.get("text", "")) // 4
+        for message in params.get("messages", []) if isinstance(message.get("content"), list)
+        for block in message["content"] if "cache_control" in block
+    )
+    if cached:
+        # Like Anthropic, prefixes (tool schema and system prompt included) under the minimum aren't cached
+        cached += (len(json.dumps(params.get("tools") or [])) + len(str(params.get("system", "")))) // 4
+        if cached < MOCK_CACHE_MIN_TOKENS:
+            cached = 0
+    return {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "mock"),
+        "content": content,
+        "stop_reason": "tool_use" if params.get("tools") else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(text) // 4 - cached, "output_tokens": 40, "cache_creation_input_tokens": 0, "cache_read_input_tokens": cached}
+    }
+
+def openai_completion(params, sloppy_rate=MOCK_SLOPPY_RATE):
+    text = request_text(params)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": params.get("model", "mock"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply_text(answer_for(text), is_sloppy(text, sloppy_rate))}}],
+        "usage": {"prompt_tokens": len(text) // 4, "completion_tokens": 40, "total_tokens": len(text) // 4 + 40}
+    }
+
+# Function to shape an error like the provider's API does
+def error_response(provider, status, kind, message, headers=None):
+    if provider == "claude":
+        body = {"type": "error", "error": {"type": kind, "message": message}}
+    else:
+        body = {"error": {"message": message, "type": kind, "param": None, "code": kind}}
+    return web.json_response(body, status=status, headers=headers)
+
+class MockProvider:
+    def __init__(self, batch_seconds=MOCK_BATCH_SECONDS, latency=MOCK_LATENCY_SECONDS, jitter=MOCK_LATENCY_JITTER,
+                 error_rate=MOCK_ERROR_RATE, rate_limit_rate=MOCK_RATE_LIMIT_RATE, retry_after=MOCK_RETRY_AFTER_SECONDS, sloppy_rate=MOCK_SLOPPY_RATE, seed=None):
+        self.batch_seconds = batch_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.sloppy_rate = sloppy_rate
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+        self.files = {}
+        self.anthropic_batches = {}
+        self.openai_batches = {}
+
+    # Function to delay a request and decide whether it fails, returns the error response if it does
+    async def inject(self, provider):
+        self.stats["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(max(0.0, self.latency * (1 + self.jitter * (2 * self.random.random() - 1))))
+        draw = self.random.random()
+        if draw < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            kind = "rate_limit_error" if provider == "claude" else "rate_limit_exceeded"
+            return error_response(provider, 429, kind, "Mock rate limit", headers={"retry-after": str(self.retry_after)})
+        if draw < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            if provider == "claude":
+                return error_response(provider, 529, "overloaded_error", "Mock overload")
+            return error_response(provider, 500, "server_error", "Mock server error")
+        return None
+
+    def routes(self):
+        return [
+            web.post('/v1/messages', self.messages),
+            web.post('/v1/messages/batches', self.create_message_batch),
+            web.get('/v1/messages/batches/{batch_id}', self.get_message_batch),
+            web.get('/v1/messages/batches/{batch_id}/results', self.message_batch_results),
+            web.post('/v1/chat/completions', self.chat_completions),
+            web.post('/v1/files', self.upload_file),
+            web.get('/v1/files/{file_id}/content', self.file_content),
+            web.post('/v1/batches', self.create_batch),
+            web.get('/v1/batches/{batch_id}', self.get_batch),
+            web.get('/mock/stats', self.get_stats),
+        ]
+
+    async def messages(self, request):
+        params = await request.json()
+        return await self.inject("claude") or web.json_response(anthropic_message(params, self.sloppy_rate))
+
+    async def chat_completions(self, request):
+        params = await request.json()
+        return await self.inject("gpt") or web.json_response(openai_completion(params, self.sloppy_rate))
+
+    # Requests served and faults injected so far
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+    # Anthropic Message Batches
+    def message_batch(self, batch_id):
+        job = self.anthropic_batches[batch_id]
+        ended = time.time() - job["created"] >= self.batch_seconds
+        total = len(job["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else total, "succeeded": total if ended else 0, "errored": 0, "canceled": 0, "expired": 0},
+            "results_url": f"/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    async def create_message_batch(self, request):
+        body = await request.json()
+        batch_id = f"msgbatch_{uuid.uuid4().hex}"
+        self.anthropic_batches[batch_id] = {"created": time.time(), "requests": body["requests"]}
+        return web.json_response(self.message_batch(batch_id))
+
+    async def get_message_batch(self, request):
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in self.anthropic_batches:
+            raise web.HTTPNotFound()
+        return web.json_response(self.message_batch(batch_id))
+
+    async def message_batch_results(self, request):
+        job = self.anthropic_batches.get(request.match_info["batch_id"])
+        if job is None:
+            raise web.HTTPNotFound()
+        lines = [
+            json.dumps({"custom_id": entry["custom_id"], "result": {"type": "succeeded", "message": anthropic_message(entry["params"], self.sloppy_rate)}})
+            for entry in job["requests"]
+        ]
+        return web.Response(text="\n".join(lines) + "\n", content_type="application/x-jsonl")
+
+    # OpenAI Files and Batch
+    async def upload_file(self, request):
+        form = await request.post()
+        upload = form["file"]
+        content = upload.file.read()
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        return web.json_response({
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": upload.filename, "purpose": form.get("purpose", "batch"), "status": "processed"
+        })
+
+    async def file_content(self, request):
+        content = self.files.get(request.match_info["file_id"])
+        if content is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=content, content_type="application/octet-stream")
+
+    def batch(self, batch_id):
+        job = self.openai_batches[batch_id]
+        ended = time.time() - job["created"] >= self.batch_seconds
+        if ended and job["output_file_id"] is None:
+            lines = []
+            for line in self.files[job["input_file_id"]].decode('utf-8').splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    lines.append(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex}", "custom_id": entry["custom_id"],
+                        "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": openai_completion(entry["body"], self.sloppy_rate)},
+                        "error": None
+                    }))
+            job["output_file_id"] = f"file-{uuid.uuid4().hex}"
+            self.files[job["output_file_id"]] = ("\n".join(lines) + "\n").encode('utf-8')
+        return {
+            "id": batch_id, "object": "batch", "endpoint": job["endpoint"], "input_file_id": job["input_file_id"],
+            "completion_window": job["completion_window"], "created_at": int(job["created"]),
+            "status": "completed" if ended else "in_progress",
+            "output_file_id": job["output_file_id"], "error_file_id": None,
+            "request_counts": {"total": job["total"], "completed": job["total"] if ended else 0, "failed": 0},
+        }
+
+    async def create_batch(self, request):
+        body = await request.json()
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.openai_batches[batch_id] = {
+            "created": time.time(), "input_file_id": body["input_file_id"], "endpoint": body["endpoint"],
+            "completion_window": body.get("completion_window", "24h"), "output_file_id": None,
+            "total": sum(1 for line in self.files[body["input_file_id"]].splitlines() if line.strip())
+        }
+        return web.json_response(self.batch(batch_id))
+
+    async def get_batch(self, request):
+        batch_id = request.match_info["batch_id"]
+        if batch_id not in self.openai_batches:
+            raise web.HTTPNotFound()
+        return web.json_response(self.batch(batch_id))
+
+# Function to build the mock application
+def create_app(batch_seconds=MOCK_BATCH_SECONDS, **faults):
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.add_routes(MockProvider(batch_seconds, **faults).routes())
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock Anthropic/OpenAI endpoints for local runs.")
+    parser.add_argument('--port', type=int, default=int(os.getenv('MOCK_PORT', 8089)))
+    parser.add_argument('--batch-seconds', type=float, default=MOCK_BATCH_SECONDS, help="time a batch job takes to end")
+    parser.add_argument('--latency', type=float, default=MOCK_LATENCY_SECONDS, help="mean seconds a request takes")
+    parser.add_argument('--jitter', type=float, default=MOCK_LATENCY_JITTER, help="fraction the latency varies by, either way")
+    parser.add_argument('--error-rate', type=float, default=MOCK_ERROR_RATE, help="share of requests failing with a server error")
+    parser.add_argument('--rate-limit-rate', type=float, default=MOCK_RATE_LIMIT_RATE, help="share of requests answered with a 429")
+    parser.add_argument('--retry-after', type=float, default=MOCK_RETRY_AFTER_SECONDS, help="retry-after hint of the 429s")
+    parser.add_argument('--sloppy-rate', type=float, default=MOCK_SLOPPY_RATE, help="share of replies with loosely formatted scores and JSON")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the injected latencies and faults")
+    args = parser.parse_args()
+    web.run_app(create_app(args.batch_seconds, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, sloppy_rate=args.sloppy_rate, seed=args.seed), port=args.port, print=None)
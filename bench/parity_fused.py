@@ -0,0 +1,79 @@
+import os
+import sys
+import asyncio
+import argparse
+
+# Compare fresh verdicts, not cached ones
+os.environ.setdefault('VERDICT_CACHE', '0')
+
+from llm.call import get_complexity_score_manual, get_complexity_score_fv, get_complexity_score_fused
+from llm.analyze import get_files_info, FUSED_LANGUAGES
+from utils.line_counter import read_source
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Function to score every fixture of a language both with separate manual/FV requests and with a fused one
+async def score_language(language, files_dir, engine, protocol):
+    files = await get_files_info(language=language, files_dir=files_dir)
+    rows = []
+    for file_path, file_info in files.items():
+        file_info = {**file_info, "file_content": await read_source(file_info)}
+        manual, fv, fused = await asyncio.gather(
+            get_complexity_score_manual(file_path, file_info, chain=language, bot=engine, protocol=protocol),
+            get_complexity_score_fv(file_path, file_info, chain=language, bot=engine, protocol=protocol),
+            get_complexity_score_fused(file_path, file_info, chain=language, bot=engine, protocol=protocol)
+        )
+        if manual is None or fv is None or fused is None:
+            print(f'⚠️ {file_path} could not be scored in both modes, skipping it')
+            continue
+        fused_manual, fused_fv = fused
+        rows.append((file_path, manual[0], fused_manual[0], fv[0], fused_fv[0]))
+    return rows
+
+# Function to summarize how far fused scores are from split ones
+def parity_stats(rows):
+    diffs = []
+    for _, split_manual, fused_manual, split_fv, fused_fv in rows:
+        for split, fused in ((split_manual, fused_manual), (split_fv, fused_fv)):
+            try:
+                diffs.append(abs(float(split) - float(fused)))
+            except (TypeError, ValueError):
+                continue
+    if not diffs:
+        return {"scores": 0, "exact": 0, "within_one": 0, "mean_abs_diff": 0, "max_abs_diff": 0}
+    return {
+        "scores": len(diffs),
+        "exact": sum(1 for diff in diffs if diff == 0) / len(diffs) * 100,
+        "within_one": sum(1 for diff in diffs if diff <= 1) / len(diffs) * 100,
+        "mean_abs_diff": sum(diffs) / len(diffs),
+        "max_abs_diff": max(diffs),
+    }
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fused and split manual/FV scores on fixture files.")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="directory holding one sub-directory of files per language (evm, sol)")
+    parser.add_argument('--engine', default=os.getenv('LLM_ENGINE', 'claude'), choices=["claude", "gpt"])
+    parser.add_argument('--max-mean-diff', type=float, default=1.0, help="fail when fused scores drift further than this from split ones on average")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for language in FUSED_LANGUAGES:
+        files_dir = os.path.join(args.fixtures, language)
+        if os.path.isdir(files_dir):
+            rows.extend(await score_language(language, files_dir, args.engine, "Parity"))
+
+    print(f"\n{'file':<50} {'manual':>13} {'fv':>13}")
+    for file_path, split_manual, fused_manual, split_fv, fused_fv in rows:
+        print(f"{os.path.relpath(file_path, args.fixtures):<50} {split_manual:>6} -> {fused_manual:<4} {split_fv:>6} -> {fused_fv:<4}")
+    stats = parity_stats(rows)
+    print(f"\n{stats['scores']} score(s): {stats['exact']:.0f}% identical, {stats['within_one']:.0f}% within one point, "
+          f"mean difference {stats['mean_abs_diff']:.2f}, max difference {stats['max_abs_diff']:.0f}")
+
+    if not rows or stats['mean_abs_diff'] > args.max_mean_diff:
+        print("❌ Fused scoring drifts from split scoring")
+        sys.exit(1)
+    print("✅ Fused scoring is on par with split scoring")
+
+if __name__ == "__main__":
+    # Usage: python3 -m bench.parity_fused [--engine claude] [--fixtures bench/fixtures]
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+from bench.synthetic import generate_repo
+
+# End-to-end benchmark of analyze_contract on synthetic repositories, against the mock server:
+# no API key nor network needed. Each scenario runs in its own process so peak RSS is its own.
+
+SCENARIOS = {
+    "evm-100": {"language": "evm", "files": 100},
+    "evm-1000": {"language": "evm", "files": 1000},
+    "sol-300": {"language": "sol", "files": 300},
+    "move-300": {"language": "move", "files": 300},
+    "go-300": {"language": "go", "files": 300},
+    "ts-300": {"language": "ts", "files": 300},
+    # 5% server errors and 5% 429s, retried with backoff
+    "evm-faults": {"language": "evm", "files": 300, "error_rate": 0.05, "rate_limit_rate": 0.05},
+    # 30% of the (text) replies with "7/10" scores, code fences and trailing commas, repaired locally
+    "evm-sloppy": {"language": "evm", "files": 300, "sloppy_rate": 0.3, "engine": "gpt"},
+    "evm-grouped": {"language": "evm", "files": 300, "group_files": True},
+    "evm-batch": {"language": "evm", "files": 300, "batch_api": True},
+    # Second run over the same files, every verdict coming from the cache
+    "evm-warm": {"language": "evm", "files": 300, "warm": True},
+    "evm-5000": {"language": "evm", "files": 5000, "large": True},
+}
+
+# Mean latency of a mock request, about what a short completion takes
+BENCH_LATENCY_SECONDS = float(os.getenv('BENCH_LATENCY_SECONDS', 0.3))
+# Metrics compared against a baseline, and whether higher is better
+REGRESSION_METRICS = {"files_per_second": True, "p95_file_seconds": False, "peak_rss_mb": False}
+
+# Function to find a port the mock server can listen on
+def free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+# Function to start the mock server of a scenario and wait until it answers
+def start_mock_server(port, scenario, latency, seed):
+    command = [
+        sys.executable, '-m', 'bench.mock_server', '--port', str(port), '--batch-seconds', '1', '--seed', str(seed),
+        '--latency', str(latency), '--error-rate', str(scenario.get("error_rate", 0)),
+        '--rate-limit-rate', str(scenario.get("rate_limit_rate", 0)), '--retry-after', '0.5',
+        '--sloppy-rate', str(scenario.get("sloppy_rate", 0)),
+    ]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://localhost:{port}/mock/stats', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The mock server didn't start")
+
+# Function to fetch what the mock server served
+def mock_stats(port):
+    with urllib.request.urlopen(f'http://localhost:{port}/mock/stats', timeout=5) as response:
+        return json.load(response)
+
+# Function to run one pass of a scenario in a child process, returns its measurements
+def run_child(name, scenario, files_dir, port, cache_dir, engine, max_in_flight):
+    env = {
+        **os.environ,
+        "ANTHROPIC_API_KEY": "mock", "OPENAI_API_KEY": "mock",
+        "ANTHROPIC_BASE_URL": f"http://localhost:{port}", "OPENAI_BASE_URL": f"http://localhost:{port}/v1",
+        # The mock doesn't enforce provider budgets, the client-side ones would only measure themselves
+        "CLAUDE_RPM": "1000000", "CLAUDE_TPM": "1000000000", "GPT_RPM": "1000000", "GPT_TPM": "1000000000",
+        "BATCH_POLL_SECONDS": "1", "BATCH_IDLE_SECONDS": "1",
+        "VERDICT_CACHE": "1" if cache_dir else "0",
+        "OTEL_EXPORTER_OTLP_ENDPOINT": "",
+    }
+    if cache_dir:
+        env["VERDICT_CACHE_DIR"] = cache_dir
+    options = {"name": name, "files_dir": files_dir, "engine": engine, "max_in_flight": max_in_flight, **scenario}
+    child = subprocess.run([sys.executable, '-m', 'bench.run_bench', '--child', json.dumps(options)], env=env, capture_output=True, text=True)
+    lines = child.stdout.strip().splitlines()
+    if child.returncode != 0 or not lines or not lines[-1].startswith('{'):
+        print((child.stdout + child.stderr)[-3000:])
+        raise RuntimeError(f"Scenario {name} failed")
+    return json.loads(lines[-1])
+
+# Function to run a scenario: synthetic repo, mock server, one (or two, warm) analysis passes
+def run_scenario(name, scenario, work_dir, files, engine, latency, max_in_flight, seed):
+    scenario = {**scenario, "files": files or scenario["files"]}
+    files_dir = os.path.join(work_dir, f"{scenario['language']}-{scenario['files']}-{seed}")
+    if not os.path.isdir(files_dir):
+        generate_repo(files_dir, scenario["language"], scenario["files"], seed)
+    cache_dir = tempfile.mkdtemp(dir=work_dir, prefix='cache-') if scenario.get("warm") else None
+    port = free_port()
+    server = start_mock_server(port, scenario, latency, seed)
+    try:
+        if scenario.get("warm"):
+            run_child(name, scenario, files_dir, port, cache_dir, engine, max_in_flight)
+        before = mock_stats(port)
+        result = run_child(name, scenario, files_dir, port, cache_dir, engine, max_in_flight)
+        after = mock_stats(port)
+    finally:
+        server.kill()
+        server.wait()
+    result.update({key: after[key] - before[key] for key in after})
+    return result
+
+# Child process: analyze the files with a run profile, measuring throughput, per-file latency and peak RSS
+async def child_main(options):
+    import resource
+    from llm.analyze import analyze_contract
+    from utils.run_profile import RunProfile, current_profile, percentile
+
+    profile = RunProfile(options["name"])
+    current_profile.set(profile)
+    with tempfile.TemporaryDirectory() as reports_dir:
+        started = time.monotonic()
+        results, program_counter = await analyze_contract(
+            options["language"], options["engine"], options["name"], max_in_flight=options["max_in_flight"],
+            jsonl_file=os.path.join(reports_dir, 'bench.jsonl'), files_dir=options["files_dir"],
+            batch_api=options.get("batch_api", False), group_files=options.get("group_files", False)
+        )
+        seconds = time.monotonic() - started
+
+    # A file's latency runs from its first span (reading it) to the end of its last request.
+    # Grouped files are timed together, under the label of their group's request.
+    windows, requested = {}, set()
+    for record in profile.spans:
+        if record.get("file") and record["name"] != "ingest" and "start" in record:
+            first, last = windows.get(record["file"], (record["start"], record["start"] + record["seconds"]))
+            windows[record["file"]] = (min(first, record["start"]), max(last, record["start"] + record["seconds"]))
+            if record["name"] == "request":
+                requested.add(record["file"])
+    latencies = [last - first for key, (first, last) in windows.items() if key in requested]
+    stages = profile.summary()
+    return {
+        "scenario": options["name"],
+        "files": options["files"],
+        "scored": len(results),
+        "seconds": round(seconds, 2),
+        "files_per_second": round(len(results) / seconds, 2) if seconds else None,
+        "p50_file_seconds": round(percentile(latencies, 50) or 0, 3),
+        "p95_file_seconds": round(percentile(latencies, 95) or 0, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "retries": sum(stage["retries"] for stage in stages.values()),
+        "repairs": sum(stage["repairs"] for stage in stages.values()),
+    }
+
+# Function to list the metrics of a run that regressed past the tolerance of a baseline
+def regressions(results, baseline, tolerance):
+    found = []
+    for result in results:
+        reference = baseline.get(result["scenario"])
+        if reference is None:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            if not reference.get(metric) or result.get(metric) is None:
+                continue
+            change = (result[metric] - reference[metric]) / reference[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                found.append(f"{result['scenario']} {metric}: {reference[metric]} -> {result[metric]} ({change:+.0%})")
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer end to end on synthetic repositories against the mock server.")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="scenario to run, repeatable (default: all but the large ones)")
+    parser.add_argument('--files', type=int, help="override the number of files of every scenario")
+    parser.add_argument('--engine', default='claude', choices=["claude", "gpt"])
+    parser.add_argument('--latency', type=float, default=BENCH_LATENCY_SECONDS, help="mean seconds a mock request takes")
+    parser.add_argument('--max-in-flight', type=int, default=int(os.getenv('MAX_IN_FLIGHT', 8)))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="where the synthetic repositories are written (default: a temporary directory)")
+    parser.add_argument('--output', help="write the results to this JSON file, usable as a baseline")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="relative regression tolerated against the baseline")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(asyncio.run(child_main(json.loads(args.child)))))
+        return
+
+    names = args.scenario or [name for name, scenario in SCENARIOS.items() if not scenario.get("large")]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='bench-')
+    os.makedirs(work_dir, exist_ok=True)
+    results = []
+    print(f"{'scenario':<14} {'files':>6} {'scored':>6} {'seconds':>8} {'files/s':>8} {'p50 s':>7} {'p95 s':>7} {'RSS MB':>7} {'requests':>8} {'faults':>6}")
+    for name in names:
+        result = run_scenario(name, SCENARIOS[name], work_dir, args.files, args.engine, args.latency, args.max_in_flight, args.seed)
+        results.append(result)
+        print(f"{name:<14} {result['files']:>6} {result['scored']:>6} {result['seconds']:>8.1f} {result['files_per_second']:>8.1f} "
+              f"{result['p50_file_seconds']:>7.2f} {result['p95_file_seconds']:>7.2f} {result['peak_rss_mb']:>7.0f} "
+              f"{result['requests']:>8} {result['errors'] + result['rate_limited']:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({result["scenario"]: result for result in results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        if found:
+            print("❌ Regressions against the baseline:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print(f"✅ No regression beyond {args.tolerance:.0%} against the baseline")
+
+if __name__ == "__main__":
+    # Usage: python3 -m bench.run_bench [--scenario evm-100] [--output bench.json] [--baseline bench.json]
+    main()
@@ -0,0 +1,174 @@
+import os
+import random
+import argparse
+
+# Seeded generators of synthetic repositories, shaped like the code audited in each language:
+# files spread over a few modules, importing earlier files, of varied size, with some interfaces
+# (declarations only) and some verbatim copies, so dedup, pre-scoring and grouping all get exercised.
+
+EXTENSIONS = {'evm': '.sol', 'sol': '.rs', 'move': '.move', 'go': '.go', 'ts': '.ts'}
+MODULES = ['core', 'vault', 'oracle', 'governance', 'lib']
+
+# Share of files that are interfaces, and that are copies of an earlier file
+INTERFACE_SHARE = 0.15
+DUPLICATE_SHARE = 0.05
+# Functions of a regular file, drawn from a skewed distribution so a few files are large
+MAX_FUNCTIONS = 40
+
+def solidity_file(rng, name, imports, functions, interface):
+    lines = ["// SPDX-License-Identifier: MIT", "pragma solidity ^0.8.20;", ""]
+    lines += [f'import "{path}";' for path in imports] + [""]
+    if interface:
+        lines.append(f"interface {name} {{")
+        lines += [f"    function f{i}(uint256 amount) external returns (uint256);" for i in range(functions)]
+        return "\n".join(lines + ["}", ""])
+    lines += [f"contract {name} {{", "    mapping(address => uint256) public balances;", "    address public owner;", ""]
+    for i in range(functions):
+        lines += [
+            f"    /// @notice Moves `amount` for step {i}",
+            f"    function f{i}(address to, uint256 amount) external returns (uint256) {{",
+            "        require(amount > 0, \"zero\");",
+            "        if (balances[msg.sender] < amount) { revert(\"balance\"); }",
+            "        balances[msg.sender] -= amount;",
+            "        balances[to] += amount;",
+        ]
+        if rng.random() < 0.3:
+            lines += ["        (bool ok, ) = to.call{value: amount}(\"\");", "        require(ok, \"call\");"]
+        if rng.random() < 0.1:
+            lines += ["        assembly { sstore(0, amount) }"]
+        lines += [f"        return amount * {i + 1};", "    }", ""]
+    return "\n".join(lines + ["}", ""])
+
+def rust_file(rng, name, imports, functions, interface):
+    lines = ["use anchor_lang::prelude::*;"] + [f"use crate::{module}::*;" for module in imports] + [""]
+    if interface:
+        lines.append(f"pub trait {name.capitalize()} {{")
+        lines += [f"    fn f{i}(&self, amount: u64) -> Result<u64>;" for i in range(functions)]
+        return "\n".join(lines + ["}", ""])
+    lines += ["#[account]", f"pub struct {name.capitalize()}State {{", "    pub total: u64,", "    pub authority: Pubkey,", "}", ""]
+    for i in range(functions):
+        lines += [
+            f"/// Moves `amount` for step {i}",
+            f"pub fn f{i}(ctx: Context<{name.capitalize()}State>, amount: u64) -> Result<u64> {{",
+            "    require!(amount > 0, ErrorCode::Zero);",
+            "    let state = &mut ctx.accounts.state;",
+            "    match state.total.checked_add(amount) {",
+            "        Some(total) => state.total = total,",
+            "        None => return err!(ErrorCode::Overflow),",
+            "    }",
+        ]
+        if rng.random() < 0.2:
+            lines += ["    invoke(&ix, &[ctx.accounts.payer.to_account_info()])?;"]
+        lines += [f"    Ok(amount * {i + 1})", "}", ""]
+    return "\n".join(lines)
+
+def move_file(rng, name, imports, functions, interface):
+    lines = [f"module bench::{name} {{"] + [f"    use bench::{module};" for module in imports] + ["    use std::signer;", ""]
+    lines += ["    struct Pool has key { total: u64 }", ""]
+    if interface:
+        lines += [f"    native public fun f{i}(amount: u64): u64;" for i in range(functions)]
+        return "\n".join(lines + ["}", ""])
+    for i in range(functions):
+        lines += [
+            f"    /// Moves `amount` for step {i}",
+            f"    public fun f{i}(account: &signer, amount: u64): u64 acquires Pool {{",
+            "        assert!(amount > 0, 1);",
+            "        let pool = borrow_global_mut<Pool>(signer::address_of(account));",
+            "        if (pool.total < amount) { abort 2 };",
+            "        pool.total = pool.total - amount;",
+            f"        amount * {i + 1}",
+            "    }",
+            "",
+        ]
+    return "\n".join(lines + ["}", ""])
+
+def go_file(rng, name, imports, functions, interface, package):
+    lines = [f"package {package}", "", "import ("] + ['\t"fmt"'] + [f'\t"github.com/bench/app/{module}"' for module in imports] + [")", ""]
+    if interface:
+        lines.append(f"type {name.capitalize()} interface {{")
+        lines += [f"\tF{i}(amount uint64) (uint64, error)" for i in range(functions)]
+        return "\n".join(lines + ["}", ""])
+    lines += [f"type {name.capitalize()}Keeper struct {{", "\ttotal uint64", "}", ""]
+    for i in range(functions):
+        lines += [
+            f"// F{i} moves amount for step {i}",
+            f"func (k *{name.capitalize()}Keeper) F{i}(amount uint64) (uint64, error) {{",
+            "\tif amount == 0 {",
+            '\t\treturn 0, fmt.Errorf("zero")',
+            "\t}",
+            "\tfor j := uint64(0); j < amount && j < 8; j++ {",
+            "\t\tk.total += j",
+            "\t}",
+            f"\treturn amount * {i + 1}, nil",
+            "}",
+            "",
+        ]
+    return "\n".join(lines)
+
+def typescript_file(rng, name, imports, functions, interface):
+    lines = [f"import {{ {os.path.basename(path).capitalize()} }} from '{path}';" for path in imports] + [""]
+    if interface:
+        lines.append(f"export interface {name.capitalize()} {{")
+        lines += [f"  f{i}(amount: bigint): Promise<bigint>;" for i in range(functions)]
+        return "\n".join(lines + ["}", ""])
+    lines += [f"export class {name.capitalize()}Client {{", "  private total = 0n;", ""]
+    for i in range(functions):
+        lines += [
+            f"  /** Moves `amount` for step {i} */",
+            f"  async f{i}(amount: bigint): Promise<bigint> {{",
+            "    if (amount <= 0n) {",
+            "      throw new Error('zero');",
+            "    }",
+            "    this.total += amount > 10n ? amount : 10n;",
+        ]
+        if rng.random() < 0.2:
+            lines += ["    await fetch('https://rpc.example/' + amount.toString());"]
+        lines += [f"    return amount * {i + 1}n;", "  }", ""]
+    return "\n".join(lines + ["}", ""])
+
+# Function to spell the path of an earlier file as a relative import
+def relative_import(file_path, other, keep_extension=True):
+    path = os.path.relpath(other if keep_extension else os.path.splitext(other)[0], os.path.dirname(file_path)).replace(os.sep, '/')
+    return path if path.startswith('.') else './' + path
+
+# Function to write a synthetic repository of `files` files, returns the paths written
+def generate_repo(path, language, files, seed=0):
+    rng = random.Random(f"{language}:{files}:{seed}")
+    extension = EXTENSIONS[language]
+    written = []
+    for index in range(files):
+        module = MODULES[index % len(MODULES)]
+        name = f"{module}{index}"
+        file_path = os.path.join(path, module, name + extension)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if written and rng.random() < DUPLICATE_SHARE:
+            with open(rng.choice(written)) as f:
+                content = f.read()
+        else:
+            interface = rng.random() < INTERFACE_SHARE
+            functions = max(1, min(MAX_FUNCTIONS, int(rng.paretovariate(1.2) * 2)))
+            earlier = rng.sample(written, min(len(written), rng.randint(0, 3)))
+            if language == 'evm':
+                content = solidity_file(rng, name, [relative_import(file_path, other) for other in earlier], functions, interface)
+            elif language == 'sol':
+                content = rust_file(rng, name, [os.path.splitext(os.path.basename(other))[0] for other in earlier], functions, interface)
+            elif language == 'move':
+                content = move_file(rng, name, [os.path.splitext(os.path.basename(other))[0] for other in earlier], functions, interface)
+            elif language == 'go':
+                content = go_file(rng, name, sorted({os.path.basename(os.path.dirname(other)) for other in earlier} - {module}), functions, interface, module)
+            else:
+                content = typescript_file(rng, name, [relative_import(file_path, other, keep_extension=False) for other in earlier], functions, interface)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        written.append(file_path)
+    return written
+
+if __name__ == "__main__":
+    # Usage: python3 -m bench.synthetic --language evm --files 500 --output /tmp/synthetic-evm
+    parser = argparse.ArgumentParser(description="Generate a synthetic repository to benchmark the analyzer on.")
+    parser.add_argument('--language', required=True, choices=sorted(EXTENSIONS))
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help="directory to write the files to")
+    args = parser.parse_args()
+    print(f"Wrote {len(generate_repo(args.output, args.language, args.files, args.seed))} file(s) to {args.output}")
@@ -1,77 +1,248 @@
-import subprocess
-import json
-from llm.call import get_complexity_score_manual, get_complexity_score_fv
-from utils.import_lines import count_import_lines_solidity
+import os
+import math
+import asyncio
+from llm.call import get_complexity_score_manual, get_complexity_score_fv, get_complexity_score_fused, get_complexity_scores_grouped, BATCH_API
+from utils.save import append_result
+from utils.line_counter import count_lines, read_source
+from llm.chunker import load_tokenizer
+from utils.workers import gather_bounded, gather_fair
+from utils.incremental import diff_against_report
+from utils.minify import minify_for_prompt
+from utils.dedup import group_duplicates, fan_out, NEAR_DUPLICATES
+from utils.prescore import prescore, is_trivial, local_rationale, prescore_stats, PRESCORE_THRESHOLD
+from utils.depgraph import build_graph, pack_groups, GROUP_FILES
+from utils.run_profile import traced
 
 
+# Maximum number of files being scored at the same time
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', 8))
+
+# Strip comments, blank runs and import lists from the code sent in prompts
+MINIFY_PROMPTS = os.getenv('MINIFY_PROMPTS', '0') == '1'
+
+# Ask for the manual and FV scores of sol/evm files in a single request, FUSED_SCORING=0 sends them separately
+FUSED_SCORING = os.getenv('FUSED_SCORING', '1') != '0'
+FUSED_LANGUAGES = ["sol", "evm"]
+
 # Function to analyze all project files
-async def analyze_contract(LANGUAGE, LLM_ENGINE, PROJECT_NAME):
-    files = await get_files_info(language=LANGUAGE)
-    results = []
-    program_counter = 0
+async def analyze_contract(LANGUAGE, LLM_ENGINE, PROJECT_NAME, max_in_flight=MAX_IN_FLIGHT, previous_report=None, jsonl_file=None, journal=None, files_dir='./files', limiter=None, minify=MINIFY_PROMPTS, batch_api=BATCH_API, fused=FUSED_SCORING, near_duplicates=NEAR_DUPLICATES, prescore_threshold=PRESCORE_THRESHOLD, group_files=GROUP_FILES):
+    # The tokenizer is read from disk while the files are ingested, never on the event loop
+    files, _ = await asyncio.gather(get_files_info(language=LANGUAGE, files_dir=files_dir, signatures=near_duplicates), asyncio.to_thread(load_tokenizer))
+    protocol = PROJECT_NAME.capitalize()
+    
+    # Only one file per group of duplicates is scored, the others get a copy of its verdict
+    duplicates = group_duplicates(files, near=near_duplicates)
+    exact = sum(1 for _, kind, _ in duplicates.values() if kind == "exact")
+    if duplicates:
+        print(f'Skipping {exact} exact and {len(duplicates) - exact} near duplicate file(s), they share the verdict of the first file of their group 👯')
+    # Exact copies are counted once, like before
+    program_counter = len(files) - exact
     
-    for file_path, file_info in files.items():
-        program_counter += 1
-        score, rationale, code_lines, code_to_comment_ratio, purpose = await get_complexity_score_manual(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=PROJECT_NAME.capitalize())
-        
-        # Initialize optional fields
-        score_fv = None
-        rationale_fv = None
-        
-        if LANGUAGE in ["sol", "evm"]:
-            score_fv, rationale_fv = await get_complexity_score_fv(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=PROJECT_NAME.capitalize())          
-        if score is not None:
-            results.append({
-                'file': file_path,
-                'purpose': purpose,
-                'score_manual': score,
-                'rationale': rationale,
-                'score_fv': score_fv if score_fv is not None else "0",
-                'rationale_fv': rationale_fv if rationale_fv is not None else "",
-                'ncloc': code_lines,
-                'code to comment ratio': str(code_to_comment_ratio)
-            })
+    # In incremental mode only added or modified files are scored again
+    reused, to_score = {}, {file_path: file_info for file_path, file_info in files.items() if file_path not in duplicates}
+    if previous_report is not None:
+        reused, to_score, deleted = diff_against_report(files, previous_report)
+        # Duplicates are always copied from their current representative, and a reused verdict that was a copy isn't one of its own
+        for file_path, entry in list(reused.items()):
+            if file_path in duplicates or 'duplicate_of' in entry:
+                del reused[file_path]
+                to_score[file_path] = files[file_path]
+        to_score = {file_path: file_info for file_path, file_info in to_score.items() if file_path not in duplicates}
+        print(f'Incremental run: {len(reused)} unchanged, {len(to_score)} added or modified, {len(deleted)} deleted file(s) 🔁')
+        if jsonl_file is not None:
+            for entry in reused.values():
+                await append_result(entry, jsonl_file)
+    
+    # Small files importing one another are scored together, sharing their context
+    groups = []
+    if group_files:
+        candidates = {
+            file_path: file_info for file_path, file_info in to_score.items()
+            if not (prescore_threshold and is_trivial(file_info['prescore'], file_info['metrics'], prescore_threshold))
+        }
+        groups = pack_groups(candidates, build_graph(files, LANGUAGE))
+        if groups:
+            print(f'Scoring {sum(len(group) for group in groups)} related file(s) in {len(groups)} grouped request(s) 🔗')
+    grouped = {file_path for group in groups for file_path in group}
+    
+    units = [analyze_group_and_record({file_path: to_score[file_path] for file_path in group}, LANGUAGE, LLM_ENGINE, protocol, jsonl_file, journal, minify, batch_api, fused) for group in groups]
+    units += [analyze_and_record(file_path, file_info, LANGUAGE, LLM_ENGINE, protocol, jsonl_file, journal, minify, batch_api, fused, prescore_threshold) for file_path, file_info in to_score.items() if file_path not in grouped]
+    if batch_api:
+        # Every file queues its requests at once so they end up in the same batch job
+        analyzed = await asyncio.gather(*units)
+    elif limiter is not None:
+        # Batch runs share one budget across projects
+        analyzed = await gather_fair(units, limiter, PROJECT_NAME)
+    else:
+        analyzed = await gather_bounded(units, max_in_flight)
+    scored = {}
+    for outcome in analyzed:
+        # Grouped units return the results of all their files
+        for result in outcome if isinstance(outcome, list) else [outcome]:
+            if result is not None:
+                scored[result['file']] = result
+    
+    for file_path, (representative, kind, similarity) in duplicates.items():
+        result = scored.get(representative, reused.get(representative))
+        if result is None:
+            continue
+        scored[file_path] = fan_out(result, file_path, files[file_path], kind, similarity)
+        if jsonl_file is not None:
+            await append_result(scored[file_path], jsonl_file)
+    
+    # Merge fresh and reused entries back in file order
+    results = [scored.get(file_path, reused.get(file_path)) for file_path in files]
+    results = [result for result in results if result is not None]
             
     print(f'Number of files in this repo: {program_counter}')  
     return results, program_counter
 
-# Function to run CLOC on 'docs' directories and get file information
-async def get_files_info(language):
-    if language == 'evm':
-        result = subprocess.run(['cloc', './files', '--json', '--include-lang=Solidity', '--by-file'], capture_output=True, text=True)
-    elif language == 'sol':
-        result = subprocess.run(['cloc', './files', '--json', '--include-lang=Rust', '--by-file'], capture_output=True, text=True)
-    elif language == 'move':
-        result = subprocess.run(['cloc', './files', '--json', '--read-lang-def=./lang_files/move_lang_def.txt', '--by-file'], capture_output=True, text=True)
-    elif language == 'ts':
-        result = subprocess.run(['cloc', './files', '--json', '--include-lang=TypeScript', '--by-file'], capture_output=True, text=True)
+# Function to analyze a file and stream its result to the JSONL report right away
+async def analyze_and_record(file_path, file_info, LANGUAGE, LLM_ENGINE, protocol, jsonl_file, journal=None, minify=False, batch_api=False, fused=False, prescore_threshold=0):
+    result = await analyze_file(file_path, file_info, LANGUAGE, LLM_ENGINE, protocol, journal, minify, batch_api, fused, prescore_threshold)
+    if result is not None and jsonl_file is not None:
+        await append_result(result, jsonl_file)
+    return result
+
+# Function to run manual and FV scoring of a single file concurrently
+async def analyze_file(file_path, file_info, LANGUAGE, LLM_ENGINE, protocol, journal=None, minify=False, batch_api=False, fused=False, prescore_threshold=0):
+    prescore_stats["files"] += 1
+    # Interfaces and other trivial files get a local verdict, the file isn't even read again
+    if prescore_threshold and is_trivial(file_info['prescore'], file_info['metrics'], prescore_threshold):
+        prescore_stats["local"] += 1
+        print(f'Program {file_path} got assigned a local complexity score of {file_info["prescore"]}, skipping the LLM 🧮')
+        return local_verdict(file_path, file_info)
+    
+    file_info = await load_for_prompt(file_path, file_info, LANGUAGE, minify)
+    if file_info is None:
+        return None
+    fused_result = None
+    if fused and LANGUAGE in FUSED_LANGUAGES:
+        fused_result = await get_complexity_score_fused(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=protocol, journal=journal, batch=batch_api)
+        if fused_result is None:
+            print(f'Falling back to separate manual and FV requests for {file_path} 🔧')
+    if fused_result is not None:
+        manual_result, fv_result = fused_result
+    elif LANGUAGE in ["sol", "evm"]:
+        manual_result, fv_result = await asyncio.gather(
+            get_complexity_score_manual(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=protocol, journal=journal, batch=batch_api),
+            get_complexity_score_fv(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=protocol, journal=journal, batch=batch_api)
+        )
     else:
-        result = subprocess.run(['cloc', './files', '--json', '--include-lang=Go', '--by-file'], capture_output=True, text=True)
-     
-    cloc_output = json.loads(result.stdout)
+        manual_result = await get_complexity_score_manual(file_path, file_info, chain=LANGUAGE, bot=LLM_ENGINE, protocol=protocol, journal=journal, batch=batch_api)
+        fv_result = None
+    
+    if manual_result is None:
+        return None
+    return build_result(file_path, file_info, manual_result, fv_result)
+
+# Function to analyze a group of related files with one request, files it couldn't score being analyzed on their own
+async def analyze_group(group, LANGUAGE, LLM_ENGINE, protocol, journal=None, minify=False, batch_api=False, fused=False):
+    loaded = {}
+    for file_path, file_info in group.items():
+        loaded_info = await load_for_prompt(file_path, file_info, LANGUAGE, minify)
+        if loaded_info is not None:
+            loaded[file_path] = loaded_info
+    verdicts = await get_complexity_scores_grouped(loaded, chain=LANGUAGE, bot=LLM_ENGINE, protocol=protocol, journal=journal, batch=batch_api)
     
+    results = {}
+    for file_path, (manual_result, fv_result) in verdicts.items():
+        prescore_stats["files"] += 1
+        results[file_path] = build_result(file_path, loaded[file_path], manual_result, fv_result)
+    left = [file_path for file_path in group if file_path not in results]
+    if left:
+        print(f'Scoring {len(left)} file(s) of the group on their own 🔧')
+        for file_path, result in zip(left, await asyncio.gather(*(analyze_file(file_path, group[file_path], LANGUAGE, LLM_ENGINE, protocol, journal, minify, batch_api, fused) for file_path in left))):
+            results[file_path] = result
+    return [results[file_path] for file_path in group]
+
+# Function to analyze a group of files and stream their results to the JSONL report
+async def analyze_group_and_record(group, LANGUAGE, LLM_ENGINE, protocol, jsonl_file, journal=None, minify=False, batch_api=False, fused=False):
+    results = await analyze_group(group, LANGUAGE, LLM_ENGINE, protocol, journal, minify, batch_api, fused)
+    if jsonl_file is not None:
+        for result in results:
+            if result is not None:
+                await append_result(result, jsonl_file)
+    return results
+
+# Function to load the text of a file for its prompt, None when it can't be read
+@traced("read")
+async def load_for_prompt(file_path, file_info, LANGUAGE, minify=False):
+    # The text only lives while the file is in flight
+    try:
+        file_content = await read_source(file_info)
+    except OSError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+    # Metadata (code and comment lines) keeps the original counts, only the prompt content shrinks
+    if minify:
+        file_content = minify_for_prompt(file_path, file_content, LANGUAGE)
+    return {**file_info, "file_content": file_content, "minified": minify}
+
+# Function to build the report entry of a file from its manual and FV verdicts
+def build_result(file_path, file_info, manual_result, fv_result):
+    score, rationale, code_lines, code_to_comment_ratio, purpose, model = manual_result
+    
+    # Initialize optional fields
+    score_fv, rationale_fv, model_fv = fv_result if fv_result is not None else (None, None, None)
+    
+    return {
+        'file': file_path,
+        'purpose': purpose,
+        'score_manual': score,
+        'rationale': rationale,
+        'score_fv': score_fv if score_fv is not None else 0,
+        'rationale_fv': rationale_fv if rationale_fv is not None else "",
+        # Models that actually answered, the router may have sent a request to the other provider
+        'model': model,
+        'model_fv': model_fv if model_fv is not None else "",
+        'ncloc': code_lines,
+        'code to comment ratio': str(code_to_comment_ratio),
+        'sha256': file_info['sha256'],
+        'prescore': file_info['prescore']
+    }
+
+# Function to build the report entry of a file scored by the local pre-scorer only
+def local_verdict(file_path, file_info):
+    code_lines, comment_lines = file_info['code_lines'], file_info['comment_lines']
+    return {
+        'file': file_path,
+        'purpose': "Not sent to the LLM, its local pre-score is below the threshold",
+        'score_manual': file_info['prescore'],
+        'rationale': local_rationale(file_info['prescore'], file_info['metrics'], code_lines),
+        # The pre-score says nothing about formal verification, the FV score is left unscored rather than 0
+        'score_fv': None,
+        'rationale_fv': "",
+        'model': "local",
+        'model_fv': "",
+        'ncloc': str(code_lines),
+        'code to comment ratio': str(math.ceil((comment_lines / code_lines) * 100)) if code_lines else "0",
+        'sha256': file_info['sha256'],
+        'prescore': file_info['prescore']
+    }
+
+# Function to ingest the files directory (lines, imports and fingerprint of each file in one pass)
+@traced("ingest")
+async def get_files_info(language, files_dir='./files', signatures=False):
+    # Duplicates are kept, analyze_contract groups them
+    counted = await count_lines(files_dir, language, skip_duplicates=False, signatures=signatures)
+    
+    # File contents are not held here, they are read back once a file's turn comes
     files = {}
-    for file_path, file_info in cloc_output.items():
-        if file_path != 'header' and file_path != 'SUM':
-            
-            # Read the file content
-            try:
-                with open(file_path, 'r') as file:
-                    file_content = file.read()
-            except IOError as e:
-                print(f"Error reading file {file_path}: {e}")
-                file_content = ""
-            
-            # Count import lines
-            import_lines = await count_import_lines_solidity(file_content)
-            
-            files[file_path] = {
-                "file_name": file_path,
-                "code_lines": file_info.get('code', 0) - int(import_lines),
-                "comment_lines": file_info.get('comment', 0),
-                "blank_lines": file_info.get('blank', 0),
-                "file_content": file_content
-            }
+    for file_path, file_info in counted.items():
+        files[file_path] = {
+            "file_name": file_path,
+            "code_lines": file_info.get('code', 0) - int(file_info.get('import_lines', 0)),
+            "comment_lines": file_info.get('comment', 0),
+            "blank_lines": file_info.get('blank', 0),
+            "sha256": file_info['sha256'],
+            "metrics": file_info['metrics'],
+            "imports": file_info['imports'],
+            "modules": file_info['modules'],
+            "size": file_info['size']
+        }
+        files[file_path]["prescore"] = prescore(file_info['metrics'], files[file_path]["code_lines"])
+        if 'minhash' in file_info:
+            files[file_path]["minhash"] = file_info['minhash']
 
     return files
-
@@ -0,0 +1,158 @@
+import os
+import json
+import asyncio
+import itertools
+import tempfile
+from anthropic.types import Message
+from openai.types.chat import ChatCompletion
+
+# A batch job is submitted once no request was queued for this long, or as soon as it is full
+BATCH_IDLE_SECONDS = float(os.getenv('BATCH_IDLE_SECONDS', 5))
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 10000))
+# Delay between two status checks of a submitted job
+BATCH_POLL_SECONDS = float(os.getenv('BATCH_POLL_SECONDS', 30))
+
+ANTHROPIC_BATCH_HEADERS = {"anthropic-beta": "message-batches-2024-09-24,prompt-caching-2024-07-31"}
+OPENAI_BATCH_DONE = ("completed", "failed", "expired", "cancelled")
+
+# Function to write a request as a line of an Anthropic Message Batch
+def anthropic_entry(custom_id, params):
+    return {"custom_id": custom_id, "params": params}
+
+# Function to write a request as a line of an OpenAI Batch input file
+def openai_entry(custom_id, params):
+    return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": params}
+
+class BatchCollector:
+    """
+    Gathers the requests of a run into provider batch jobs.
+
+    Callers await `request(params)` as they would a regular API call and get back the raw
+    completion of their request once the job holding it has ended. Requests queued while a
+    job is running go into the next one.
+
+    Each request is written to the job's JSONL spool file (a line shaped by `entry`) as soon as
+    it is queued, so the collector holds no request while the other files queue theirs; `run`
+    gets the spool, rewound, and the number of requests in it.
+    """
+    def __init__(self, name, run, entry, idle_seconds=BATCH_IDLE_SECONDS, max_requests=BATCH_MAX_REQUESTS):
+        self.name = name
+        self.run = run
+        self.entry = entry
+        self.idle_seconds = idle_seconds
+        self.max_requests = max_requests
+        self.ids = itertools.count(1)
+        self.pending = []
+        self.spool = None
+        self.timer = None
+        self.jobs = set()
+
+    async def request(self, params):
+        future = asyncio.get_running_loop().create_future()
+        custom_id = f'{self.name}-{next(self.ids)}'
+        if self.spool is None:
+            self.spool = tempfile.TemporaryFile()
+        self.spool.write(json.dumps(self.entry(custom_id, params)).encode('utf-8') + b"\n")
+        # The collector keeps no copy of the request, the spool has it
+        del params
+        self.pending.append((custom_id, future))
+        if len(self.pending) >= self.max_requests:
+            self.flush()
+        else:
+            # Wait for the other files of the run to queue their requests too
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = asyncio.get_running_loop().call_later(self.idle_seconds, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        spool, self.spool = self.spool, None
+        job = asyncio.ensure_future(self.submit(batch, spool))
+        self.jobs.add(job)
+        job.add_done_callback(self.jobs.discard)
+
+    async def submit(self, batch, spool):
+        futures = dict(batch)
+        print(f'Submitting a {self.name.upper()} batch job of {len(batch)} request(s) 📨')
+        try:
+            spool.seek(0)
+            results = await self.run(spool, len(batch))
+        except Exception as e:
+            results = {custom_id: f"batch job failed: {e}" for custom_id in futures}
+        finally:
+            spool.close()
+        for custom_id, future in futures.items():
+            if future.done():
+                continue
+            outcome = results.get(custom_id, "missing from the batch results")
+            if isinstance(outcome, str):
+                future.set_exception(RuntimeError(f"{custom_id}: {outcome}"))
+            else:
+                future.set_result(outcome)
+
+# Function to run a spool of requests as an Anthropic Message Batch, returning each request's Message or error.
+# The API takes the job as a single JSON body rather than a file, so the requests are read back from the spool here.
+async def run_anthropic_batch(client, spool, count, poll_seconds=BATCH_POLL_SECONDS):
+    options = {"headers": ANTHROPIC_BATCH_HEADERS}
+    job = await client.post(
+        "/v1/messages/batches",
+        body={"requests": [json.loads(line) for line in spool if line.strip()]},
+        cast_to=object,
+        options=options
+    )
+    while job["processing_status"] != "ended":
+        counts = job.get("request_counts", {})
+        print(f'CLAUDE batch {job["id"]} is {job["processing_status"]} ({counts.get("succeeded", 0)} done, {counts.get("processing", 0)} to go) ⏳')
+        await asyncio.sleep(poll_seconds)
+        job = await client.get(f'/v1/messages/batches/{job["id"]}', cast_to=object, options=options)
+
+    output = await client.get(f'/v1/messages/batches/{job["id"]}/results', cast_to=str, options=options)
+    results = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        result = entry.get("result", {})
+        if result.get("type") == "succeeded":
+            results[entry["custom_id"]] = Message.model_validate(result["message"])
+        else:
+            results[entry["custom_id"]] = json.dumps(result.get("error") or result.get("type"))
+    return results
+
+# Function to run a spool of requests as an OpenAI Batch, returning each request's ChatCompletion or error
+async def run_openai_batch(client, spool, count, poll_seconds=BATCH_POLL_SECONDS):
+    # The spool is the input file, uploaded from disk as is
+    upload = await client.files.create(file=("batch.jsonl", spool), purpose="batch")
+    job = await client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+    while job.status not in OPENAI_BATCH_DONE:
+        counts = job.request_counts
+        done = counts.completed if counts else 0
+        total = counts.total if counts else count
+        print(f'GPT batch {job.id} is {job.status} ({done} of {total} done) ⏳')
+        await asyncio.sleep(poll_seconds)
+        job = await client.batches.retrieve(job.id)
+
+    # Expired jobs still return the requests they completed
+    results = {}
+    for file_id in (job.output_file_id, job.error_file_id):
+        if not file_id:
+            continue
+        output = await client.files.content(file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                results[entry["custom_id"]] = ChatCompletion.model_validate(response["body"])
+            else:
+                results[entry["custom_id"]] = json.dumps(entry.get("error") or response.get("body"))
+    if not results:
+        print(f'GPT batch {job.id} ended as {job.status} without results ❌')
+    return results
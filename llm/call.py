@@ -1,134 +1,430 @@
 import os
 import math
 import json
+import asyncio
+import httpx
 import instructor
-from pydantic import BaseModel
+from typing import Annotated
+from collections import Counter
+from pydantic import BaseModel, BeforeValidator, Field
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic, RateLimitError
-from system.prompt_sol import prepare_sol_prompt
-from system.prompt_evm import prepare_evm_prompt
-from system.prompt_move import prepare_move_prompt
-from system.prompt_go import prepare_go_prompt
-from system.prompt_ts import prepare_ts_prompt
+from anthropic import AsyncAnthropic, RateLimitError, APIConnectionError, InternalServerError
+from openai import RateLimitError as OpenAIRateLimitError, APIConnectionError as OpenAIConnectionError, InternalServerError as OpenAIServerError
+from instructor.process_response import handle_response_model
+from system.prompt_sol import prepare_sol_prompt, SOL_INSTRUCTIONS
+from system.prompt_evm import prepare_evm_prompt, EVM_INSTRUCTIONS
+from system.prompt_move import prepare_move_prompt, MOVE_INSTRUCTIONS
+from system.prompt_go import prepare_go_prompt, GO_INSTRUCTIONS
+from system.prompt_ts import prepare_ts_prompt, TS_INSTRUCTIONS
 from system.prompt_scheduler import prepare_scheduler_prompt
-from system_fv.prompts import prepare_evm_prompt_fv, prepare_sol_prompt_fv
+from system_fv.prompts import prepare_evm_prompt_fv, prepare_sol_prompt_fv, EVM_FV_INSTRUCTIONS, SOL_FV_INSTRUCTIONS
+from system.prompt_fused import EVM_FUSED_INSTRUCTIONS, SOL_FUSED_INSTRUCTIONS
+from system.prompt_group import EVM_GROUP_INSTRUCTIONS, SOL_GROUP_INSTRUCTIONS, MOVE_GROUP_INSTRUCTIONS, GO_GROUP_INSTRUCTIONS, TS_GROUP_INSTRUCTIONS
+from utils.cache import verdict_key, load_verdict, store_verdict
+from llm.ratelimit import ProviderLimiter, estimate_tokens, retry_after_seconds, backoff_delay
+from llm.chunker import CHUNK_TOKEN_LIMIT, count_tokens, split_source, merge_verdicts
+from llm.usage import record_usage, record_prefix, reject_prefix
+from llm.structured import parse_score, parse_response
+from llm.batch_api import BatchCollector, run_anthropic_batch, run_openai_batch, anthropic_entry, openai_entry
+from llm.router import LatencyRouter
+from utils.run_profile import span, traced, note
+from utils.planner import plan_audit, render_plan, summarize_plan
 
 # Load secrets
 load_dotenv()
 
+# Scores are integers in the schema sent to the providers, and read tolerantly ("7/10", "7.0", "seven") from what comes back
+Score = Annotated[int, Field(ge=1, le=10), BeforeValidator(parse_score)]
+# A file may have nothing worth formally verifying
+FVScore = Annotated[int, Field(ge=0, le=10), BeforeValidator(lambda value: parse_score(value, low=0))]
+
 class Complexity(BaseModel):
-    complexity: str
+    complexity: Score
     rationale: str
     purpose: str | None
 
-# Set up clients
-claude_client = AsyncAnthropic(api_key=os.environ['ANTHROPIC_API_KEY'])
+class FVComplexity(Complexity):
+    complexity: FVScore
+
+# Manual and FV verdicts of a file answered by a single request
+class FusedComplexity(BaseModel):
+    complexity: Score
+    rationale: str
+    complexity_fv: FVScore
+    rationale_fv: str
+    purpose: str | None
+
+    def manual(self):
+        return Complexity(complexity=self.complexity, rationale=self.rationale, purpose=self.purpose)
+
+    def fv(self):
+        return FVComplexity(complexity=self.complexity_fv, rationale=self.rationale_fv, purpose=self.purpose)
+
+# Verdicts of several related files answered by a single request
+class FileComplexity(Complexity):
+    file: str
+
+class FileFusedComplexity(FusedComplexity):
+    file: str
+
+class GroupComplexity(BaseModel):
+    files: list[FileComplexity]
+
+class GroupFusedComplexity(BaseModel):
+    files: list[FileFusedComplexity]
+
+# Set up clients, one pooled HTTP/2 connection pool per provider shared by every call in the process
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+http_limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+http_timeout = httpx.Timeout(600.0, connect=10.0)
+claude_client = AsyncAnthropic(
+    api_key=os.environ['ANTHROPIC_API_KEY'],
+    max_retries=0,
+    http_client=httpx.AsyncClient(http2=True, limits=http_limits, timeout=http_timeout)
+)
 claude_model_prod = "claude-3-5-sonnet-latest"
-openai_client = AsyncOpenAI(api_key=os.environ['OPENAI_API_KEY'])
+openai_client = AsyncOpenAI(
+    api_key=os.environ['OPENAI_API_KEY'],
+    max_retries=0,
+    http_client=httpx.AsyncClient(http2=True, limits=http_limits, timeout=http_timeout)
+)
 openai_model_prod = "o1-mini"
 
-# Set up Instructor wrapper:
-instructor_client_anthropic = instructor.from_anthropic(AsyncAnthropic(), mode=instructor.Mode.ANTHROPIC_JSON)
-instructor_client_openai =  instructor.from_openai(AsyncOpenAI(), mode=instructor.Mode.JSON_O1)
+# Per-file prompt builder, system prompt and static instructions of each chain
+MANUAL_PROMPTS = {
+    "sol": (prepare_sol_prompt, "You are an expert security researcher specializing in manual security audits of Rust-based Solana programs.", SOL_INSTRUCTIONS),
+    "evm": (prepare_evm_prompt, "You are an expert security researcher specializing in manual security audits of Solidity-based Ethereum smart contracts.", EVM_INSTRUCTIONS),
+    "move": (prepare_move_prompt, "You are an expert Move smart contract analyzer specializing in security audits and manual review of Move-based smart contracts for the Aptos blockchain.", MOVE_INSTRUCTIONS),
+    "go": (prepare_go_prompt, "You are an expert security researcher specializing in manual audits of Go-based projects intended to interact with the Ethereum ecosystem.", GO_INSTRUCTIONS),
+    "ts": (prepare_ts_prompt, "You are an expert security researcher specializing in manual audits of TypeScript-based projects.", TS_INSTRUCTIONS),
+}
+FV_PROMPTS = {
+    "sol": (prepare_sol_prompt_fv, "You are an expert security engineer specializing in formal verification of Rust-based Solana programs.", SOL_FV_INSTRUCTIONS),
+    "evm": (prepare_evm_prompt_fv, "You are an expert security engineer specializing in formal verification of Solidity-based Ethereum smart contracts.", EVM_FV_INSTRUCTIONS),
+}
+# Fused prompts reuse the manual per-file builder
+FUSED_PROMPTS = {
+    "sol": (prepare_sol_prompt, "You are an expert security researcher specializing in manual security audits and formal verification of Rust-based Solana programs.", SOL_FUSED_INSTRUCTIONS),
+    "evm": (prepare_evm_prompt, "You are an expert security researcher specializing in manual security audits and formal verification of Solidity-based Ethereum smart contracts.", EVM_FUSED_INSTRUCTIONS),
+}
+
+# Grouped prompts reuse the manual per-file builder, sol/evm groups being asked for both scores
+GROUP_PROMPTS = {
+    "sol": (prepare_sol_prompt, FUSED_PROMPTS["sol"][1], SOL_GROUP_INSTRUCTIONS, GroupFusedComplexity),
+    "evm": (prepare_evm_prompt, FUSED_PROMPTS["evm"][1], EVM_GROUP_INSTRUCTIONS, GroupFusedComplexity),
+    "move": (prepare_move_prompt, MANUAL_PROMPTS["move"][1], MOVE_GROUP_INSTRUCTIONS, GroupComplexity),
+    "go": (prepare_go_prompt, MANUAL_PROMPTS["go"][1], GO_GROUP_INSTRUCTIONS, GroupComplexity),
+    "ts": (prepare_ts_prompt, MANUAL_PROMPTS["ts"][1], TS_GROUP_INSTRUCTIONS, GroupComplexity),
+}
+# Output tokens allowed per file of a grouped request
+GROUP_OUTPUT_TOKENS = 300
+# Output tokens of the schedule narration, the day-by-day plan itself is rendered locally
+SCHEDULE_OUTPUT_TOKENS = 2048
+
+# Bump whenever the prompt templates in system/ or system_fv/ change, so cached verdicts are not reused
+PROMPT_VERSION = "4"
+
+# The static instructions are marked as a cache breakpoint, so that everything up to them (tool schema and system
+# prompt included) is only billed in full on the first request of each chain and read from Anthropic's prompt cache afterwards
+PROMPT_CACHING = os.getenv('PROMPT_CACHING', '1') != '0'
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+# Anthropic doesn't cache shorter prefixes: 1024 tokens for Sonnet and Opus, 2048 for Haiku
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv('PROMPT_CACHE_MIN_TOKENS', 2048 if 'haiku' in claude_model_prod else 1024))
+
+# Name of the chain each set of static instructions belongs to, for the prompt caching report
+PREFIX_NAMES = {
+    **{instructions: f"{chain} manual" for chain, (_, _, instructions) in MANUAL_PROMPTS.items()},
+    **{instructions: f"{chain} FV" for chain, (_, _, instructions) in FV_PROMPTS.items()},
+    **{instructions: f"{chain} fused" for chain, (_, _, instructions) in FUSED_PROMPTS.items()},
+    **{instructions: f"{chain} grouped" for chain, (_, _, instructions, _) in GROUP_PROMPTS.items()},
+}
+
+# Functions sending the raw requests, recording the token usage (prompt cache included) of every attempt.
+# The router times these calls only, once a provider slot and the rate limiter have let them through.
+async def create_claude_message(**kwargs):
+    async with router.sending("claude"):
+        completion = await claude_client.messages.create(**kwargs)
+    record_usage("claude", completion)
+    return completion
+
+async def create_gpt_completion(**kwargs):
+    async with router.sending("gpt"):
+        completion = await openai_client.chat.completions.create(**kwargs)
+    record_usage("gpt", completion)
+    return completion
+
+# Instructor only shapes the requests: Claude is forced to answer through a tool whose input schema is the response
+# model (typed scores included), o1 models have neither tools nor JSON mode and get the schema in the prompt.
+# Replies are parsed locally and repaired rather than re-asked, a reply that can't be read fails over to the other provider.
+CLAUDE_MODE = instructor.Mode.ANTHROPIC_TOOLS
+GPT_MODE = instructor.Mode.JSON_O1
+
+# Function to build the parameters of a Claude request answering with `response_model`
+def claude_params(system, prompt, instructions, response_model, max_tokens):
+    _, params = handle_response_model(
+        response_model,
+        mode=CLAUDE_MODE,
+        temperature=0.0,
+        model=claude_model_prod,
+        system=system,
+        messages=claude_messages(prompt, instructions),
+        max_tokens=max_tokens
+    )
+    if instructions and cacheable_prefix(system, instructions, params.get("tools")):
+        params["messages"][0]["content"][0]["cache_control"] = {"type": "ephemeral"}
+    return params
+
+# Function to build the parameters of a GPT request answering with `response_model`
+def gpt_params(prompt, instructions, response_model):
+    _, params = handle_response_model(
+        response_model,
+        mode=GPT_MODE,
+        temperature=0.0,
+        model=openai_model_prod,
+        messages=[
+            #{"role": "system", "content": system},
+            {"role": "user", "content": instructions + prompt}
+        ]
+    )
+    return params
+
+# Function to read a reply into `response_model`, counting the replies that needed fixing
+def read_reply(bot, completion, response_model):
+    verdict, repaired = parse_response(bot, completion, response_model)
+    if repaired:
+        note("repairs")
+    return verdict
+
+# Cap concurrent requests per provider, independently of how many files are in flight
+provider_limits = {
+    "claude": int(os.getenv('CLAUDE_MAX_IN_FLIGHT', 4)),
+    "gpt": int(os.getenv('GPT_MAX_IN_FLIGHT', 4)),
+}
+provider_slots = {provider: asyncio.Semaphore(max(1, limit)) for provider, limit in provider_limits.items()}
+
+# Shared requests/tokens per minute budgets
+rate_limiters = {
+    "claude": ProviderLimiter("claude", rpm=int(os.getenv('CLAUDE_RPM', 50)), tpm=int(os.getenv('CLAUDE_TPM', 80000))),
+    "gpt": ProviderLimiter("gpt", rpm=int(os.getenv('GPT_RPM', 500)), tpm=int(os.getenv('GPT_TPM', 200000))),
+}
+RATE_LIMIT_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', 5))
+
+# Latency-aware routing between the two providers, hedging requests stuck past their provider's usual latency
+router = LatencyRouter(models={"claude": claude_model_prod, "gpt": openai_model_prod})
+
+# Offline runs send their requests as provider batch jobs instead, trading latency for throughput and cost.
+# The few calls a job makes (submit, poll, fetch) are retried by the SDKs.
+BATCH_API = os.getenv('BATCH_API', '0') == '1'
+batch_collectors = {
+    "claude": BatchCollector("claude", lambda spool, count: run_anthropic_batch(claude_client.with_options(max_retries=RATE_LIMIT_RETRIES), spool, count), anthropic_entry),
+    "gpt": BatchCollector("gpt", lambda spool, count: run_openai_batch(openai_client.with_options(max_retries=RATE_LIMIT_RETRIES), spool, count), openai_entry),
+}
+
+# Function to send a request within the provider's budget, retrying 429s and transient errors with jittered backoff
+async def call_with_limits(provider, prompt_tokens, request):
+    limiter = rate_limiters[provider]
+    attempt = 0
+    while True:
+        await limiter.acquire(prompt_tokens)
+        try:
+            response = await request()
+        except (RateLimitError, OpenAIRateLimitError) as e:
+            retry_after = retry_after_seconds(e)
+            limiter.penalize(retry_after)
+            if attempt >= RATE_LIMIT_RETRIES:
+                raise
+            delay = max(retry_after or 0, backoff_delay(attempt))
+            print(f'{provider.upper()} is rate limiting us, retrying in {delay:.1f}s ⏳')
+            note("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except (APIConnectionError, InternalServerError, OpenAIConnectionError, OpenAIServerError) as e:
+            if attempt >= 2:
+                raise
+            delay = backoff_delay(attempt)
+            print(f'{provider.upper()} had a transient issue ({e}), retrying in {delay:.1f}s ⏳')
+            note("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        limiter.reward()
+        return response
+
+# Function to build Claude's messages, the static instructions going first so they can be cached (see claude_params)
+def claude_messages(prompt, instructions=""):
+    content = [{"type": "text", "text": prompt}]
+    if instructions:
+        content.insert(0, {"type": "text", "text": instructions})
+    return [{"role": "user", "content": content}]
+
+_prefix_tokens = {}
+# Prefixes Claude didn't cache although our estimate put them over the minimum
+_uncached_prefixes = set()
+
+# Function to tell whether the static prefix of a Claude request (tool schema, system prompt and instructions) is
+# long enough for Anthropic's prompt cache; a breakpoint on a shorter prefix is ignored and would only mislead
+def cacheable_prefix(system, instructions, tools=None):
+    key = (system, instructions, json.dumps(tools or []))
+    if key not in _prefix_tokens:
+        _prefix_tokens[key] = sum(count_tokens(text) for text in key)
+    tokens = _prefix_tokens[key]
+    cached = PROMPT_CACHING and tokens >= PROMPT_CACHE_MIN_TOKENS and key not in _uncached_prefixes
+    record_prefix(PREFIX_NAMES.get(instructions, "other"), tokens, cached, PROMPT_CACHE_MIN_TOKENS if PROMPT_CACHING else None)
+    return cached
+
+# Function to drop the cache breakpoint of a prefix once Claude served it without reading nor writing its cache,
+# our token count being an estimate of Claude's
+def confirm_prefix(params, completion):
+    usage = getattr(completion, "usage", None)
+    if usage is None or (getattr(usage, "cache_creation_input_tokens", 0) or 0) or (getattr(usage, "cache_read_input_tokens", 0) or 0):
+        return
+    instructions = params["messages"][0]["content"][0]["text"]
+    _uncached_prefixes.add((params["system"], instructions, json.dumps(params.get("tools") or [])))
+    reject_prefix(PREFIX_NAMES.get(instructions, "other"))
+
+# Function to tell whether a Claude request carries a cache breakpoint, and so needs the prompt caching header
+def uses_prompt_cache(params):
+    return any(isinstance(block, dict) and "cache_control" in block for message in params["messages"] for block in message["content"])
+
+# Function to ask Claude for a complexity verdict
+async def ask_claude(system, prompt, instructions="", response_model=Complexity, max_tokens=1024):
+    params = claude_params(system, prompt, instructions, response_model, max_tokens)
+    async with provider_slots["claude"]:
+        completion = await call_with_limits("claude", estimate_tokens(system + instructions + prompt) + max_tokens, lambda: create_claude_message(
+            **params,
+            extra_headers=PROMPT_CACHING_HEADERS if uses_prompt_cache(params) else None
+        ))
+    if uses_prompt_cache(params):
+        confirm_prefix(params, completion)
+    return read_reply("claude", completion, response_model)
+
+# Function to ask GPT for a complexity verdict, OpenAI caches the static instructions on its own as a shared prefix
+async def ask_gpt(prompt, instructions="", response_model=Complexity):
+    params = gpt_params(prompt, instructions, response_model)
+    async with provider_slots["gpt"]:
+        completion = await call_with_limits("gpt", estimate_tokens(instructions + prompt) + 1024, lambda: create_gpt_completion(**params, timeout=60))
+    return read_reply("gpt", completion, response_model)
+
+# Function to ask for a complexity verdict through the provider's batch API, the request being the same as in ask_claude/ask_gpt
+async def ask_batch(bot, system, prompt, instructions="", response_model=Complexity, max_tokens=1024):
+    if bot == "claude":
+        completion = await batch_collectors["claude"].request(claude_params(system, prompt, instructions, response_model, max_tokens))
+    else:
+        completion = await batch_collectors["gpt"].request(gpt_params(prompt, instructions, response_model))
+    record_usage(bot, completion)
+    return read_reply(bot, completion, response_model)
+
+# Function to ask the chosen bot, the router sending the request to the other provider too if it fails or is slow.
+# Returns (response, provider), the provider being the one that actually answered.
+async def ask_bot(bot, system, prompt, file_path, instructions="", batch=False, response_model=Complexity, max_tokens=1024):
+    if batch:
+        print(f'{file_path} is queued for the {bot.upper()} batch job 📥')
+        try:
+            async with span("request", file=file_path, provider=bot, batch=True):
+                return await ask_batch(bot, system, prompt, instructions, response_model=response_model, max_tokens=max_tokens), bot
+        except Exception as e:
+            print(f'The {bot.upper()} batch job could not score {file_path} ({e}), asking directly 🔧')
+            note("fallbacks")
+    requests = {
+        "claude": lambda: ask_claude(system, prompt, instructions, response_model=response_model, max_tokens=max_tokens),
+        "gpt": lambda: ask_gpt(prompt, instructions, response_model=response_model),
+    }
+    first, second = router.order(bot, "gpt" if bot == "claude" else "claude")
+    print(f'{first.upper()} will take a look at {file_path} 🦾')
+    async with span("request", file=file_path, provider=first):
+        provider, response = await router.route(file_path, (first, requests[first]), (second, requests[second]))
+    return response, provider
+
+# Function to score a file, splitting it into parts scored concurrently when it is too large for a single request.
+# Returns (response, provider) like ask_bot, a split file being credited to the provider that answered most parts.
+async def ask_bot_chunked(bot, system, code, chain, file_path, build_prompt, instructions="", batch=False, response_model=Complexity):
+    if count_tokens(code) <= CHUNK_TOKEN_LIMIT:
+        async with span("prompt", file=file_path):
+            prompt = await build_prompt(file_path, code)
+        return await ask_bot(bot, system, prompt, file_path, instructions, batch, response_model)
+    
+    async with span("prompt", file=file_path):
+        parts = split_source(code, chain)
+        print(f'{file_path} is too large for a single request, scoring it in {len(parts)} parts ✂️')
+        prompts = [
+            await build_prompt(f'{file_path} (part {index} of {len(parts)}, lines {first_line}-{last_line})', text)
+            for index, (first_line, last_line, text) in enumerate(parts, start=1)
+        ]
+    verdicts = await asyncio.gather(*(ask_bot(bot, system, prompt, file_path, instructions, batch, response_model) for prompt in prompts), return_exceptions=True)
+    # A verdict missing a part would understate the file, so it takes the same fallback or error path as a single request
+    failed = [(index, answer) for index, answer in enumerate(verdicts, start=1) if isinstance(answer, BaseException)]
+    if failed:
+        numbers = ", ".join(str(index) for index, _ in failed)
+        raise ValueError(f"part(s) {numbers} of {len(parts)} of {file_path} could not be scored: {failed[0][1]}") from failed[0][1]
+    
+    scored = [(verdict, count_tokens(text)) for (verdict, _), (_, _, text) in zip(verdicts, parts)]
+    weights = [weight for _, weight in scored]
+    providers = Counter(provider for _, provider in verdicts)
+    provider = providers.most_common(1)[0][0]
+    if response_model is FusedComplexity:
+        # Both verdicts are merged on their own
+        merged = merge_verdicts([verdict.manual() for verdict, _ in scored], weights)
+        merged_fv = merge_verdicts([verdict.fv() for verdict, _ in scored], weights)
+        if merged is None or merged_fv is None:
+            raise ValueError(f"none of the {len(parts)} parts of {file_path} could be scored")
+        complexity, rationale, purpose = merged
+        complexity_fv, rationale_fv, _ = merged_fv
+        return FusedComplexity(complexity=complexity, rationale=rationale, complexity_fv=complexity_fv, rationale_fv=rationale_fv, purpose=purpose), provider
+    merged = merge_verdicts([verdict for verdict, _ in scored], weights)
+    if merged is None:
+        raise ValueError(f"none of the {len(parts)} parts of {file_path} could be scored")
+    complexity, rationale, purpose = merged
+    return response_model(complexity=complexity, rationale=rationale, purpose=purpose), provider
+
+# Function to look up the cache key of a file verdict for a provider, the chosen bot or the one that answered
+def cache_key_for(file_info, chain, bot, mode):
+    model = claude_model_prod if bot == "claude" else openai_model_prod
+    prompt_version = f'{PROMPT_VERSION}-min' if file_info.get('minified') else PROMPT_VERSION
+    return verdict_key(file_info['sha256'], chain, prompt_version, model, mode), model
 
 # Function to run the bot on a file and get the complexity score
-async def get_complexity_score_manual(file_path, file_info, chain, bot, protocol):
+@traced("score.manual")
+async def get_complexity_score_manual(file_path, file_info, chain, bot, protocol, journal=None, batch=False):
     try:
         code = file_info['file_content']
         code_lines = str(file_info['code_lines'])
         comment_lines = str(file_info['comment_lines'])
         # Compute code to comment ratio
         code_to_comment_ratio = math.ceil((int(comment_lines) / int(code_lines)) * 100)
+        # Skip units already completed by an interrupted run
+        if journal is not None:
+            journaled = journal.get(file_path, "manual", file_info['sha256'])
+            if journaled is not None:
+                print(f'Program {file_path} was already scored {journaled["complexity"]} before the run was interrupted ⏭️')
+                return journaled["complexity"], journaled["rationale"], code_lines, code_to_comment_ratio, journaled["purpose"], journaled.get("model")
+        # Reuse the verdict of an unchanged file
+        key, _ = cache_key_for(file_info, chain, bot, "manual")
+        cached = await load_verdict(key)
+        if cached is not None:
+            print(f'Program {file_path} reused its cached complexity score of {cached["complexity"]} ♻️')
+            if journal is not None:
+                await journal.record(file_path, "manual", file_info['sha256'], cached["complexity"], cached["rationale"], cached["purpose"], cached.get("model"))
+            return cached["complexity"], cached["rationale"], code_lines, code_to_comment_ratio, cached["purpose"], cached.get("model")
         # Prepare system prompt based on chain
-        if chain == "sol":
-            prompt = await prepare_sol_prompt(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system= "You are an expert security researcher specializing in manual security audits of Rust-based Solana programs."
-        elif chain == "evm":
-            prompt= await prepare_evm_prompt(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system="You are an expert security researcher specializing in manual security audits of Solidity-based Ethereum smart contracts."
-        elif chain == "move":
-            prompt= await prepare_move_prompt(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system="You are an expert Move smart contract analyzer specializing in security audits and manual review of Move-based smart contracts for the Aptos blockchain."
-        elif chain == "go":
-            prompt= await prepare_go_prompt(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system="You are an expert security researcher specializing in manual audits of Go-based projects intended to interact with the Ethereum ecosystem."
-        elif chain == "ts":
-            prompt= await prepare_ts_prompt(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system="You are an expert security researcher specializing in manual audits of TypeScript-based projects."
+        prepare_prompt, system, instructions = MANUAL_PROMPTS[chain]
+        build_prompt = lambda path, text: prepare_prompt(path, code_lines , file_info['comment_lines'], code_to_comment_ratio, text, protocol)
         print(f'Conjuring {chain.upper()} bot 🤖')
         
-        if bot == "claude":
-            try:
-                print(f'{bot.upper()} will take a look at {file_path} 🦾')
-                response = await instructor_client_anthropic.messages.create(
-                    temperature=0.0,
-                    model=claude_model_prod,
-                    system=system,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1024,
-                    response_model=Complexity,
-                    max_retries=3   
-                )
-                score = response.complexity
-                rationale = response.rationale
-                purpose = response.purpose
-            except Exception as e:
-                print(f'Claude encountered an issue{e}, trying GPT 🔧')
-                response = await instructor_client_openai.chat.completions.create(
-                    temperature=0.0,
-                    model=openai_model_prod,
-                    messages=[
-                        #{"role": "system", "content": system},
-                        {"role": "user", "content": prompt}
-                    ],
-                    timeout=60,
-                    response_model=Complexity  
-                )
-                score = response.complexity
-                rationale = response.rationale
-                purpose = response.purpose
-                
-            
-        elif bot == "gpt":
-            try:
-                print(f'{bot.upper()} will take a look at {file_path} 🦾')
-                response = await instructor_client_openai.chat.completions.create(
-                    temperature=0.0,
-                    model=openai_model_prod,
-                    messages=[
-                        #{"role": "system", "content": system},
-                        {"role": "user", "content": prompt}
-                    ],
-                    timeout=60,
-                    response_model=Complexity,
-                    max_retries=3  
-                )
-                score = response.complexity
-                rationale = response.rationale
-                purpose = response.purpose
-            except Exception as e:
-                print(f'GPT encountered an issue{e}, trying Claude 🔧')
-                response = await instructor_client_anthropic.messages.create(
-                    temperature=0.0,
-                    model=claude_model_prod,
-                    system=system,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1024,
-                    response_model=Complexity, 
-                )
-                score = response.complexity
-                rationale = response.rationale
-                purpose = response.purpose
-                
+        response, provider = await ask_bot_chunked(bot, system, code, chain, file_path, build_prompt, instructions, batch)
+        score = response.complexity
+        rationale = response.rationale
+        purpose = response.purpose
             
         if score is not None and rationale is not None:
             print(f'Program {file_path} got assigned a complexity score of {score}. {rationale}')
-            return score, rationale, code_lines, code_to_comment_ratio, purpose
+            # Filed under the model that answered, which the router may have switched
+            key, model = cache_key_for(file_info, chain, provider, "manual")
+            await store_verdict(key, score, rationale, purpose, model)
+            if journal is not None:
+                await journal.record(file_path, "manual", file_info['sha256'], score, rationale, purpose, model)
+            return score, rationale, code_lines, code_to_comment_ratio, purpose, model
         else:
             print(f"Couldn't generate complexity info for {file_path}: Missing 'complexity' or 'rationale' in API response")
             return None
@@ -140,88 +436,44 @@ async def get_complexity_score_manual(file_path, file_info, chain, bot, protocol
         return None
     
 # Function to run the bot on a file and get the complexity score
-async def get_complexity_score_fv(file_path, file_info, chain, bot, protocol):
+@traced("score.fv")
+async def get_complexity_score_fv(file_path, file_info, chain, bot, protocol, journal=None, batch=False):
     try:
         code = file_info['file_content']
         code_lines = str(file_info['code_lines'])
         comment_lines = str(file_info['comment_lines'])
         # Compute code to comment ratio
         code_to_comment_ratio = math.ceil((int(comment_lines) / int(code_lines)) * 100)
+        # Skip units already completed by an interrupted run
+        if journal is not None:
+            journaled = journal.get(file_path, "fv", file_info['sha256'])
+            if journaled is not None:
+                print(f'Program {file_path} was already scored {journaled["complexity"]} (FV) before the run was interrupted ⏭️')
+                return journaled["complexity"], journaled["rationale"], journaled.get("model")
+        # Reuse the verdict of an unchanged file
+        key, _ = cache_key_for(file_info, chain, bot, "fv")
+        cached = await load_verdict(key)
+        if cached is not None:
+            print(f'Program {file_path} reused its cached complexity score (FV) of {cached["complexity"]} ♻️')
+            if journal is not None:
+                await journal.record(file_path, "fv", file_info['sha256'], cached["complexity"], cached["rationale"], cached["purpose"], cached.get("model"))
+            return cached["complexity"], cached["rationale"], cached.get("model")
         # Prepare system prompt based on chain
-        if chain == "sol":
-            prompt = await prepare_sol_prompt_fv(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system= "You are an expert security engineer specializing in formal verification of Rust-based Solana programs."
-        elif chain == "evm":
-            prompt= await prepare_evm_prompt_fv(file_path, code_lines , file_info['comment_lines'], code_to_comment_ratio, code, protocol)
-            system="You are an expert security engineer specializing in formal verification of Solidity-based Ethereum smart contracts."
+        prepare_prompt, system, instructions = FV_PROMPTS[chain]
+        build_prompt = lambda path, text: prepare_prompt(path, code_lines, code_to_comment_ratio, text, protocol)
         print(f'Conjuring {chain.upper()} FV bot 🧙‍♂️')
         
-        if bot == "claude":
-            try:
-                print(f'{bot.upper()} will take a look at {file_path} 🦾')
-                response = await instructor_client_anthropic.messages.create(
-                    temperature=0.0,
-                    model=claude_model_prod,
-                    system=system,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1024,
-                    response_model=Complexity,
-                    max_retries=3   
-                )
-                score_fv = response.complexity
-                rationale_fv = response.rationale
-                
-            except Exception as e:
-                print(f'Claude encountered an issue{e}, trying GPT 🔧')
-                response = await instructor_client_openai.chat.completions.create(
-                    temperature=0.0,
-                    model=openai_model_prod,
-                    messages=[
-                        #{"role": "system", "content": system},
-                        {"role": "user", "content": prompt}
-                    ],
-                    timeout=60,
-                    response_model=Complexity  
-                )
-                score_fv = response.complexity
-                rationale_fv = response.rationale
-                               
-        elif bot == "gpt":
-            try:
-                print(f'{bot.upper()} will take a look at {file_path} 🦾')
-                response = await instructor_client_openai.chat.completions.create(
-                    temperature=0.0,
-                    model=openai_model_prod,
-                    messages=[
-                        #{"role": "system", "content": system},
-                        {"role": "user", "content": prompt}
-                    ],
-                    timeout=60,
-                    response_model=Complexity,
-                    max_retries=3  
-                )
-                score_fv = response.complexity
-                rationale_fv = response.rationale
-            except Exception as e:
-                print(f'GPT encountered an issue{e}, trying Claude 🔧')
-                response = await instructor_client_anthropic.messages.create(
-                    temperature=0.0,
-                    model=claude_model_prod,
-                    system=system,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1024,
-                    response_model=Complexity, 
-                )
-                score_fv = response.complexity
-                rationale_fv = response.rationale
+        response, provider = await ask_bot_chunked(bot, system, code, chain, file_path, build_prompt, instructions, batch, response_model=FVComplexity)
+        score_fv = response.complexity
+        rationale_fv = response.rationale
             
         if score_fv is not None and rationale_fv is not None:
             print(f'Program {file_path} got assigned a complexity score (FV) of {score_fv}. {rationale_fv}')
-            return score_fv, rationale_fv
+            key, model = cache_key_for(file_info, chain, provider, "fv")
+            await store_verdict(key, score_fv, rationale_fv, response.purpose, model)
+            if journal is not None:
+                await journal.record(file_path, "fv", file_info['sha256'], score_fv, rationale_fv, response.purpose, model)
+            return score_fv, rationale_fv, model
         else:
             print(f"Couldn't generate complexity info for {file_path}: Missing 'complexity' or 'rationale' in API response")
             return None
@@ -232,22 +484,156 @@ async def get_complexity_score_fv(file_path, file_info, chain, bot, protocol):
         print(f"Failed to generate complexity info for {file_path}: {e}")
         return None
 
+# Function to get the manual and FV complexity scores of a file from a single request
+@traced("score.fused")
+async def get_complexity_score_fused(file_path, file_info, chain, bot, protocol, journal=None, batch=False):
+    """
+    Returns (manual_result, fv_result) shaped like the results of get_complexity_score_manual and
+    get_complexity_score_fv, or None so that the caller can fall back to separate requests.
+    """
+    try:
+        code = file_info['file_content']
+        code_lines = str(file_info['code_lines'])
+        comment_lines = str(file_info['comment_lines'])
+        # Compute code to comment ratio
+        code_to_comment_ratio = math.ceil((int(comment_lines) / int(code_lines)) * 100)
+        # Skip units already completed by an interrupted run
+        if journal is not None:
+            journaled = journal.get(file_path, "manual", file_info['sha256'])
+            journaled_fv = journal.get(file_path, "fv", file_info['sha256'])
+            if journaled is not None and journaled_fv is not None:
+                print(f'Program {file_path} was already scored {journaled["complexity"]} and {journaled_fv["complexity"]} (FV) before the run was interrupted ⏭️')
+                return (journaled["complexity"], journaled["rationale"], code_lines, code_to_comment_ratio, journaled["purpose"], journaled.get("model")), \
+                    (journaled_fv["complexity"], journaled_fv["rationale"], journaled_fv.get("model"))
+        # Reuse the verdicts of an unchanged file, fused verdicts are cached apart from the separate ones
+        key, _ = cache_key_for(file_info, chain, bot, "fused")
+        key_fv, _ = cache_key_for(file_info, chain, bot, "fused-fv")
+        cached, cached_fv = await load_verdict(key), await load_verdict(key_fv)
+        if cached is not None and cached_fv is not None:
+            print(f'Program {file_path} reused its cached complexity scores of {cached["complexity"]} and {cached_fv["complexity"]} (FV) ♻️')
+            if journal is not None:
+                await journal.record(file_path, "manual", file_info['sha256'], cached["complexity"], cached["rationale"], cached["purpose"], cached.get("model"))
+                await journal.record(file_path, "fv", file_info['sha256'], cached_fv["complexity"], cached_fv["rationale"], cached_fv["purpose"], cached_fv.get("model"))
+            return (cached["complexity"], cached["rationale"], code_lines, code_to_comment_ratio, cached["purpose"], cached.get("model")), \
+                (cached_fv["complexity"], cached_fv["rationale"], cached_fv.get("model"))
+        # Prepare system prompt based on chain
+        prepare_prompt, system, instructions = FUSED_PROMPTS[chain]
+        build_prompt = lambda path, text: prepare_prompt(path, code_lines, file_info['comment_lines'], code_to_comment_ratio, text, protocol)
+        print(f'Conjuring {chain.upper()} bot for both manual and FV scores 🤖🧙‍♂️')
+        
+        response, provider = await ask_bot_chunked(bot, system, code, chain, file_path, build_prompt, instructions, batch, response_model=FusedComplexity)
+        print(f'Program {file_path} got assigned a complexity score of {response.complexity}. {response.rationale}')
+        print(f'Program {file_path} got assigned a complexity score (FV) of {response.complexity_fv}. {response.rationale_fv}')
+        key, model = cache_key_for(file_info, chain, provider, "fused")
+        key_fv, _ = cache_key_for(file_info, chain, provider, "fused-fv")
+        await store_verdict(key, response.complexity, response.rationale, response.purpose, model)
+        await store_verdict(key_fv, response.complexity_fv, response.rationale_fv, response.purpose, model)
+        if journal is not None:
+            await journal.record(file_path, "manual", file_info['sha256'], response.complexity, response.rationale, response.purpose, model)
+            await journal.record(file_path, "fv", file_info['sha256'], response.complexity_fv, response.rationale_fv, response.purpose, model)
+        return (response.complexity, response.rationale, code_lines, code_to_comment_ratio, response.purpose, model), (response.complexity_fv, response.rationale_fv, model)
+    except Exception as e:
+        print(f"Failed to generate fused complexity info for {file_path}: {e}")
+        return None
+
+# Function to score several related files with a single request, each file seeing the others as context
+@traced("score.grouped")
+async def get_complexity_scores_grouped(files, chain, bot, protocol, journal=None, batch=False):
+    """
+    `files` maps file paths to their file info (content included). Returns {file_path: (manual_result, fv_result)}
+    shaped like the results of get_complexity_score_manual and get_complexity_score_fv (fv_result is None
+    outside sol/evm), for the files that could be scored; the caller scores the others on their own.
+    """
+    label = f'{len(files)} related files ({", ".join(os.path.basename(file_path) for file_path in files)})'
+    results, pending = {}, {}
+    try:
+        prepare_prompt, system, instructions, response_model = GROUP_PROMPTS[chain]
+        fused = response_model is GroupFusedComplexity
+        for file_path, file_info in files.items():
+            code_lines = str(file_info['code_lines'])
+            code_to_comment_ratio = math.ceil((int(file_info['comment_lines']) / int(code_lines)) * 100)
+            # Skip units already completed by an interrupted run
+            if journal is not None:
+                journaled = journal.get(file_path, "manual", file_info['sha256'])
+                journaled_fv = journal.get(file_path, "fv", file_info['sha256']) if fused else None
+                if journaled is not None and (journaled_fv is not None or not fused):
+                    print(f'Program {file_path} was already scored {journaled["complexity"]} before the run was interrupted ⏭️')
+                    results[file_path] = (journaled["complexity"], journaled["rationale"], code_lines, code_to_comment_ratio, journaled["purpose"], journaled.get("model")), \
+                        ((journaled_fv["complexity"], journaled_fv["rationale"], journaled_fv.get("model")) if fused else None)
+                    continue
+            # Reuse the verdicts of an unchanged file, grouped verdicts are cached apart from the others
+            key, _ = cache_key_for(file_info, chain, bot, "grouped")
+            key_fv, _ = cache_key_for(file_info, chain, bot, "grouped-fv")
+            cached = await load_verdict(key)
+            cached_fv = await load_verdict(key_fv) if fused else None
+            if cached is not None and (cached_fv is not None or not fused):
+                print(f'Program {file_path} reused its cached complexity score of {cached["complexity"]} ♻️')
+                if journal is not None:
+                    await journal.record(file_path, "manual", file_info['sha256'], cached["complexity"], cached["rationale"], cached["purpose"], cached.get("model"))
+                    if fused:
+                        await journal.record(file_path, "fv", file_info['sha256'], cached_fv["complexity"], cached_fv["rationale"], cached_fv["purpose"], cached_fv.get("model"))
+                results[file_path] = (cached["complexity"], cached["rationale"], code_lines, code_to_comment_ratio, cached["purpose"], cached.get("model")), \
+                    ((cached_fv["complexity"], cached_fv["rationale"], cached_fv.get("model")) if fused else None)
+                continue
+            pending[file_path] = (file_info, code_lines, code_to_comment_ratio)
+        if len(pending) < 2:
+            # A lone file is better scored with its usual request
+            return results
+
+        prompt = ''
+        async with span("prompt", file=label):
+            for file_path, (file_info, code_lines, code_to_comment_ratio, *_) in pending.items():
+                file_prompt = await prepare_prompt(file_path, code_lines, file_info['comment_lines'], code_to_comment_ratio, file_info['file_content'], protocol)
+                prompt += f'<file path="{file_path}">\n{file_prompt}\n</file>\n\n'
+        print(f'Conjuring {chain.upper()} bot for {label} 🤖🔗')
+
+        response, provider = await ask_bot(bot, system, prompt, label, instructions, batch, response_model=response_model, max_tokens=max(1024, GROUP_OUTPUT_TOKENS * len(pending)))
+        # Entries are matched on their path, or on the file name if the model shortened it
+        by_name = {os.path.basename(file_path): file_path for file_path in pending}
+        for verdict in response.files:
+            file_path = verdict.file if verdict.file in pending else by_name.get(os.path.basename(verdict.file))
+            if file_path is None or file_path in results:
+                continue
+            file_info, code_lines, code_to_comment_ratio = pending[file_path]
+            key, model = cache_key_for(file_info, chain, provider, "grouped")
+            print(f'Program {file_path} got assigned a complexity score of {verdict.complexity}. {verdict.rationale}')
+            await store_verdict(key, verdict.complexity, verdict.rationale, verdict.purpose, model)
+            if journal is not None:
+                await journal.record(file_path, "manual", file_info['sha256'], verdict.complexity, verdict.rationale, verdict.purpose, model)
+            fv_result = None
+            if fused:
+                print(f'Program {file_path} got assigned a complexity score (FV) of {verdict.complexity_fv}. {verdict.rationale_fv}')
+                key_fv, _ = cache_key_for(file_info, chain, provider, "grouped-fv")
+                await store_verdict(key_fv, verdict.complexity_fv, verdict.rationale_fv, verdict.purpose, model)
+                if journal is not None:
+                    await journal.record(file_path, "fv", file_info['sha256'], verdict.complexity_fv, verdict.rationale_fv, verdict.purpose, model)
+                fv_result = (verdict.complexity_fv, verdict.rationale_fv, model)
+            results[file_path] = (verdict.complexity, verdict.rationale, code_lines, code_to_comment_ratio, verdict.purpose, model), fv_result
+        return results
+    except Exception as e:
+        print(f"Failed to generate grouped complexity info for {label}: {e}")
+        return results
+
 # Function to prepare a schedule
-async def schedule(adjusted_time_estimate, report, project_name):
+@traced("schedule")
+async def schedule(adjusted_time_estimate, report, project_name, language):
+    # Files are planned locally, the bot only narrates a digest of the plan so the request stays the same size whatever the report
+    async with span("plan"):
+        plan = await asyncio.to_thread(plan_audit, report, adjusted_time_estimate, project_name, language)
+    detailed_schedule = render_plan(plan)
     try:
-        string_report = json.dumps(report)
-        prompt = await prepare_scheduler_prompt(adjusted_time_estimate, project_name, string_report)
-        response = await claude_client.messages.create(
+        prompt = await prepare_scheduler_prompt(adjusted_time_estimate, project_name, summarize_plan(plan))
+        response = await call_with_limits("claude", estimate_tokens(prompt) + SCHEDULE_OUTPUT_TOKENS, lambda: create_claude_message(
             temperature=0.0,
             model=claude_model_prod,
             system="You are an AI assistant specializing in scheduling audits, including formal verification for smart contracts and programs on the Solana and Ethereum blockchains.",
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=	8192
-        )
-        schedule = response.content[0].text
-        return schedule
+            max_tokens=SCHEDULE_OUTPUT_TOKENS
+        ))
+        overview = response.content[0].text
     except Exception as e:
         print(e)
-        return("Oops, I wasn't able to schedule this audit")
+        overview = f"# Audit schedule for {project_name}\n\nOops, I wasn't able to write the overview of this schedule, the plan below was prepared locally."
+    return f"{overview.strip()}\n\n{detailed_schedule}"
@@ -0,0 +1,157 @@
+import os
+import re
+import math
+import threading
+from llm.ratelimit import estimate_tokens
+from utils.line_counter import strip_comments
+from utils.parsing import parse_source
+
+# Files whose code exceeds this many tokens are scored in several parts
+CHUNK_TOKEN_LIMIT = int(os.getenv('CHUNK_TOKEN_LIMIT', 12000))
+
+# Lines opening a function/contract/impl-level declaration, where a file can be split when it can't be parsed
+BOUNDARY_PATTERNS = {
+    'evm': re.compile(r'^\s*(?:abstract\s+)?(?:contract|library|interface|function|modifier|constructor|fallback|receive|struct|enum|event|error)\b'),
+    'sol': re.compile(r'^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?(?:extern\s+"[^"]*"\s+)?(?:fn|impl|mod|struct|enum|trait)\b'),
+    'move': re.compile(r'^\s*(?:public(?:\([^)]*\))?\s+)?(?:entry\s+)?(?:native\s+)?(?:inline\s+)?(?:fun|struct|module|spec|const)\b'),
+    'go': re.compile(r'^(?:func|type|var|const)\b'),
+    'ts': re.compile(r'^(?:\s{0,4})(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?(?:function|class|interface|enum|type|namespace|const|let)\b'),
+}
+
+# Attributes, decorators and doc comments stay attached to the declaration below them
+LEADING_TRIVIA = re.compile(r'^\s*(?:#\[|@|///|//|/\*|\*)')
+
+# Seconds tiktoken may take to load cl100k_base (from its cache, TIKTOKEN_CACHE_DIR, or by downloading it)
+TOKENIZER_LOAD_SECONDS = float(os.getenv('TOKENIZER_LOAD_SECONDS', 10))
+
+# None until load_tokenizer has run, False when token counts are estimated
+_encoding = None
+_estimate_announced = False
+
+# Function to say, once per run, that token counts are estimated
+def announce_estimate(reason):
+    global _estimate_announced
+    if not _estimate_announced:
+        _estimate_announced = True
+        print(f'⚠️ {reason}, token counts are estimated as characters / 4 📏')
+
+# Function to load the tokenizer once, at startup and off the event loop (tiktoken may download a 1.7 MB file)
+def load_tokenizer():
+    """
+    Loads the cl100k_base encoding with tiktoken in a background thread, waiting at most
+    TOKENIZER_LOAD_SECONDS for it; tiktoken's requests have no timeout of their own. When it
+    can't be had in time, token counts fall back to the len/4 estimate for the whole run.
+    Returns whether the tokenizer is available.
+    """
+    global _encoding
+    if _encoding is not None:
+        return _encoding is not False
+    loaded = {}
+    def load():
+        try:
+            import tiktoken
+            loaded['encoding'] = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            loaded['error'] = e
+    # A daemon thread, so a download stuck past the deadline doesn't keep the run from exiting
+    thread = threading.Thread(target=load, name='load-tokenizer', daemon=True)
+    thread.start()
+    thread.join(TOKENIZER_LOAD_SECONDS)
+    if 'encoding' in loaded:
+        _encoding = loaded['encoding']
+        return True
+    if 'error' in loaded:
+        announce_estimate(f"The cl100k_base tokenizer could not be loaded ({loaded['error']})")
+    else:
+        announce_estimate(f'The cl100k_base tokenizer did not load within {TOKENIZER_LOAD_SECONDS:g}s (set TIKTOKEN_CACHE_DIR to a directory holding it, or raise TOKENIZER_LOAD_SECONDS)')
+    _encoding = False
+    return False
+
+# Function to count tokens with the tokenizer loaded at startup, estimating them when it wasn't (never loads it here)
+def count_tokens(text):
+    if not _encoding:
+        if _encoding is None:
+            announce_estimate('The tokenizer was not loaded at startup')
+        return estimate_tokens(text)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+# Function to split a file into declaration-aligned parts of at most `max_tokens` tokens each
+def split_source(code, language, max_tokens=CHUNK_TOKEN_LIMIT):
+    """
+    Returns a list of (first_line, last_line, text) tuples, lines being 1-based.
+
+    Boundaries are declaration lines (functions, contracts, impls, modules...), taken from the
+    parse tree when possible, pulled up over the attributes and doc comments right above them. Consecutive segments are packed
+    greedily into parts; a single segment larger than the budget is cut on line breaks.
+    """
+    lines = code.split('\n')
+    pattern = BOUNDARY_PATTERNS.get(language)
+
+    # Comments keep their line breaks once stripped, so the outline's lines are the file's
+    outline = parse_source(strip_comments(code, language), language)
+    if outline is not None:
+        boundaries = outline["declarations"]
+    elif pattern is not None:
+        boundaries = [index for index, line in enumerate(lines) if pattern.match(line)]
+    else:
+        boundaries = []
+
+    starts = [0]
+    for index in boundaries:
+        if index:
+            start = index
+            while start > starts[-1] + 1 and LEADING_TRIVIA.match(lines[start - 1]):
+                start -= 1
+            if start > starts[-1]:
+                starts.append(start)
+    segments = [(start, end) for start, end in zip(starts, starts[1:] + [len(lines)])]
+
+    parts = []
+    current_start, current_tokens = None, 0
+    for start, end in segments:
+        tokens = count_tokens('\n'.join(lines[start:end]))
+        if tokens > max_tokens:
+            # Flush what we have, then cut the oversize segment by lines
+            if current_start is not None:
+                parts.append((current_start, start))
+                current_start, current_tokens = None, 0
+            cut_start, cut_tokens = start, 0
+            for index in range(start, end):
+                line_tokens = count_tokens(lines[index]) + 1
+                if cut_tokens + line_tokens > max_tokens and index > cut_start:
+                    parts.append((cut_start, index))
+                    cut_start, cut_tokens = index, 0
+                cut_tokens += line_tokens
+            parts.append((cut_start, end))
+            continue
+        if current_start is not None and current_tokens + tokens > max_tokens:
+            parts.append((current_start, start))
+            current_start, current_tokens = None, 0
+        if current_start is None:
+            current_start = start
+        current_tokens += tokens
+    if current_start is not None:
+        parts.append((current_start, len(lines)))
+
+    return [(start + 1, end, '\n'.join(lines[start:end])) for start, end in parts if start < end]
+
+# Function to merge the verdicts of a file's parts into one (complexity, rationale, purpose)
+def merge_verdicts(verdicts, weights):
+    scored = []
+    for verdict, weight in zip(verdicts, weights):
+        try:
+            scored.append((float(verdict.complexity), weight, verdict))
+        except (TypeError, ValueError):
+            continue
+    if not scored:
+        return None
+
+    total_weight = sum(weight for _, weight, _ in scored) or 1
+    weighted_mean = sum(score * weight for score, weight, _ in scored) / total_weight
+    hardest_score, _, hardest = max(scored, key=lambda item: item[0])
+    # The hardest part drives the review effort, boilerplate parts can only pull it down by a point
+    complexity = max(math.ceil(weighted_mean), math.ceil(hardest_score) - 1)
+
+    rationale = f"{hardest.rationale} (scored in {len(verdicts)} parts)"
+    purpose = next((verdict.purpose for verdict in verdicts if verdict.purpose), None)
+    return complexity, rationale, purpose
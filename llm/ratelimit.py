@@ -0,0 +1,79 @@
+import time
+import random
+import asyncio
+
+# Rough prompt size estimate, ~4 characters per token for code and English
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+# Function to read the retry-after hint (in seconds) from a provider error, if any
+def retry_after_seconds(exc):
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after') is not None:
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+# Function to compute a jittered exponential backoff delay
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ProviderLimiter:
+    """
+    Client-side requests-per-minute and tokens-per-minute budget for one provider.
+
+    Both budgets are token buckets refilled continuously. Every 429 halves the refill
+    rate and blocks the provider until its retry-after deadline; each success then
+    recovers a little of the rate, so concurrent callers settle just under the limit.
+    """
+
+    def __init__(self, name, rpm, tpm):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.rate_scale = 1.0
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60 * self.rate_scale)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60 * self.rate_scale)
+
+    # Wait until the provider has room for one request of `tokens` tokens
+    async def acquire(self, tokens):
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(
+                    self.blocked_until - now,
+                    (1 - self.requests) * 60 / (self.rpm * self.rate_scale),
+                    (tokens - self.tokens) * 60 / (self.tpm * self.rate_scale),
+                )
+                if wait <= 0:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+    # Back off after a 429, honoring the provider's retry-after hint
+    def penalize(self, retry_after=None):
+        self.rate_scale = max(0.1, self.rate_scale * 0.5)
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    # Slowly recover the full rate after successful requests
+    def reward(self):
+        self.rate_scale = min(1.0, self.rate_scale + 0.05)
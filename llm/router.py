@@ -0,0 +1,214 @@
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager
+from utils.run_profile import note
+
+# Number of recent calls the latency percentiles and error rates are computed over
+ROUTER_WINDOW = int(os.getenv('ROUTER_WINDOW', 50))
+# Calls needed before a provider's own percentiles are trusted
+ROUTER_MIN_SAMPLES = int(os.getenv('ROUTER_MIN_SAMPLES', 5))
+# A second provider is asked once the first one is slower than this percentile of its recent latencies
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 95))
+# Deadline used until a provider has enough samples
+HEDGE_DEFAULT_SECONDS = float(os.getenv('HEDGE_DEFAULT_SECONDS', 90))
+# Hedged requests allowed, as a fraction of all requests, so slow spells don't double the bill
+HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', 0.1))
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '1') != '0'
+
+# Routed request the current task is sending, so the HTTP call deep inside it can say when it goes out
+current_dispatch = contextvars.ContextVar('current_dispatch', default=None)
+
+class Dispatch:
+    """Whether a routed request is on the wire (rather than waiting for a slot or its rate limit), and since when."""
+
+    def __init__(self):
+        self.sent = asyncio.Event()
+        self.sent_at = None
+
+class ProviderStats:
+    """Rolling latencies and outcomes of the last `window` calls to one provider/model."""
+
+    def __init__(self, window=ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.hedged = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def record(self, latency, ok):
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+    # A call cancelled before answering (the loser of a hedge) took at least this long: the latency is kept as a
+    # lower bound, or the slow calls would be the ones missing from the percentiles. It is neither a success nor an error.
+    def censor(self, latency):
+        self.cancelled += 1
+        self.latencies.append(latency)
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+class LatencyRouter:
+    """
+    Picks the provider to ask first and hedges slow requests with the other one.
+
+    The preferred provider goes first unless the other one has been clearly healthier lately
+    (median latency weighted by error rate). When the first request outlives the percentile
+    deadline of its provider, the same request is sent to the second provider; the first
+    answer wins and the other request is cancelled. A failed request hands over right away.
+
+    Latencies and outcomes are those of the provider HTTP calls only (see `sending`), a cancelled
+    loser's time on the wire counting as a lower bound of its latency, and the
+    hedge deadline only runs while the request is on the wire: time spent waiting for a
+    provider slot or for the rate limiter is our own queueing, not the provider being slow.
+    """
+
+    def __init__(self, models, hedge=HEDGE_REQUESTS, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET):
+        self.models = models
+        self.hedge = hedge
+        self.percentile = percentile
+        self.budget = budget
+        self.stats = {}
+        self.requests = 0
+        self.hedges = 0
+
+    # Stats are kept per provider and model
+    def stats_for(self, provider):
+        key = f'{provider}:{self.models.get(provider)}'
+        if key not in self.stats:
+            self.stats[key] = ProviderStats()
+        return self.stats[key]
+
+    # Median latency inflated by the error rate, lower is healthier
+    def cost(self, provider):
+        stats = self.stats_for(provider)
+        if len(stats.outcomes) < ROUTER_MIN_SAMPLES:
+            return None
+        median = stats.percentile(50) or HEDGE_DEFAULT_SECONDS
+        return median * (1 + 4 * stats.error_rate())
+
+    def order(self, preferred, other):
+        preferred_cost, other_cost = self.cost(preferred), self.cost(other)
+        if preferred_cost is not None and other_cost is not None and preferred_cost > 2 * other_cost:
+            return other, preferred
+        return preferred, other
+
+    def deadline(self, provider):
+        stats = self.stats_for(provider)
+        if len(stats.latencies) < ROUTER_MIN_SAMPLES:
+            return HEDGE_DEFAULT_SECONDS
+        return stats.percentile(self.percentile)
+
+    # Context manager wrapped around each provider HTTP call, timing it and flagging the routed request as sent
+    @asynccontextmanager
+    async def sending(self, provider):
+        dispatch = current_dispatch.get()
+        started = time.monotonic()
+        if dispatch is not None:
+            dispatch.sent_at = started
+            dispatch.sent.set()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.stats_for(provider).censor(time.monotonic() - started)
+            raise
+        except Exception:
+            self.stats_for(provider).record(time.monotonic() - started, False)
+            raise
+        else:
+            self.stats_for(provider).record(time.monotonic() - started, True)
+        finally:
+            # Back in the local queue between a retried call and the next one
+            if dispatch is not None:
+                dispatch.sent.clear()
+
+    # Function to run a routed request in its own task, its HTTP calls reporting to `dispatch`
+    async def dispatched(self, request, dispatch):
+        current_dispatch.set(dispatch)
+        return await request()
+
+    # Function to wait until the request has been on the wire for `deadline` seconds, False if it completed first
+    async def overdue(self, task, dispatch, deadline):
+        while not task.done():
+            if not dispatch.sent.is_set():
+                waiting = asyncio.ensure_future(dispatch.sent.wait())
+                try:
+                    await asyncio.wait({task, waiting}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiting.cancel()
+                continue
+            remaining = deadline - (time.monotonic() - dispatch.sent_at)
+            if remaining <= 0:
+                return True
+            await asyncio.wait({task}, timeout=remaining)
+        return False
+
+    async def route(self, label, first, second):
+        """
+        `first` and `second` are (provider, request) pairs, `request` being a coroutine function.
+        Returns (provider, response) of the first successful response, raises the last error if both fail.
+        """
+        self.requests += 1
+        first_provider, first_request = first
+        second_provider, second_request = second
+        dispatch = Dispatch()
+        primary = asyncio.ensure_future(self.dispatched(first_request, dispatch))
+        pending = {primary}
+        secondary = None
+        try:
+            deadline = self.deadline(first_provider)
+            if self.hedge and await self.overdue(primary, dispatch, deadline) and self.hedges < max(1, self.budget * self.requests):
+                self.hedges += 1
+                self.stats_for(second_provider).hedged += 1
+                print(f'{first_provider.upper()} is slower than usual on {label} ({deadline:.1f}s), also asking {second_provider.upper()} 🏎️')
+                note("hedges")
+                secondary = asyncio.ensure_future(self.dispatched(second_request, Dispatch()))
+                pending.add(secondary)
+
+            error = None
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.stats_for(second_provider).wins += 1
+                            return second_provider, task.result()
+                        return first_provider, task.result()
+                    error = task.exception()
+                    if task is primary and secondary is None:
+                        print(f'{first_provider.upper()} encountered an issue on {label} ({error}), trying {second_provider.upper()} 🔧')
+                        note("fallbacks")
+                        secondary = asyncio.ensure_future(self.dispatched(second_request, Dispatch()))
+                        pending.add(secondary)
+                if not pending:
+                    raise error
+        finally:
+            # Cancel the loser
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def report(self):
+        lines = []
+        for key, stats in self.stats.items():
+            if not stats.calls and not stats.cancelled:
+                continue
+            p50, p95 = stats.percentile(50), stats.percentile(95)
+            latency = f"p50 {p50:.1f}s, p95 {p95:.1f}s" if p50 is not None else "no successful call"
+            lines.append(f"{key}: {stats.calls} call(s), {latency}, {stats.errors} error(s), {stats.cancelled} cancelled, {stats.hedged} hedge(s) sent, {stats.wins} answer(s) as second choice")
+        return "\n".join(lines) if lines else "Provider routing: no requests sent"
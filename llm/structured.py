@@ -0,0 +1,87 @@
+import re
+import ast
+import json
+import math
+from instructor.utils import extract_json_from_codeblock
+
+# Tolerant reading of the verdicts models send back, so a "7/10" or a trailing comma is fixed
+# locally instead of costing another round-trip
+
+SCORE_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+# 7, 7.5, 7/10, 7 out of 10, 3 of 5
+SCORE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(?:\s*(?:/|out\s+of|of)\s*(\d+(?:\.\d+)?))?', re.IGNORECASE)
+SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+# Function to read a score out of whatever the model wrote ("7", 7.0, "7/10", "Score: 7 out of 10", "**seven**")
+def parse_score(value, low=1, high=10):
+    """
+    Returns an int clamped to [low, high]. Scores on another scale ("3/5") are brought to 10,
+    halves are rounded up. Raises ValueError when there is no score to be found.
+    """
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f"not a score: {value!r}")
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        text = str(value).strip()
+        match = SCORE_PATTERN.search(text)
+        if match:
+            score = float(match.group(1))
+            scale = float(match.group(2)) if match.group(2) else None
+            if scale and scale != high:
+                score = score / scale * high
+        else:
+            words = [SCORE_WORDS[word] for word in re.findall(r'[a-z]+', text.lower()) if word in SCORE_WORDS]
+            if not words:
+                raise ValueError(f"not a score: {value!r}")
+            score = words[0]
+    if math.isnan(score):
+        raise ValueError(f"not a score: {value!r}")
+    return max(low, min(high, math.floor(score + 0.5)))
+
+# Function to decode the JSON object of a reply, fixing the usual slips (code fences, prose around it,
+# smart quotes, trailing commas, raw line breaks in strings, Python literals)
+def repair_json(text):
+    """
+    Returns (data, repaired), `repaired` telling whether the text needed fixing.
+    Raises json.JSONDecodeError when nothing can be made of it.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError as e:
+        error = e
+    candidate = extract_json_from_codeblock(text) or text
+    fixed = TRAILING_COMMA.sub(r'\1', candidate.translate(SMART_QUOTES))
+    for attempt in (candidate, fixed):
+        try:
+            return json.loads(attempt, strict=False), True
+        except json.JSONDecodeError:
+            pass
+    try:
+        # {'complexity': 7, 'purpose': None}
+        data = ast.literal_eval(fixed)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise error
+    if not isinstance(data, dict):
+        raise error
+    return data, True
+
+# Function to turn a provider response into the expected model, from its tool call or from its text
+def parse_response(bot, completion, response_model):
+    """
+    Returns (verdict, repaired). Claude answers through a forced tool call whose input already
+    follows the schema; GPT (o1 models have neither tools nor JSON mode) answers in text.
+    """
+    if bot == "claude":
+        tool_calls = [block for block in completion.content if block.type == "tool_use"]
+        if tool_calls:
+            return response_model.model_validate(tool_calls[0].input), False
+        text = "".join(block.text for block in completion.content if block.type == "text")
+    else:
+        text = completion.choices[0].message.content or ""
+    data, repaired = repair_json(text)
+    return response_model.model_validate(data), repaired
@@ -0,0 +1,74 @@
+from utils.run_profile import add_tokens
+
+# Input tokens over the run, split by what the providers served from their prompt caches
+usage_stats = {
+    "claude": {"requests": 0, "input_tokens": 0, "cache_write_tokens": 0, "cache_read_tokens": 0, "output_tokens": 0},
+    "gpt": {"requests": 0, "input_tokens": 0, "cache_write_tokens": 0, "cache_read_tokens": 0, "output_tokens": 0},
+}
+
+# Static prefix of each prompt chain sent to Claude, and whether it is long enough for the prompt cache
+prefix_stats = {}
+
+# Function to note the static prefix of a Claude request; `minimum` is None when prompt caching is turned off
+def record_prefix(name, tokens, cached, minimum):
+    stats = prefix_stats.setdefault(name, {"tokens": tokens, "cached": cached, "minimum": minimum, "requests": 0})
+    stats["requests"] += 1
+    stats["cached"] = cached and not stats.get("rejected")
+
+# Function to note that Claude didn't cache the prefix of a chain although it was marked as cacheable
+def reject_prefix(name):
+    if name in prefix_stats:
+        prefix_stats[name].update(cached=False, rejected=True)
+
+# Function to add the token usage of a raw provider response to the run's totals
+def record_usage(provider, completion):
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    if provider == "claude":
+        # input_tokens only counts the uncached part of the prompt
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        cache_write_tokens = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        cache_read_tokens = getattr(usage, "cache_read_input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+    else:
+        # prompt_tokens includes the cached prefix
+        details = getattr(usage, "prompt_tokens_details", None) or {}
+        # Older SDKs don't model the details and keep them as a plain dict
+        cache_read_tokens = (details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)) or 0
+        input_tokens = (getattr(usage, "prompt_tokens", 0) or 0) - cache_read_tokens
+        cache_write_tokens = 0
+        output_tokens = getattr(usage, "completion_tokens", 0) or 0
+    stats = usage_stats[provider]
+    stats["requests"] += 1
+    stats["input_tokens"] += input_tokens
+    stats["cache_write_tokens"] += cache_write_tokens
+    stats["cache_read_tokens"] += cache_read_tokens
+    stats["output_tokens"] += output_tokens
+    # The request's span in the run profile is charged too
+    add_tokens(provider, input_tokens, output_tokens, cache_write_tokens, cache_read_tokens)
+
+# Function to summarize the prompt cache usage of the run
+def usage_report():
+    lines = []
+    for provider, stats in usage_stats.items():
+        if not stats["requests"]:
+            continue
+        prompt_tokens = stats["input_tokens"] + stats["cache_write_tokens"] + stats["cache_read_tokens"]
+        hit_rate = stats["cache_read_tokens"] / prompt_tokens * 100 if prompt_tokens else 0
+        lines.append(
+            f"{provider.upper()} usage: {stats['requests']} request(s), {prompt_tokens} input tokens "
+            f"({stats['cache_read_tokens']} read from cache, {stats['cache_write_tokens']} written to cache, {hit_rate:.0f}% cached), "
+            f"{stats['output_tokens']} output tokens"
+        )
+    for name, stats in sorted(prefix_stats.items()):
+        if stats["cached"]:
+            status = "cached"
+        elif stats.get("rejected"):
+            status = "not cached, Claude didn't cache it (shorter than estimated)"
+        elif stats["minimum"] is None:
+            status = "not cached, PROMPT_CACHING=0"
+        else:
+            status = f"not cached, under Claude's {stats['minimum']}-token minimum"
+        lines.append(f"Prompt caching of the {name} chain: ~{stats['tokens']}-token static prefix, {status} ({stats['requests']} request(s))")
+    return "\n".join(lines) if lines else "Provider usage: no requests sent"
@@ -1,19 +1,8 @@
-async def prepare_evm_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, solidity_contract, protocol):
-   try:
-      EVM_ANALYZER = f''' 
+# Static part of the prompt, identical for every file so providers can cache it
+EVM_INSTRUCTIONS = '''
 Your task is to analyze a Solidity (.sol) file intended for deployment of a smart contract on the Ethereum blockchain and provide a complexity score to guide manual security audits.
 
-Here is the Solidity file to analyze:
-
-<solidity_file>
-{solidity_contract}
-</solidity_file>
-
-Here is the metadata for the file:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The Solidity file and its metadata are provided after these instructions.
 
 Analyze the potential complexity of the code based on the following criteria, think step-by-step:
 
@@ -44,11 +33,11 @@ Analyze the potential complexity of the code based on the following criteria, th
    - Low-level call (example: `address(contractAddress).call(abi.encodeWithSignature("functionName(uint256)", arg));`)
    - Interface-based call (example: `IContractInterface(address).functionName();`)
    - Library usage (example: `LibraryName.functionName();`)
-   - Delegate calls from Contract B to Contract A (example: ```function delegateCallToContractA(uint256 _data) public {{
+   - Delegate calls from Contract B to Contract A (example: ```function delegateCallToContractA(uint256 _data) public {
         // Perform delegate call to Contract A’s setData function
         (bool success, ) = contractAAddress.delegatecall(abi.encodeWithSignature(“setData(uint256)“, _data));
         require(success, “Delegate call failed”);
-    }}```
+    }```
    - Using ‘this’ for external calls within the same contract (example: `address(this)`)
 
 6. Consider the following security-focused elements:
@@ -68,13 +57,29 @@ Analyze the potential complexity of the code based on the following criteria, th
 </thinking>
 
 Your response must be a JSON file with the following structure:
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[SCORE]",
+  "complexity": [SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
   "rationale": "[ONE SENTENCE EXPLANATION]"
-}}
+}
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_evm_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, solidity_contract, protocol):
+   try:
+      EVM_ANALYZER = f''' 
+Here is the Solidity file to analyze:
+
+<solidity_file>
+{solidity_contract}
+</solidity_file>
+
+Here is the metadata for the file:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
 '''
       return EVM_ANALYZER
    
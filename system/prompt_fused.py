@@ -0,0 +1,62 @@
+from system.prompt_evm import EVM_INSTRUCTIONS
+from system.prompt_sol import SOL_INSTRUCTIONS
+from system_fv.prompts import EVM_FV_INSTRUCTIONS, SOL_FV_INSTRUCTIONS
+
+# Function to extract the step-by-step criteria of a prompt, so the fused prompt reuses them verbatim
+def criteria(instructions):
+    start = instructions.index('<thinking>') + len('<thinking>')
+    return instructions[start:instructions.index('</thinking>')].strip('\n')
+
+FUSED_OUTPUT = '''Your response must be a JSON file with the following structure:
+
+<output>
+{
+  "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
+  "complexity": [MANUAL AUDIT SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
+  "rationale": "[ONE-SENTENCE EXPLANATION OF THE MANUAL AUDIT SCORE]",
+  "complexity_fv": [FORMAL VERIFICATION SCORE AS AN INTEGER FROM 0 TO 10, FOR EXAMPLE 5],
+  "rationale_fv": "[ONE-SENTENCE EXPLANATION OF THE FORMAL VERIFICATION SCORE]"
+}
+</output>
+
+Do not include any additional information or explanations outside of this JSON structure. Ensure that each rationale is concise and directly relates to its complexity score.
+'''
+
+# Static instructions asking for the manual audit and formal verification scores of a file in one response
+EVM_FUSED_INSTRUCTIONS = f'''
+Your task is to analyze a Solidity (.sol) file intended for deployment of a smart contract on the Ethereum blockchain and provide two complexity scores: one to guide manual security audits and one to guide its formal verification.
+
+The Solidity file and its metadata are provided after these instructions.
+
+First, analyze the potential complexity of the code for a manual security audit based on the following criteria, think step-by-step:
+
+<thinking>
+{criteria(EVM_INSTRUCTIONS)}
+</thinking>
+
+Then, analyze the potential complexity of the same code for formal verification based on the following criteria, think step-by-step:
+
+<thinking_fv>
+{criteria(EVM_FV_INSTRUCTIONS)}
+</thinking_fv>
+
+{FUSED_OUTPUT}'''
+
+SOL_FUSED_INSTRUCTIONS = f'''
+Your task is to analyze a Rust-based file which is part of a larger program intended for deployment on the Solana blockchain and provide two complexity scores: one to guide manual security audits and one to guide its formal verification.
+
+The Rust code and its metadata are provided after these instructions.
+
+First, analyze the potential complexity of the program for a manual security audit based on the following criteria, think step-by-step:
+
+<thinking>
+{criteria(SOL_INSTRUCTIONS)}
+</thinking>
+
+Then, analyze the potential complexity of the same program for formal verification based on the following criteria, think step-by-step:
+
+<thinking_fv>
+{criteria(SOL_FV_INSTRUCTIONS)}
+</thinking_fv>
+
+{FUSED_OUTPUT}'''
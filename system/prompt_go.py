@@ -1,23 +1,13 @@
-async def prepare_go_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, go_file, protocol):
-   try:
-      GO_ANALYZER = f''' 
+# Static part of the prompt, identical for every file so providers can cache it
+GO_INSTRUCTIONS = '''
 Your task is to analyze Go files intended for interaction with the Ethereum ecosystem (but not deploying smart contracts) and provide a complexity score to guide manual security audits.
 
-Here is the Go code to analyze:
-
-<go_code>
-{go_file}
-</go_code>
+The Go code and its metadata are provided after these instructions.
 
 Analyze the provided file carefully, make sure to think step-by-step:
 
 <thinking>
-1. Note the following metadata:
-   - Project name: {protocol}
-   - File name: {file_path}
-   - Number of lines of code: {code_lines}
-   - Number of lines of comments: {comment_lines}
-   - Percentage of commented lines of code: {code_to_comment_ratio}%
+1. Note the metadata provided with the file: project name, file name, number of lines of code, number of lines of comments and percentage of commented lines of code.
 
 2. Categorize the file based on its size:
      * < 100 lines: Very small
@@ -57,13 +47,30 @@ Analyze the provided file carefully, make sure to think step-by-step:
 </thinking>
 
 Your response must be a JSON file with the following structure:
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[SCORE]",
+  "complexity": [SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
   "rationale": "[ONE SENTENCE EXPLANATION]"
-}}
+}
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_go_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, go_file, protocol):
+   try:
+      GO_ANALYZER = f''' 
+Here is the Go code to analyze:
+
+<go_code>
+{go_file}
+</go_code>
+
+Here is the metadata for the code:
+   - Project name: {protocol}
+   - File name: {file_path}
+   - Number of lines of code: {code_lines}
+   - Number of lines of comments: {comment_lines}
+   - Percentage of commented lines of code: {code_to_comment_ratio}%
 '''
       return GO_ANALYZER
    
@@ -74,4 +81,4 @@ Do not include any additional information or explanations outside of this JSON s
             "complexity": "0",
             "rationale": "Oops, something went wrong, I wasn't able to score that file!"
          }
-      return error
\ No newline at end of file
+      return error
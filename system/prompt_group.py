@@ -0,0 +1,48 @@
+from system.prompt_move import MOVE_INSTRUCTIONS
+from system.prompt_go import GO_INSTRUCTIONS
+from system.prompt_ts import TS_INSTRUCTIONS
+from system.prompt_fused import EVM_FUSED_INSTRUCTIONS, SOL_FUSED_INSTRUCTIONS
+
+GROUP_INTRO = '''
+Instead of a single file, several related files of the same project are provided after these instructions, each in its own <file> block named by its path attribute. They import or use one another: read them together to understand how each file is used (inherited contracts, shared state, called modules), but score every file on its own code.
+
+'''
+
+MANUAL_FIELDS = [
+    ("file", '"[PATH OF THE FILE, EXACTLY AS GIVEN IN ITS <file> BLOCK]"'),
+    ("purpose", '"[INSERT BRIEF DESCRIPTION OF THE FILE\'S PURPOSE HERE]"'),
+    ("complexity", "[SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5]"),
+    ("rationale", '"[ONE SENTENCE EXPLANATION]"'),
+]
+FUSED_FIELDS = MANUAL_FIELDS + [
+    ("complexity_fv", "[FORMAL VERIFICATION SCORE AS AN INTEGER FROM 0 TO 10, FOR EXAMPLE 5]"),
+    ("rationale_fv", '"[ONE-SENTENCE EXPLANATION OF THE FORMAL VERIFICATION SCORE]"'),
+]
+
+# Function to turn the instructions for one file into instructions for a group of files:
+# the analysis criteria are kept, the output asks for one entry per file
+def grouped(instructions, fields):
+    head = instructions[:instructions.index('Your response must be a JSON file')]
+    entry = ',\n'.join(f'      "{name}": {value}' for name, value in fields)
+    return f'''{head.rstrip()}
+{GROUP_INTRO}Your response must be a JSON file with one entry per file, in the order the files are given, with the following structure:
+
+<output>
+{{
+  "files": [
+    {{
+{entry}
+    }}
+  ]
+}}
+</output>
+
+Do not include any additional information or explanations outside of this JSON structure. Ensure that each rationale is concise and directly relates to its complexity score.
+'''
+
+# Static instructions asking for the verdicts of several related files in one response
+EVM_GROUP_INSTRUCTIONS = grouped(EVM_FUSED_INSTRUCTIONS, FUSED_FIELDS)
+SOL_GROUP_INSTRUCTIONS = grouped(SOL_FUSED_INSTRUCTIONS, FUSED_FIELDS)
+MOVE_GROUP_INSTRUCTIONS = grouped(MOVE_INSTRUCTIONS, MANUAL_FIELDS)
+GO_GROUP_INSTRUCTIONS = grouped(GO_INSTRUCTIONS, MANUAL_FIELDS)
+TS_GROUP_INSTRUCTIONS = grouped(TS_INSTRUCTIONS, MANUAL_FIELDS)
@@ -1,19 +1,8 @@
-async def prepare_move_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, move_code, protocol):
-   try:
-      MOVE_ANALYZER = f'''     
+# Static part of the prompt, identical for every file so providers can cache it
+MOVE_INSTRUCTIONS = '''
 Your task is to analyze Move (.move) files intended for deployment on the Aptos blockchain and provide a complexity score to guide manual security audits and formal verification processes.
 
-Here is the Move code to analyze:
-<move_code>
-{move_code}
-</move_code>
-
-Here is the metadata for the code:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Number of lines of comments: {comment_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The Move code and its metadata are provided after these instructions.
 
 Analyze the provided file carefully, make sure to think step-by-step:
 
@@ -64,14 +53,30 @@ Analyze the provided file carefully, make sure to think step-by-step:
 Your response must be a JSON file with the following structure:
 
 <output>
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[INSERT SCORE HERE]",
+  "complexity": [SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
   "rationale": "[INSERT ONE-SENTENCE EXPLANATION HERE]"
-}}
+}
 </output>
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_move_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, move_code, protocol):
+   try:
+      MOVE_ANALYZER = f'''     
+Here is the Move code to analyze:
+<move_code>
+{move_code}
+</move_code>
+
+Here is the metadata for the code:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Number of lines of comments: {comment_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
 '''
       return MOVE_ANALYZER
    
@@ -83,4 +88,3 @@ Do not include any additional information or explanations outside of this JSON s
             "rationale": "Oops, something went wrong, I wasn't able to score that file!"
          }
       return error
-       
\ No newline at end of file
@@ -1,56 +1,31 @@
-async def prepare_scheduler_prompt(adjusted_time_estimate, project_name, report):
+async def prepare_scheduler_prompt(adjusted_time_estimate, project_name, plan_summary):
     try:
         SCHEDULER = f'''     
-Your task is to analyze the provided JSON report and create a comprehensive audit schedule for the {project_name} project. The schedule should cover {adjusted_time_estimate} business weeks (Monday to Friday).
+Your task is to present the audit schedule of the {project_name} project. The schedule covers {adjusted_time_estimate} business weeks (Monday to Friday) and has already been planned: files were grouped with the files they depend on, ordered so that dependencies are reviewed first and the heaviest groups come first, and given time in proportion to their lines of code and complexity scores. Meetings (kick-off, weekly progress reviews with the {project_name} team and the Certora team, wrap-up) are already placed.
 
-Here is the JSON report containing entries for each file to be audited:
-<json_report>
-{report}
-</json_report>
-Follow these steps to create the audit schedule:
+Here is a summary of the plan, week by week:
+<plan>
+{plan_summary}
+</plan>
 
-1. Analyze the JSON report:
-   - Review each file's complexity score, lines of code (cloc), and code-to-comment ratio.
-   - Consider the rationale provided for each complexity score.
+The day-by-day breakdown is rendered separately and appended to your response: do not reproduce it, do not move files between weeks, and do not invent files that are not in the summary.
 
-2. Prioritize files:
-   - Group similar files or those with dependencies for efficient auditing.
-   - Prioritize files with higher complexity scores or larger code bases.
-
-3. Allocate time:
-   - Estimate time requirements based on complexity score, lines of code, and code-to-comment ratio.
-   - Ensure a balanced workload across the weeks to maintain consistent progress.
-
-4. Create the schedule:
-   - Begin Week 1 with a 1-hour 'Project kick-off' on Monday.
-   - Include time for documentation and team meetings throughout the schedule.
-   - Add a weekly 1-hour progress review session between the {project_name} team and the Certora team, except for Week 1 and the final week.
-   - End the final week with a 2-hour 'Wrap-up meeting and report Review' on Friday.
-
-5. Review and adjust:
-   - Ensure all files are accounted for in the schedule.
-   - Check that the workload is balanced and realistic.
-
-Present your schedule in a clear, organized manner using markdown formatting. Use tables, lists, and headers to improve readability. Your response should include:
+Present your part in a clear, organized manner using markdown formatting. Your response should include:
 
 <response>
 1. A brief introduction explaining the audit schedule for {project_name}.
 
 2. Weekly Overview:
-   - Use a markdown table to summarize the focus of each week.
-
-3. Detailed Schedule:
-   - For each week, create a subsection with a daily breakdown.
-   - Use markdown lists to detail the files to be audited each day, including estimated time and rationale.
+   - Use a markdown table with one row per week summarizing its focus, based on the folders and heaviest files of the week.
 
-4. Prioritization Explanation:
-   - Provide a brief explanation of your prioritization strategy.
+3. Prioritization Explanation:
+   - Provide a brief explanation of the prioritization strategy described above, as it applies to this project.
 
-5. Conclusion:
+4. Conclusion:
    - Summarize the key points of the audit schedule.
 </response>
 
-Remember to think step-by-step and consider all the provided information when creating the schedule. Begin your response now.
+Keep it concise. Begin your response now.
         '''     
         return SCHEDULER
      
@@ -59,4 +34,4 @@ Remember to think step-by-step and consider all the provided information when cr
         error =  {
            "error": "Something went wrong, I wasn't able to schedule the audit, please try again"
         }
-        return error
\ No newline at end of file
+        return error    
@@ -1,19 +1,8 @@
+# Static part of the prompt, identical for every file so providers can cache it
+SOL_INSTRUCTIONS = '''
+Your task is to analyze a Rust-based file which is part of a larger program intended for deployment on the Solana blockchain and provide a complexity score to guide manual security audits.
 
-async def prepare_sol_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, rust_code, protocol):
-    try:
-        SOL_ANALYZER = f''' 
-Your task is to analyze the following Rust-based file which is part of a larger program intended for deployment on the Solana blockchain and provide a complexity score to guide manual security audits.
-    
-Here is the Rust code to analyze:
-<rust_code>
-{rust_code}
-</rust_code>
-
-Here is the metadata for the code:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The Rust code and its metadata are provided after these instructions.
 
 Analyze the potential complexity of the program based on the following criteria, think step-by-step:
 
@@ -52,14 +41,29 @@ Analyze the potential complexity of the program based on the following criteria,
 Your response must be a JSON file with the following structure:
 
 <output>
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[INSERT SCORE HERE]",
+  "complexity": [SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
   "rationale": "[INSERT ONE-SENTENCE EXPLANATION HERE]"
-}}
+}
 </output>
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_sol_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, rust_code, protocol):
+    try:
+        SOL_ANALYZER = f''' 
+Here is the Rust code to analyze:
+<rust_code>
+{rust_code}
+</rust_code>
+
+Here is the metadata for the code:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
         '''
         
         return SOL_ANALYZER
@@ -71,4 +75,4 @@ Do not include any additional information or explanations outside of this JSON s
             "complexity": "0",
             "rationale": "Oops, something went wrong, I wasn't able to score that file!"
          }
-        return error
\ No newline at end of file
+        return error
@@ -1,19 +1,8 @@
-async def prepare_ts_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, code, protocol):
-   try:
-      TYPESCRIPT_ANALYZER = f'''     
+# Static part of the prompt, identical for every file so providers can cache it
+TS_INSTRUCTIONS = '''
 Your task is to analyze TypeScript files which are part of a project intended for interacting with the Ethereum blockchain and provide a complexity score to guide manual security audits.
 
-Here is the TypeScript code to analyze:
-<ts_code>
-{code}
-</ts_code>
-
-Here is the metadata for the code:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Number of lines of comments: {comment_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The TypeScript code and its metadata are provided after these instructions.
 
 Analyze the potential complexity of the file based on the following criteria, make sure to think step-by-step:
 
@@ -68,14 +57,30 @@ Analyze the potential complexity of the file based on the following criteria, ma
 Your response must be a JSON file with the following structure:
 
 <output>
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[INSERT SCORE HERE]",
+  "complexity": [SCORE AS AN INTEGER FROM 1 TO 10, FOR EXAMPLE 5],
   "rationale": "[INSERT ONE-SENTENCE EXPLANATION HERE]"
-}}
+}
 </output>
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_ts_prompt(file_path, code_lines, comment_lines, code_to_comment_ratio, code, protocol):
+   try:
+      TYPESCRIPT_ANALYZER = f'''     
+Here is the TypeScript code to analyze:
+<ts_code>
+{code}
+</ts_code>
+
+Here is the metadata for the code:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Number of lines of comments: {comment_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
 '''
       return TYPESCRIPT_ANALYZER
    
@@ -86,4 +91,4 @@ Do not include any additional information or explanations outside of this JSON s
             "complexity": "0",
             "rationale": "Oops, something went wrong, I wasn't able to score that file!"
          }
-      return error
\ No newline at end of file
+      return error
@@ -1,19 +1,8 @@
-async def prepare_evm_prompt_fv(file_path, code_lines, code_to_comment_ratio, solidity_contract, protocol):
-   try:
-      EVM_ANALYZER = f''' 
-Your task is to analyze a Solidity (.sol) file intended for building a smart contract for the {protocol} project on the Ethereum blockchain and provide a complexity score to guide its formal verification.
-
-Here is the Solidity file to analyze:
+# Static parts of the prompts, identical for every file so providers can cache them
+EVM_FV_INSTRUCTIONS = '''
+Your task is to analyze a Solidity (.sol) file intended for building a smart contract on the Ethereum blockchain and provide a complexity score to guide its formal verification.
 
-<solidity_file>
-{solidity_contract}
-</solidity_file>
-
-Here is the metadata for the file:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The Solidity file and its metadata are provided after these instructions.
 
 Analyze the potential complexity of the code based on the following criteria, think step-by-step:
 
@@ -47,11 +36,11 @@ Analyze the potential complexity of the code based on the following criteria, th
    - Interface-based call (example: `IContractInterface(address).functionName();`)
    - Library usage (example: `LibraryName.functionName();`)
    - Delegate calls from Contract B to Contract A (example: 
-      ```function delegateCallToContractA(uint256 _data) public {{
+      ```function delegateCallToContractA(uint256 _data) public {
          // Perform delegate call to Contract A’s setData function
          (bool success, ) = contractAAddress.delegatecall(abi.encodeWithSignature(“setData(uint256)“, _data));
          require(success, “Delegate call failed”);
-      }}```
+      }```
    - Using ‘this’ for external calls within the same contract (example: `address(this)`)
 
 6. Analyze external dependencies:
@@ -59,48 +48,27 @@ Analyze the potential complexity of the code based on the following criteria, th
    - Use of established libraries (e.g., OpenZeppelin) vs custom implementations which are more challenging to audit
    - Contract constructor dependencies and general inheritance structure, the more inherited the more complex
 
-7. Assign a complexity score from 1 to 10, where:
+7. Assign a complexity score from 0 to 10, where:
+    0: Extremely short or simple file that is not worth formally verifying
     1-3: Simple contract with straightforward logic and easily formally verified code.
     4-6: Moderate complexity contract with some challenge for formal verification.
     7-10: High complexity contract with delegate calls, assembly, complex state management, and non-linear mathematics that are difficult to formally verify.
 </thinking>
 
 Your response must be a JSON file with the following expected output:
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",
-  "complexity": "[SCORE AS A SINGLE NUMBER FOR EXAMPLE 5]",
+  "complexity": [SCORE AS AN INTEGER FROM 0 TO 10, FOR EXAMPLE 5],
   "rationale": "[ONE SENTENCE EXPLANATION]"
-}}
+}
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
 '''
-      return EVM_ANALYZER
-   
-   except Exception as e:
-      print(e)
-      error  = {
-            "purpose": "Oops, something went wrong, I wasn't able to score that file!",
-            "complexity": "0",
-            "rationale": "Oops, something went wrong, I wasn't able to score that file!"
-         }
-      return error
-   
 
-async def prepare_sol_prompt_fv(file_path, code_lines, code_to_comment_ratio, rust_code, protocol):
-    try:
-        SOL_ANALYZER = f''' 
-Your task is to analyze the following Rust-based file which is part of a larger program for the {protocol} project and intended for deployment on the Solana blockchain and provide a complexity score to guide its formal verification.
-    
-Here is the Rust code to analyze:
-<rust_code>
-{rust_code}
-</rust_code>
+SOL_FV_INSTRUCTIONS = '''
+Your task is to analyze a Rust-based file which is part of a larger program intended for deployment on the Solana blockchain and provide a complexity score to guide its formal verification.
 
-Here is the metadata for the code:
-- Project name: {protocol}
-- File name: {file_path}
-- Number of lines of code: {code_lines}
-- Percentage of commented lines of code: {code_to_comment_ratio}%
+The Rust code and its metadata are provided after these instructions.
 
 Analyze the potential complexity of the program based on the following criteria, think step-by-step:
 
@@ -147,14 +115,56 @@ Analyze the potential complexity of the program based on the following criteria,
 Your response must be a JSON file with the following structure:
 
 <output>
-{{
+{
   "purpose": "[INSERT BRIEF DESCRIPTION OF THE PROGRAM'S PURPOSE HERE]",  
-  "complexity": "[SCORE AS A SINGLE NUMBER FOR EXAMPLE 5]",
+  "complexity": [SCORE AS AN INTEGER FROM 0 TO 10, FOR EXAMPLE 5],
   "rationale": "[INSERT ONE-SENTENCE EXPLANATION HERE]"
-}}
+}
 </output>
 
 Do not include any additional information or explanations outside of this JSON structure. Ensure that your rationale is concise and directly relates to the assigned complexity score.
+'''
+
+async def prepare_evm_prompt_fv(file_path, code_lines, code_to_comment_ratio, solidity_contract, protocol):
+   try:
+      EVM_ANALYZER = f''' 
+Here is the Solidity file to analyze:
+
+<solidity_file>
+{solidity_contract}
+</solidity_file>
+
+Here is the metadata for the file:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
+'''
+      return EVM_ANALYZER
+   
+   except Exception as e:
+      print(e)
+      error  = {
+            "purpose": "Oops, something went wrong, I wasn't able to score that file!",
+            "complexity": "0",
+            "rationale": "Oops, something went wrong, I wasn't able to score that file!"
+         }
+      return error
+   
+
+async def prepare_sol_prompt_fv(file_path, code_lines, code_to_comment_ratio, rust_code, protocol):
+    try:
+        SOL_ANALYZER = f''' 
+Here is the Rust code to analyze:
+<rust_code>
+{rust_code}
+</rust_code>
+
+Here is the metadata for the code:
+- Project name: {protocol}
+- File name: {file_path}
+- Number of lines of code: {code_lines}
+- Percentage of commented lines of code: {code_to_comment_ratio}%
         '''
         
         return SOL_ANALYZER
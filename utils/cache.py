@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import aiofiles
+
+# Cache settings
+CACHE_ENABLED = os.getenv('VERDICT_CACHE', '1') != '0'
+CACHE_DIR = os.getenv('VERDICT_CACHE_DIR', './.cache/verdicts')
+CACHE_MAX_AGE_DAYS = float(os.getenv('VERDICT_CACHE_MAX_AGE_DAYS', 30))
+CACHE_MAX_MB = float(os.getenv('VERDICT_CACHE_MAX_MB', 50))
+
+# Hit/miss counters for the current run
+cache_stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+# Function to build the cache key of a verdict
+def verdict_key(content, language, prompt_version, model, mode):
+    digest = hashlib.sha256()
+    for part in (language, prompt_version, model, mode):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(content.encode('utf-8') if isinstance(content, str) else content)
+    return digest.hexdigest()
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f'{key}.json')
+
+# Function to load a cached verdict, returns None on a miss or an expired entry
+async def load_verdict(key):
+    if not CACHE_ENABLED:
+        return None
+    path = _entry_path(key)
+    try:
+        async with aiofiles.open(path, 'r') as f:
+            entry = json.loads(await f.read())
+    except (OSError, json.JSONDecodeError):
+        cache_stats["misses"] += 1
+        return None
+    if time.time() - entry.get('created', 0) > CACHE_MAX_AGE_DAYS * 86400:
+        cache_stats["misses"] += 1
+        return None
+    cache_stats["hits"] += 1
+    return entry
+
+# Function to store a verdict (complexity, rationale, purpose) in the cache
+async def store_verdict(key, complexity, rationale, purpose, model):
+    if not CACHE_ENABLED:
+        return
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        "complexity": complexity,
+        "rationale": rationale,
+        "purpose": purpose,
+        "model": model,
+        "created": time.time()
+    }
+    tmp_path = f'{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp'
+    try:
+        async with aiofiles.open(tmp_path, 'w') as f:
+            await f.write(json.dumps(entry))
+        os.replace(tmp_path, path)
+        cache_stats["writes"] += 1
+    except OSError as e:
+        print(f"Couldn't write cache entry {key}: {e}")
+
+# Function to drop expired entries, then the oldest ones until the cache fits its size budget
+def evict_verdicts(max_age_days=CACHE_MAX_AGE_DAYS, max_mb=CACHE_MAX_MB):
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    now = time.time()
+    entries = []
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    evicted = 0
+    kept = []
+    for mtime, size, path in entries:
+        if now - mtime > max_age_days * 86400:
+            os.remove(path)
+            evicted += 1
+        else:
+            kept.append((mtime, size, path))
+
+    total_size = sum(size for _, size, _ in kept)
+    budget = max_mb * 1024 * 1024
+    for mtime, size, path in sorted(kept):
+        if total_size <= budget:
+            break
+        os.remove(path)
+        total_size -= size
+        evicted += 1
+
+    cache_stats["evicted"] += evicted
+    return evicted
+
+# Function to summarize cache usage for the run
+def cache_report():
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    hit_rate = (cache_stats["hits"] / lookups * 100) if lookups else 0
+    return (f"Verdict cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es) "
+            f"({hit_rate:.0f}% hit rate), {cache_stats['writes']} write(s), {cache_stats['evicted']} evicted")
@@ -0,0 +1,105 @@
+import os
+import re
+import math
+import random
+import hashlib
+from collections import defaultdict
+
+# Also group files that are nearly identical (vendored libraries with a tweaked pragma, regenerated bindings...)
+NEAR_DUPLICATES = os.getenv('DEDUP_NEAR', '0') == '1'
+# Estimated Jaccard similarity of two files' shingles above which they are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('DEDUP_NEAR_THRESHOLD', 0.9))
+
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 64
+# LSH bands x rows, files sharing all the rows of one band become candidates
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+MERSENNE_PRIME = (1 << 61) - 1
+_permutations = [
+    (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+    for rng in [random.Random(0x5EED)]
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+TOKEN = re.compile(r'\w+|[^\w\s]')
+
+# Function to compute the MinHash signature of comment-free source code.
+# Shingles are hashed with blake2b so signatures computed in different worker processes agree.
+def minhash_signature(stripped):
+    tokens = TOKEN.findall(stripped)
+    shingles = {
+        int.from_bytes(hashlib.blake2b(' '.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'), digest_size=8).digest(), 'big')
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    }
+    return tuple(min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) for a, b in _permutations)
+
+# Function to estimate the Jaccard similarity of two files from their signatures
+def similarity(signature, other):
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+# Function to group duplicate files, the first file of each group (in file order) standing for the others
+def group_duplicates(files, near=NEAR_DUPLICATES, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Returns {member: (representative, kind, similarity)} for every file that doesn't need its own
+    verdict, kind being "exact" (same content hash) or "near" (MinHash similarity >= threshold).
+    Near-duplicates need a "minhash" signature in their file info, see count_file.
+    """
+    duplicates = {}
+    by_hash = {}
+    for file_path, file_info in files.items():
+        representative = by_hash.setdefault(file_info['sha256'], file_path)
+        if representative != file_path:
+            duplicates[file_path] = (representative, "exact", 1.0)
+    if not near:
+        return duplicates
+
+    # Candidate pairs share at least one LSH band
+    unique = [file_path for file_path in files if file_path not in duplicates and files[file_path].get('minhash')]
+    buckets = defaultdict(list)
+    for file_path in unique:
+        signature = files[file_path]['minhash']
+        for band in range(LSH_BANDS):
+            buckets[(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])].append(file_path)
+    candidates = defaultdict(set)
+    for members in buckets.values():
+        for file_path in members:
+            candidates[file_path].update(members)
+
+    # Each file joins the first earlier representative it is close enough to, so groups can't drift
+    order = {file_path: index for index, file_path in enumerate(unique)}
+    representatives = set()
+    for file_path in unique:
+        best = None
+        for candidate in sorted(candidates[file_path], key=order.get):
+            if candidate not in representatives:
+                continue
+            score = similarity(files[file_path]['minhash'], files[candidate]['minhash'])
+            if score >= threshold:
+                best = (candidate, "near", round(score, 2))
+                break
+        if best is None:
+            representatives.add(file_path)
+        else:
+            duplicates[file_path] = best
+
+    # Exact copies of a near-duplicate follow the group of their representative
+    for file_path, (representative, kind, score) in list(duplicates.items()):
+        if kind == "exact" and representative in duplicates and duplicates[representative][1] == "near":
+            duplicates[file_path] = duplicates[representative]
+    return duplicates
+
+# Function to build the report entry of a duplicate from its representative's verdict
+def fan_out(result, file_path, file_info, kind, score):
+    comment_lines, code_lines = file_info['comment_lines'], file_info['code_lines']
+    return {
+        **result,
+        'file': file_path,
+        'ncloc': str(code_lines),
+        'code to comment ratio': str(math.ceil((comment_lines / code_lines) * 100)) if code_lines else result['code to comment ratio'],
+        'sha256': file_info['sha256'],
+        'duplicate_of': result['file'],
+        'duplicate_kind': kind,
+        'similarity': score
+    }
@@ -0,0 +1,162 @@
+import os
+import re
+from collections import defaultdict
+
+# Score small related files together, in one request sharing their context
+GROUP_FILES = os.getenv('GROUP_FILES', '0') == '1'
+# Tokens of code a grouped request may hold
+GROUP_TOKEN_BUDGET = int(os.getenv('GROUP_TOKEN_BUDGET', 8000))
+# Files larger than this are always scored on their own
+GROUP_FILE_TOKENS = int(os.getenv('GROUP_FILE_TOKENS', 2000))
+GROUP_MAX_FILES = int(os.getenv('GROUP_MAX_FILES', 8))
+
+# What each import-like statement points to, matched on comment-free code
+IMPORT_TARGETS = {
+    # import "./A.sol"; import {A} from "@oz/B.sol";
+    'evm': [re.compile(r'\bimport\s+(?:[^;"\']*?\bfrom\s+)?["\']([^"\']+)["\']')],
+    # use crate::state::{A, B}; mod state;
+    'sol': [re.compile(r'\buse\s+((?:crate|super|self)(?:::\w+)+)'), re.compile(r'\bmod\s+(\w+)\s*;')],
+    # use aptos_framework::coin; use 0x1::vault::{Self};
+    'move': [re.compile(r'\buse\s+(\w+::\w+)')],
+    # import "github.com/a/b"; import ( f "fmt" )
+    'go': [re.compile(r'^\s*(?:import\s+)?(?:[\w.]+\s+)?"([^"\n]+)"\s*$', re.MULTILINE)],
+    # import x from './a'; export * from '../b'; require('./c')
+    'ts': [re.compile(r'\bfrom\s*["\'](\.[^"\']*)["\']'), re.compile(r'\bimport\s*["\'](\.[^"\']*)["\']'), re.compile(r'\brequire\(\s*["\'](\.[^"\']*)["\']\s*\)')],
+}
+MOVE_MODULE = re.compile(r'\bmodule\s+(?:\w+::)?(\w+)')
+GO_IMPORT_BLOCK = re.compile(r'^\s*import\s*(?:\([^)]*\)|(?:[\w.]+\s+)?"[^"\n]*")', re.MULTILINE)
+TS_EXTENSIONS = ['.ts', '.mts', '.cts', '/index.ts']
+
+# Function to list what the imports of a file point to (paths, module paths), kept in the file info at ingestion
+def import_targets(stripped, language):
+    if language == 'go':
+        # Only quoted paths inside import declarations
+        stripped = '\n'.join(match.group(0).replace('(', '\n').replace(')', '\n') for match in GO_IMPORT_BLOCK.finditer(stripped))
+    targets = []
+    for pattern in IMPORT_TARGETS.get(language, []):
+        for match in pattern.finditer(stripped):
+            target = match.group(1)
+            # `mod x;` is told apart from `use` paths
+            targets.append(f'mod::{target}' if language == 'sol' and '::' not in target else target)
+    return sorted(set(targets))
+
+# Function to list the modules a Move file declares
+def declared_modules(stripped, language):
+    return sorted(set(MOVE_MODULE.findall(stripped))) if language == 'move' else []
+
+# Function to pick, among files matching an import, the one closest to the importing file
+def closest(file_path, candidates):
+    candidates = [candidate for candidate in candidates if candidate != file_path]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: (len(os.path.commonpath([file_path, candidate])), -len(candidate)))
+
+# Function to resolve the imports of every file to the files of the run they point to
+def build_graph(files, language):
+    """
+    Returns {file: set of files it depends on}, limited to files of `files`.
+    Imports of packages outside the files directory are ignored.
+    """
+    by_path = {os.path.normpath(file_path): file_path for file_path in files}
+    by_name = defaultdict(list)
+    by_stem = defaultdict(list)
+    by_dir = defaultdict(list)
+    by_package = defaultdict(list)
+    by_module = defaultdict(list)
+    for file_path, file_info in files.items():
+        name = os.path.basename(file_path)
+        stem = os.path.splitext(name)[0]
+        by_name[name].append(file_path)
+        # src/state/mod.rs stands for module `state`
+        by_stem[os.path.basename(os.path.dirname(file_path)) if stem == 'mod' else stem].append(file_path)
+        by_dir[os.path.dirname(file_path)].append(file_path)
+        by_package[os.path.basename(os.path.dirname(file_path))].append(file_path)
+        for module in file_info.get('modules', []):
+            by_module[module].append(file_path)
+
+    graph = {}
+    for file_path, file_info in files.items():
+        directory = os.path.dirname(file_path)
+        dependencies = set()
+        for target in file_info.get('imports', []):
+            resolved = None
+            if language == 'evm':
+                if target.startswith('.'):
+                    resolved = by_path.get(os.path.normpath(os.path.join(directory, target)))
+                else:
+                    # Remapped paths (@openzeppelin/..., src/...) are matched on their trailing components
+                    suffix = os.path.normpath(target)
+                    resolved = closest(file_path, [candidate for candidate in by_name[os.path.basename(target)] if os.path.normpath(candidate).endswith(suffix)]) \
+                        or closest(file_path, by_name[os.path.basename(target)])
+            elif language == 'ts':
+                base = os.path.normpath(os.path.join(directory, re.sub(r'\.js$', '', target)))
+                resolved = next((by_path[base + extension] for extension in [''] + TS_EXTENSIONS if base + extension in by_path), None)
+            elif language == 'sol':
+                # mod x; -> x.rs or x/mod.rs, use crate::x::y / super::x -> module x
+                segments = [segment for segment in target.split('::') if segment not in ('crate', 'super', 'self', 'mod')]
+                if segments:
+                    resolved = closest(file_path, by_stem[segments[0]])
+            elif language == 'move':
+                resolved = closest(file_path, by_module[target.split('::')[-1]])
+            elif language == 'go':
+                dependencies.update(candidate for candidate in by_package[target.rstrip('/').split('/')[-1]] if os.path.dirname(candidate) != directory)
+            if resolved is not None and resolved != file_path:
+                dependencies.add(resolved)
+        if language == 'go':
+            # Files of a package share its scope without importing each other
+            dependencies.update(candidate for candidate in by_dir[directory] if candidate != file_path)
+        graph[file_path] = dependencies
+    return graph
+
+# Function to estimate the tokens of a file from its size, its text is not loaded at this point
+def estimated_tokens(file_info):
+    return file_info.get('size', 0) // 4 + 1
+
+# Function to pack small related files into groups scored by a single request
+def pack_groups(files, graph, budget=GROUP_TOKEN_BUDGET, file_tokens=GROUP_FILE_TOKENS, max_files=GROUP_MAX_FILES):
+    """
+    Returns lists of at least two files. Files are grouped within the connected components
+    of the dependency graph (small files only), walked depth-first so that files importing
+    each other end up next to one another, filling each group up to `budget` tokens and
+    `max_files` files. Files left alone are not returned.
+    """
+    small = [file_path for file_path, file_info in files.items() if estimated_tokens(file_info) <= file_tokens]
+    small_set = set(small)
+    order = {file_path: index for index, file_path in enumerate(small)}
+    neighbours = defaultdict(set)
+    for file_path in small:
+        for dependency in graph.get(file_path, ()):
+            if dependency in small_set:
+                neighbours[file_path].add(dependency)
+                neighbours[dependency].add(file_path)
+
+    groups = []
+    placed = set()
+    for root in small:
+        if root in placed or not neighbours[root]:
+            continue
+        component, stack, seen = [], [(root, False)], set()
+        while stack:
+            file_path, expanded = stack.pop()
+            if expanded:
+                component.append(file_path)
+                continue
+            if file_path in seen or file_path in placed:
+                continue
+            seen.add(file_path)
+            stack.append((file_path, True))
+            for neighbour in sorted(neighbours[file_path], key=order.get, reverse=True):
+                if neighbour not in seen:
+                    stack.append((neighbour, False))
+        placed.update(component)
+
+        group, tokens = [], 0
+        for file_path in component:
+            size = estimated_tokens(files[file_path])
+            if group and (tokens + size > budget or len(group) >= max_files):
+                groups.append(group)
+                group, tokens = [], 0
+            group.append(file_path)
+            tokens += size
+        groups.append(group)
+    return [group for group in groups if len(group) > 1]
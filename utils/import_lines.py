@@ -1,30 +1,56 @@
 import re
+from utils.parsing import parse_source
+
+# Import/boilerplate statements of each language, compiled once.
+# Statements may span several lines, e.g. `use a::{b, c};` or a grouped Go import.
+IMPORT_PATTERNS = {
+    # import "./A.sol"; import {A, B} from "./A.sol";
+    'evm': re.compile(r'^[ \t]*import\b[^;]*;', re.MULTILINE),
+    # use a::b; pub use a::{b, c}; extern crate a;
+    'sol': re.compile(r'^[ \t]*(?:pub(?:\([^)]*\))?[ \t]+)?(?:use|extern[ \t]+crate)\b[^;]*;', re.MULTILINE),
+    # use std::signer; use aptos_framework::coin::{Self, Coin};
+    'move': re.compile(r'^[ \t]*use\b[^;]*;', re.MULTILINE),
+    # import x from 'y'; import type { A } from "y"; import 'y'; import x = require('y'); export * from 'y'; export { a } from 'y'
+    'ts': re.compile(
+        r'^[ \t]*(?:'
+        r'import[ \t]+(?:type[ \t]+)?[\w*{$][^;\'"]*?\bfrom[ \t]*[\'"][^\'"\n]*[\'"]'
+        r'|import[ \t]*[\'"][^\'"\n]*[\'"]'
+        r'|import[ \t]+[\w$]+[ \t]*=[ \t]*require\([^)]*\)'
+        r'|export[ \t]+(?:type[ \t]+)?(?:\*|\{)[^;\'"]*?\bfrom[ \t]*[\'"][^\'"\n]*[\'"]'
+        r')[ \t]*;?',
+        re.MULTILINE
+    ),
+    # import "fmt"; import f "fmt"; import ( ... )
+    'go': re.compile(r'^[ \t]*import[ \t]*(?:\([^)]*\)|(?:[\w.]+[ \t]+)?"[^"\n]*")', re.MULTILINE),
+}
+
+# Function to count the non-blank lines taken by the import statements of a file, from its parse tree
+# when a grammar is available, with the patterns above otherwise.
+# Pass comment-free content so that commented-out imports are not counted.
+def count_import_lines(content, language):
+    outline = parse_source(content, language)
+    if outline is not None:
+        lines = content.split('\n')
+        return sum(1 for first, last in outline["imports"] for line in lines[first:last + 1] if line.strip())
+    pattern = IMPORT_PATTERNS.get(language)
+    if pattern is None:
+        return 0
+    return sum(
+        sum(1 for line in match.group(0).split('\n') if line.strip())
+        for match in pattern.finditer(content)
+    )
 
 async def count_import_lines_solidity(content):
-    # Regular expression to match import statements in Solidity
-    import_pattern = re.compile(r'^\s*import\s+.*?;', re.MULTILINE)
-    imports = import_pattern.findall(content)
-    return len(imports)
+    return count_import_lines(content, 'evm')
 
 async def count_import_lines_rust(content):
-    # Regular expression to match Rust import statements
-    import_pattern = re.compile(r'^\s*(use|extern crate)\s.*?;', re.MULTILINE)
-    import_matches = import_pattern.findall(content)
-    return len(import_matches)
+    return count_import_lines(content, 'sol')
+
+async def count_import_lines_move(content):
+    return count_import_lines(content, 'move')
+
+async def count_import_lines_ts(content):
+    return count_import_lines(content, 'ts')
 
 async def count_import_lines_go(content):
-    # Regular expression to match import statements in Go
-    import_pattern = re.compile(r'^\s*import\s*(\([\s\S]*?\)|\S+\s+"[^"]+"\s*)', re.MULTILINE)
-    imports = import_pattern.findall(content)
-    
-    # Count lines in grouped imports
-    total_import_lines = 0
-    for imp in imports:
-        if imp.startswith('('):
-            # Count lines in grouped import
-            total_import_lines += len(imp.strip().split('\n'))
-        else:
-            # Single import
-            total_import_lines += 1
-    
-    return total_import_lines
\ No newline at end of file
+    return count_import_lines(content, 'go')
@@ -0,0 +1,29 @@
+import json
+import aiofiles
+
+# Function to load a previous complexity report keyed by file path
+async def load_previous_report(report_file):
+    try:
+        async with aiofiles.open(report_file, 'r') as f:
+            report = json.loads(await f.read())
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Couldn't load previous report {report_file}: {e}")
+        return {}
+    return {entry['file']: entry for entry in report.get('complexity_report', []) if 'file' in entry}
+
+# Function to split current files into reusable report entries and files that need scoring again
+def diff_against_report(files, previous):
+    reused = {}
+    changed = {}
+    for file_path, file_info in files.items():
+        entry = previous.get(file_path)
+        if (
+            entry is not None
+            and entry.get('sha256') == file_info['sha256']
+            and str(entry.get('ncloc')) == str(file_info['code_lines'])
+        ):
+            reused[file_path] = entry
+        else:
+            changed[file_path] = file_info
+    deleted = [file_path for file_path in previous if file_path not in files]
+    return reused, changed, deleted
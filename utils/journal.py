@@ -0,0 +1,61 @@
+import os
+import json
+import asyncio
+import aiofiles
+
+
+class RunJournal:
+    """
+    Append-only record of the (file, mode) units completed during a run.
+
+    Each line holds the verdict of one unit along with the content fingerprint it was
+    computed from, so a resumed run only skips units whose file hasn't changed since.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.entries = {}
+        self.lock = asyncio.Lock()
+
+    # Function to load the units completed by a previous, interrupted run
+    async def load(self):
+        if not os.path.exists(self.journal_file):
+            return 0
+        async with aiofiles.open(self.journal_file, 'r') as f:
+            async for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[(entry['file'], entry['mode'])] = entry
+                except (json.JSONDecodeError, KeyError):
+                    # A crash can leave a truncated last line behind
+                    continue
+        return len(self.entries)
+
+    # Function to start a new journal, dropping any previous one
+    def reset(self):
+        self.entries = {}
+        open(self.journal_file, 'w').close()
+
+    # Function to get the journaled verdict of a unit, if its file is unchanged
+    def get(self, file_path, mode, sha256):
+        entry = self.entries.get((file_path, mode))
+        if entry is not None and entry.get('sha256') == sha256:
+            return entry
+        return None
+
+    # Function to record a completed unit
+    async def record(self, file_path, mode, sha256, complexity, rationale, purpose, model=None):
+        entry = {
+            "file": file_path,
+            "mode": mode,
+            "sha256": sha256,
+            "complexity": complexity,
+            "rationale": rationale,
+            "purpose": purpose,
+            "model": model
+        }
+        async with self.lock:
+            async with aiofiles.open(self.journal_file, 'a') as f:
+                await f.write(json.dumps(entry) + '\n')
+                await f.flush()
+            self.entries[(file_path, mode)] = entry
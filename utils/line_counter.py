@@ -0,0 +1,272 @@
+import os
+import re
+import sys
+import json
+import asyncio
+import hashlib
+import subprocess
+import aiofiles
+from concurrent.futures import ProcessPoolExecutor
+from utils.import_lines import count_import_lines
+from utils.dedup import minhash_signature
+from utils.prescore import structural_metrics
+from utils.parsing import parse_source, outline_key, cache_outline
+from utils.depgraph import import_targets, declared_modules
+
+# Directories cloc skips by default
+EXCLUDED_DIRS = {'.bzr', '.cvs', '.hg', '.git', '.svn', 'GIT', 'CVS', '.snapshot'}
+
+# Above this many files, counting is spread over a process pool
+PARALLEL_THRESHOLD = int(os.getenv('LINE_COUNTER_PARALLEL_THRESHOLD', 64))
+
+MOVE_LANG_DEF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lang_files', 'move_lang_def.txt')
+
+# Comment and string rules of the languages we analyze. Line counts follow cloc's own filters (`filters`, applied
+# the way cloc does, strings not looked at) and line continuation marker; strip_comments, which feeds the prompts and
+# the metrics, also matches strings so that comment markers inside them are not taken for comments.
+LANGUAGES = {
+    'evm': {
+        'name': 'Solidity',
+        'extensions': ['.sol'],
+        'line_comments': ['//'],
+        'block_comments': [('/*', '*/')],
+        'strings': [r'"(?:\\.|[^"\\\n])*"', r"'(?:\\.|[^'\\\n])*'"],
+        'filters': [('call_regexp_common', 'C++')],
+        'continuation': r'\\$',
+    },
+    'sol': {
+        'name': 'Rust',
+        'extensions': ['.rs'],
+        'line_comments': ['//'],
+        'block_comments': [('/*', '*/')],
+        # Raw strings, multi-line strings and char literals (but not lifetimes like 'a)
+        'strings': [r'b?r(#*)".*?"\1', r'b?"(?:\\.|[^"\\])*"', r"b?'(?:\\.|[^'\\\n])'"],
+        'filters': [('call_regexp_common', 'C++')],
+        'continuation': None,
+    },
+    'ts': {
+        'name': 'TypeScript',
+        'extensions': ['.ts', '.mts', '.cts'],
+        'line_comments': ['//'],
+        'block_comments': [('/*', '*/')],
+        'strings': [r'"(?:\\.|[^"\\\n])*"', r"'(?:\\.|[^'\\\n])*'", r'`(?:\\.|[^`\\])*`'],
+        'filters': [('call_regexp_common', 'C++')],
+        'continuation': r'\\$',
+    },
+    'go': {
+        'name': 'Go',
+        'extensions': ['.go'],
+        'line_comments': ['//'],
+        'block_comments': [('/*', '*/')],
+        'strings': [r'"(?:\\.|[^"\\\n])*"', r"'(?:\\.|[^'\\\n])*'", r'`[^`]*`'],
+        # cloc's remove_inline filters only run with --inline
+        'filters': [('call_regexp_common', 'C++'), ('remove_inline', '//.*$')],
+        'continuation': r'\\$',
+    },
+}
+
+# Function to read a cloc --read-lang-def file into the same shape as LANGUAGES
+def load_lang_def(def_file):
+    definition = {'name': None, 'extensions': [], 'line_comments': [], 'block_comments': [], 'strings': [r'"(?:\\.|[^"\\\n])*"'], 'filters': [], 'continuation': None}
+    with open(def_file, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not line[0].isspace():
+                definition['name'] = line.strip()
+                continue
+            parts = line.split()
+            if parts[0] == 'filter':
+                definition['filters'].append(tuple(parts[1:]))
+            if parts[0] == 'extension':
+                definition['extensions'].append('.' + parts[1])
+            elif parts[0] == 'end_of_line_continuation':
+                definition['continuation'] = parts[1]
+            elif parts[0] == 'filter' and parts[1] in ('remove_matches', 'remove_inline'):
+                # e.g. "^\s*//" or "//.*$" -> "//"
+                marker = re.sub(r'^\^\\s\*|\.\*\$$', '', parts[2])
+                if marker not in definition['line_comments']:
+                    definition['line_comments'].append(marker)
+            elif parts[0] == 'filter' and parts[1] == 'remove_between_general':
+                definition['block_comments'].append((parts[2], parts[3]))
+            elif parts[0] == 'filter' and parts[1] == 'call_regexp_common' and parts[2] == 'C++':
+                definition['line_comments'].append('//')
+                definition['block_comments'].append(('/*', '*/'))
+    return definition
+
+LANGUAGES['move'] = load_lang_def(MOVE_LANG_DEF)
+
+_token_patterns = {}
+
+# Function to build (once) the tokenizer matching comments and strings of a language
+def token_pattern(language):
+    if language not in _token_patterns:
+        definition = LANGUAGES[language]
+        alternatives = []
+        for start, end in definition['block_comments']:
+            alternatives.append(f'(?P<block{len(alternatives)}>{re.escape(start)}.*?(?:{re.escape(end)}|\\Z))')
+        for marker in definition['line_comments']:
+            alternatives.append(f'(?P<line{len(alternatives)}>{re.escape(marker)}[^\\n]*)')
+        for string in definition['strings']:
+            alternatives.append(f'(?:{string})')
+        # Group numbers of back-references (raw strings) shift with the alternatives before them
+        pattern = '|'.join(alternatives)
+        offset = sum(1 for name in ('block', 'line') for alt in alternatives if alt.startswith(f'(?P<{name}'))
+        pattern = re.sub(r'\\(\d)', lambda m: f'\\{int(m.group(1)) + offset}', pattern)
+        _token_patterns[language] = re.compile(pattern, re.DOTALL)
+    return _token_patterns[language]
+
+# Function to remove comments from source code, keeping line breaks so line numbers still match
+def strip_comments(content, language):
+    def replace(match):
+        if match.lastgroup is not None and match.lastgroup.startswith(('block', 'line')):
+            return '\n' * match.group(0).count('\n')
+        return match.group(0)
+    return token_pattern(language).sub(replace, content)
+
+# Regexp::Common's comment patterns used by cloc (the block alternative spelled so it can't backtrack for long)
+CLOC_COMMENT_PATTERNS = {'C++': re.compile(r'//[^\n]*\n|/\*.*?\*/', re.DOTALL)}
+CLOC_BLANK = re.compile(r'\s*$', re.ASCII)
+
+# Function to drop blank lines like cloc's rm_blanks, a blank line following a continued line being kept
+def drop_blank_lines(lines, continuation):
+    kept = []
+    for index, line in enumerate(lines):
+        if CLOC_BLANK.match(line) and not (index and continuation and re.search(continuation, lines[index - 1])):
+            continue
+        kept.append(line)
+    return kept
+
+# Function to apply one of cloc's comment filters to the non-blank lines of a file
+def apply_cloc_filter(lines, name, *args):
+    if name == 'call_regexp_common':
+        # Comments are removed from the whole text at once: a block comment between two pieces of code joins their lines
+        text = ''.join(line if re.search(r'\\$', line) else line + '\n' for line in lines)
+        lines = CLOC_COMMENT_PATTERNS[args[0]].sub('', text).split('\n')
+        # Like Perl's split, trailing empty fields are dropped
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+    if name == 'remove_matches':
+        pattern = re.compile(args[0], re.IGNORECASE)
+        return [line for line in lines if not pattern.search(line)]
+    # remove_inline and rm_comments_in_strings only run with cloc's --inline and --strip-str-comments
+    return lines
+
+# Function to count blank, comment and code lines like cloc does, comment markers inside strings included
+def count_content(content, language):
+    definition = LANGUAGES[language]
+    lines = re.findall(r'[^\n]*\n|[^\n]+\Z', content)
+    kept = drop_blank_lines(lines, definition['continuation'])
+    blank = len(lines) - len(kept)
+    for name, *args in definition['filters']:
+        kept = drop_blank_lines(apply_cloc_filter(kept, name, *args), definition['continuation'])
+    return {"blank": blank, "comment": len(lines) - blank - len(kept), "code": len(kept)}
+
+# Function to ingest one file in a single pass: line counts, import lines and targets, content hash, structural
+# metrics and, when near-duplicates are looked for, a MinHash signature. The text itself is not kept, see read_source.
+def count_file(file_path, language, signatures=False):
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        print(f"Error reading file {file_path}: {e}")
+        raw = b""
+    content = raw.decode('utf-8', errors='replace')
+    stripped = strip_comments(content, language)
+    counts = count_content(content, language)
+    counts["import_lines"] = count_import_lines(stripped, language)
+    counts["sha256"] = hashlib.sha256(raw).hexdigest()
+    counts["size"] = len(raw)
+    counts["metrics"] = structural_metrics(stripped, language)
+    counts["imports"] = import_targets(stripped, language)
+    counts["modules"] = declared_modules(stripped, language)
+    # Parsed once above, handed back so a worker process' parse is reused by the chunker
+    outline = parse_source(stripped, language)
+    if outline is not None:
+        counts["outline"] = (outline_key(stripped, language), outline)
+    if signatures:
+        counts["minhash"] = minhash_signature(stripped)
+    return file_path, counts
+
+# Function to load the text of an ingested file right before it is needed for a prompt
+async def read_source(file_info):
+    async with aiofiles.open(file_info['file_name'], 'rb') as f:
+        raw = await f.read()
+    if hashlib.sha256(raw).hexdigest() != file_info['sha256']:
+        print(f"⚠️ {file_info['file_name']} changed since it was counted")
+    return raw.decode('utf-8', errors='replace')
+
+# Function to list the files of a language under a directory, in a stable order
+def find_files(files_dir, language):
+    extensions = tuple(LANGUAGES[language]['extensions'])
+    found = []
+    for root, dirs, names in os.walk(files_dir):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS)
+        for name in sorted(names):
+            if name.endswith(extensions):
+                found.append(os.path.join(root, name))
+    return found
+
+# Function to count lines of every file of a language under a directory, the in-process equivalent of `cloc --by-file`
+def count_lines_sync(files_dir, language, skip_duplicates=True, signatures=False):
+    file_paths = find_files(files_dir, language)
+    if len(file_paths) > PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor() as pool:
+            counted = list(pool.map(count_file, file_paths, [language] * len(file_paths), [signatures] * len(file_paths), chunksize=16))
+    else:
+        counted = [count_file(file_path, language, signatures) for file_path in file_paths]
+
+    files = {}
+    seen = set()
+    for file_path, counts in counted:
+        if "outline" in counts:
+            cache_outline(*counts.pop("outline"))
+        # Like cloc, identical files are only counted once
+        if skip_duplicates:
+            if counts["sha256"] in seen:
+                continue
+            seen.add(counts["sha256"])
+        files[file_path] = counts
+    return files
+
+# Function to count lines without blocking the event loop
+async def count_lines(files_dir, language, skip_duplicates=True, signatures=False):
+    return await asyncio.get_running_loop().run_in_executor(None, count_lines_sync, files_dir, language, skip_duplicates, signatures)
+
+# Function to run cloc on a directory, returns {file_path: (blank, comment, code)}; needs cloc installed
+def cloc_counts(files_dir, language):
+    args = ['cloc', files_dir, '--json', '--by-file']
+    if language == 'move':
+        args.append(f'--read-lang-def={MOVE_LANG_DEF}')
+    else:
+        args.append(f"--include-lang={LANGUAGES[language]['name']}")
+    cloc_output = json.loads(subprocess.run(args, capture_output=True, text=True).stdout or '{}')
+    return {
+        file_path: (file_info.get('blank', 0), file_info.get('comment', 0), file_info.get('code', 0))
+        for file_path, file_info in cloc_output.items() if file_path not in ('header', 'SUM')
+    }
+
+# Function to compare our counts with cloc's on a directory, when cloc is installed
+def compare_with_cloc(files_dir, language):
+    expected_counts = cloc_counts(files_dir, language)
+    ours = count_lines_sync(files_dir, language)
+
+    mismatches = []
+    for file_path, expected in expected_counts.items():
+        counts = ours.get(file_path)
+        actual = (counts['blank'], counts['comment'], counts['code']) if counts else None
+        if actual != expected:
+            mismatches.append((file_path, expected, actual))
+    for file_path in ours:
+        if file_path not in expected_counts:
+            mismatches.append((file_path, None, (ours[file_path]['blank'], ours[file_path]['comment'], ours[file_path]['code'])))
+    return mismatches
+
+if __name__ == "__main__":
+    # Usage: python -m utils.line_counter <files_dir> <language>
+    directory, lang = sys.argv[1], sys.argv[2]
+    differences = compare_with_cloc(directory, lang)
+    for path, cloc_expected, our_counts in differences:
+        print(f"{path}: cloc (blank, comment, code) = {cloc_expected}, ours = {our_counts}")
+    print(f"{len(differences)} file(s) differ from cloc")
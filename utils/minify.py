@@ -0,0 +1,45 @@
+import re
+from llm.ratelimit import estimate_tokens
+from utils.line_counter import strip_comments
+from utils.import_lines import IMPORT_PATTERNS
+
+# Token savings over the run
+minify_stats = {"files": 0, "tokens_before": 0, "tokens_after": 0}
+
+BLANK_RUNS = re.compile(r'\n{3,}')
+TRAILING_WHITESPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+WHITESPACE = re.compile(r'\s+')
+
+# Function to shrink a source file before it goes into a prompt: comments (license headers, NatSpec...) are
+# stripped, runs of blank lines collapsed and import statements collapsed onto a single line
+def minify_source(content, language):
+    minified = strip_comments(content, language)
+
+    pattern = IMPORT_PATTERNS.get(language)
+    if pattern is not None:
+        imports = [WHITESPACE.sub(' ', match.group(0).strip()) for match in pattern.finditer(minified)]
+        if imports:
+            first = pattern.search(minified).start()
+            minified = pattern.sub('', minified)
+            minified = minified[:first] + ' '.join(imports) + '\n' + minified[first:]
+
+    minified = TRAILING_WHITESPACE.sub('', minified)
+    minified = BLANK_RUNS.sub('\n\n', minified)
+    return minified.strip('\n') + '\n'
+
+# Function to minify a file's prompt content and report how many tokens it saves
+def minify_for_prompt(file_path, content, language):
+    minified = minify_source(content, language)
+    before, after = estimate_tokens(content), estimate_tokens(minified)
+    minify_stats["files"] += 1
+    minify_stats["tokens_before"] += before
+    minify_stats["tokens_after"] += after
+    saved = (1 - after / before) * 100 if before else 0
+    print(f'Minified {file_path}: ~{before} -> ~{after} tokens ({saved:.0f}% saved) ✂️')
+    return minified
+
+# Function to summarize the token savings of the run
+def minify_report():
+    before, after = minify_stats["tokens_before"], minify_stats["tokens_after"]
+    saved = (1 - after / before) * 100 if before else 0
+    return f"Prompt minification: {minify_stats['files']} file(s), ~{before - after} input tokens saved on each request about these files ({saved:.0f}%)"
@@ -0,0 +1,129 @@
+import os
+import hashlib
+
+# Parse files with tree-sitter grammars when they are installed, TREE_SITTER=0 keeps the regex fallbacks
+TREE_SITTER = os.getenv('TREE_SITTER', '1') != '0'
+
+# Grammar of each language, as named by tree-sitter-language-pack
+GRAMMARS = {'evm': 'solidity', 'sol': 'rust', 'move': 'move', 'go': 'go', 'ts': 'typescript'}
+
+# Node types of each grammar the outline is built from
+NODE_TYPES = {
+    'evm': {
+        'imports': {'import_directive'},
+        'containers': {'contract_declaration', 'interface_declaration', 'library_declaration'},
+        'functions': {'function_definition', 'constructor_definition', 'fallback_receive_definition', 'modifier_definition'},
+        'declarations': {'state_variable_declaration', 'struct_declaration', 'enum_declaration', 'event_definition', 'error_declaration', 'using_directive'},
+        'branches': {'if_statement', 'for_statement', 'while_statement', 'do_while_statement', 'catch_clause', 'ternary_expression'},
+    },
+    'sol': {
+        'imports': {'use_declaration', 'extern_crate_declaration'},
+        'containers': {'impl_item', 'trait_item', 'mod_item'},
+        'functions': {'function_item'},
+        'declarations': {'struct_item', 'enum_item', 'const_item', 'static_item', 'type_item', 'macro_definition', 'macro_invocation', 'function_signature_item'},
+        'branches': {'if_expression', 'match_arm', 'for_expression', 'while_expression', 'loop_expression', 'try_expression'},
+    },
+    'move': {
+        'imports': {'use_declaration'},
+        'containers': {'module_definition'},
+        'functions': {'function_definition'},
+        'declarations': {'struct_definition', 'constant', 'spec_block', 'friend_declaration'},
+        'branches': {'if_expression', 'while_expression', 'loop_expression', 'abort_expression'},
+    },
+    'go': {
+        'imports': {'import_declaration'},
+        'containers': set(),
+        'functions': {'function_declaration', 'method_declaration'},
+        'declarations': {'type_declaration', 'var_declaration', 'const_declaration'},
+        'branches': {'if_statement', 'for_statement', 'expression_case', 'type_case', 'communication_case'},
+    },
+    'ts': {
+        'imports': {'import_statement'},
+        'containers': {'class_declaration', 'abstract_class_declaration', 'export_statement', 'internal_module'},
+        'functions': {'function_declaration', 'generator_function_declaration', 'method_definition'},
+        'declarations': {'interface_declaration', 'enum_declaration', 'type_alias_declaration', 'lexical_declaration', 'variable_declaration', 'public_field_definition'},
+        'branches': {'if_statement', 'for_statement', 'for_in_statement', 'while_statement', 'do_statement', 'switch_case', 'catch_clause', 'ternary_expression'},
+    },
+}
+
+_parsers = {}
+_outlines = {}
+
+# Function to load (once) the tree-sitter parser of a language, None when tree-sitter or the grammar is missing
+def get_parser(language):
+    if language not in _parsers:
+        _parsers[language] = None
+        if TREE_SITTER and language in GRAMMARS:
+            try:
+                from tree_sitter_language_pack import get_parser as load_parser
+            except ImportError:
+                try:
+                    from tree_sitter_languages import get_parser as load_parser
+                except ImportError:
+                    load_parser = None
+            if load_parser is not None:
+                try:
+                    _parsers[language] = load_parser(GRAMMARS[language])
+                except Exception:
+                    pass
+    return _parsers[language]
+
+# Function to key outlines by language and content
+def outline_key(content, language):
+    return f"{language}:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+# Function to remember an outline computed elsewhere (e.g. by an ingestion worker process)
+def cache_outline(key, outline):
+    _outlines[key] = outline
+
+# Function to parse a file once per run and describe its structure
+def parse_source(content, language):
+    """
+    Returns the outline of the code, or None when no tree-sitter grammar is available for the
+    language (callers then fall back to their regexes):
+
+    - "imports": (first_line, last_line) of each import statement
+    - "declarations": first line of each top-level declaration and of each member of a
+      contract, impl, trait, module or class, where the chunker may split the file
+    - "functions": number of functions with a body
+    - "branches": number of branching constructs and short-circuit operators
+
+    Lines are 0-based. Outlines are cached by content hash, the trees themselves are dropped.
+    Pass comment-free code: comments keep their line breaks, so lines still match the file.
+    """
+    key = outline_key(content, language)
+    if key in _outlines:
+        return _outlines[key]
+    parser = get_parser(language)
+    if parser is None:
+        return None
+    tree = parser.parse(content.encode('utf-8'))
+    _outlines[key] = outline_tree(tree.root_node, NODE_TYPES[language])
+    return _outlines[key]
+
+# Function to walk a parse tree into an outline
+def outline_tree(root, node_types):
+    outline = {"imports": [], "declarations": [], "functions": 0, "branches": 0}
+    # (node, whether its children are declarations of a file, contract or class)
+    stack = [(child, True) for child in reversed(root.children)]
+    while stack:
+        node, declaration_level = stack.pop()
+        kind = node.type
+        if kind in node_types['imports'] or (kind == 'export_statement' and node.child_by_field_name('source') is not None):
+            outline["imports"].append((node.start_point[0], node.end_point[0]))
+            continue
+        if declaration_level and (kind in node_types['containers'] or kind in node_types['functions'] or kind in node_types['declarations']):
+            outline["declarations"].append(node.start_point[0])
+        if kind in node_types['functions'] and node.child_by_field_name('body') is not None:
+            outline["functions"] += 1
+        elif kind in node_types['branches']:
+            outline["branches"] += 1
+        elif kind == 'binary_expression':
+            operator = node.child_by_field_name('operator')
+            if operator is not None and operator.type in ('&&', '||'):
+                outline["branches"] += 1
+        # Members of containers are declarations too, whatever wraps them (contract_body, declaration_list...)
+        members = kind in node_types['containers'] or (declaration_level and kind not in node_types['functions'] and kind not in node_types['declarations'])
+        stack.extend((child, members) for child in reversed(node.children))
+    outline["declarations"] = sorted(set(outline["declarations"]))
+    return outline
@@ -0,0 +1,210 @@
+import os
+from collections import defaultdict
+from utils.line_counter import strip_comments
+from utils.depgraph import import_targets, declared_modules, build_graph
+from llm.structured import parse_score
+
+# Hours of audit work in a day, meetings included
+PLAN_DAY_HOURS = float(os.getenv('PLAN_DAY_HOURS', 8))
+# Smallest block of time a file gets in the schedule
+PLAN_SLOT_HOURS = 0.5
+# Files listed per week in the plan summary sent to the LLM, the full plan is rendered locally
+PLAN_SUMMARY_FILES = 5
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+# Function to list the meetings of a day: kick-off, weekly progress reviews (not in the first and last weeks), wrap-up
+def meetings_for(week, day, weeks, project_name):
+    meetings = []
+    if week == 1 and day == 0:
+        meetings.append(("Project kick-off", 1))
+    if day == 2 and 1 < week < weeks:
+        meetings.append((f"Progress review with the {project_name} team", 1))
+    if week == weeks and day == len(WEEKDAYS) - 1:
+        meetings.append(("Wrap-up meeting and report review", 2))
+    return meetings
+
+# Function to read a report score, older reports may hold answers like "7/10"
+def score_of(value):
+    try:
+        return parse_score(value if value is not None else 0, low=0)
+    except ValueError:
+        return 0
+
+# Function to weigh the review effort of a file: nCLOC x complexity, formal verification averaged in when scored
+def effort(entry):
+    score = score_of(entry.get('score_manual'))
+    score_fv = score_of(entry.get('score_fv'))
+    if score_fv:
+        score = (score + score_fv) / 2
+    return int(entry.get('ncloc') or 0) * max(1.0, score)
+
+# Function to read the imports of the report's files back from disk, a file that can't be read has none
+def dependency_graph(entries, language):
+    files = {}
+    for entry in entries:
+        try:
+            with open(entry['file'], 'r', encoding='utf-8') as f:
+                stripped = strip_comments(f.read(), language)
+        except (OSError, UnicodeDecodeError, KeyError):
+            stripped = ''
+        files[entry['file']] = {'imports': import_targets(stripped, language), 'modules': declared_modules(stripped, language)}
+    return build_graph(files, language)
+
+# Function to order files so related ones are reviewed back to back, dependencies before the files using them
+def cluster_order(entries, graph):
+    """
+    Returns lists of files, one per connected component of the dependency graph, the heaviest
+    component first. Within a component, files come in dependency order (ties broken by effort
+    then path), so a contract's base contracts and libraries are read before it.
+    """
+    weights = {entry['file']: effort(entry) for entry in entries}
+    neighbours = defaultdict(set)
+    for file_path, dependencies in graph.items():
+        for dependency in dependencies:
+            if dependency in weights and file_path in weights:
+                neighbours[file_path].add(dependency)
+                neighbours[dependency].add(file_path)
+
+    components, seen = [], set()
+    for file_path in sorted(weights, key=lambda path: (-weights[path], path)):
+        if file_path in seen:
+            continue
+        component, stack = [], [file_path]
+        seen.add(file_path)
+        while stack:
+            current = stack.pop()
+            component.append(current)
+            for neighbour in neighbours[current]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        components.append(component)
+    components.sort(key=lambda component: (-sum(weights[path] for path in component), min(component)))
+
+    ordered = []
+    for component in components:
+        members = set(component)
+        pending = {path: {dependency for dependency in graph.get(path, ()) if dependency in members and dependency != path} for path in component}
+        order = []
+        while pending:
+            # Import cycles are broken at their heaviest file
+            ready = [path for path, dependencies in pending.items() if not dependencies] or list(pending)
+            path = min(ready, key=lambda path: (-weights[path], path))
+            order.append(path)
+            del pending[path]
+            for dependencies in pending.values():
+                dependencies.discard(path)
+        ordered.append(order)
+    return ordered
+
+# Function to share the hours available for files out in slots, proportionally to effort
+def allot_hours(weights, hours, slot=PLAN_SLOT_HOURS):
+    """
+    Largest-remainder split of `hours` into `slot`-sized blocks. Every file gets at least one
+    block when there are enough of them; beyond that, the lightest files get no time of their
+    own and are skimmed alongside the files next to them.
+    """
+    slots = int(hours // slot)
+    files = list(weights)
+    floor = 1 if len(files) <= slots else 0
+    spare = slots - floor * len(files)
+    total = sum(weights.values()) or 1
+    shares = {path: spare * weights[path] / total for path in files}
+    allotted = {path: floor + int(shares[path]) for path in files}
+    left = slots - sum(allotted.values())
+    for path in sorted(files, key=lambda path: (-(shares[path] - int(shares[path])), path))[:left]:
+        allotted[path] += 1
+    return {path: allotted[path] * slot for path in files}
+
+# Function to build the audit plan locally, deterministically, from the complexity report
+def plan_audit(report, weeks, project_name, language, graph=None):
+    """
+    Bin-packs the report's files into the days of `weeks` business weeks. Meetings are placed
+    first, the remaining hours are shared out by effort (nCLOC x complexity), then files are
+    laid out in cluster order, a file longer than what is left of a day carrying over to the
+    next. Exact duplicates take no time, they are listed with the file they copy.
+    """
+    weeks = max(1, int(weeks))
+    entries = report.get('complexity_report', report) if isinstance(report, dict) else report
+    copies = defaultdict(list)
+    reviewed = []
+    for entry in entries:
+        if entry.get('duplicate_kind') == "exact":
+            copies[entry['duplicate_of']].append(entry['file'])
+        else:
+            reviewed.append(entry)
+    by_file = {entry['file']: entry for entry in reviewed}
+    if graph is None:
+        graph = dependency_graph(reviewed, language)
+    clusters = cluster_order(reviewed, graph)
+
+    days = []
+    for week in range(1, weeks + 1):
+        for day in range(len(WEEKDAYS)):
+            meetings = meetings_for(week, day, weeks, project_name)
+            days.append({"week": week, "day": WEEKDAYS[day], "meetings": meetings, "files": [], "free": max(0.0, PLAN_DAY_HOURS - sum(hours for _, hours in meetings))})
+    hours = allot_hours({path: effort(by_file[path]) for cluster in clusters for path in cluster}, sum(day["free"] for day in days))
+
+    index = 0
+    for number, cluster in enumerate(clusters, start=1):
+        for path in cluster:
+            entry = by_file[path]
+            block = {"file": path, "cluster": number, "score": entry.get('score_manual'), "score_fv": entry.get('score_fv'), "ncloc": entry.get('ncloc'), "copies": copies.get(path, [])}
+            remaining, part = hours[path], 1
+            if not remaining:
+                days[index]["files"].append({**block, "hours": 0.0, "part": None})
+                continue
+            while remaining > 0:
+                while index < len(days) - 1 and days[index]["free"] < PLAN_SLOT_HOURS:
+                    index += 1
+                # Rounding can leave the last day a little overbooked rather than drop a file
+                taken = remaining if index == len(days) - 1 else min(remaining, days[index]["free"])
+                days[index]["files"].append({**block, "hours": taken, "part": part if taken < hours[path] or part > 1 else None})
+                days[index]["free"] -= taken
+                remaining -= taken
+                part += 1
+    return {"project": project_name, "weeks": weeks, "day_hours": PLAN_DAY_HOURS, "clusters": len(clusters), "days": days}
+
+# Function to name a scheduled file block, with its part when it spans several days
+def block_label(block):
+    label = f"`{block['file']}`"
+    if block["part"]:
+        label += f" (part {block['part']})"
+    if block["copies"]:
+        label += f", also covers {len(block['copies'])} identical cop{'y' if len(block['copies']) == 1 else 'ies'}"
+    return label
+
+# Function to render the day-by-day schedule as markdown
+def render_plan(plan):
+    lines = ["## Detailed Schedule", ""]
+    for week in range(1, plan["weeks"] + 1):
+        lines += [f"### Week {week}", ""]
+        for day in (day for day in plan["days"] if day["week"] == week):
+            lines.append(f"**{day['day']}**")
+            lines += [f"- {name} ({hours}h)" for name, hours in day["meetings"]]
+            for block in day["files"]:
+                time = f"{block['hours']:g}h" if block["hours"] else "skim"
+                scores = f"complexity {block['score']}" + (f", FV {block['score_fv']}" if score_of(block["score_fv"]) else "")
+                lines.append(f"- {block_label(block)}: {time}, {block['ncloc']} nCLOC, {scores}")
+            if not day["meetings"] and not day["files"]:
+                lines.append("- Buffer: documentation, notes and follow-ups")
+            lines.append("")
+    return "\n".join(lines)
+
+# Function to summarize the plan for the LLM: a bounded digest per week, whatever the number of files
+def summarize_plan(plan):
+    lines = [f"{plan['weeks']} week(s) of {plan['day_hours']:g}-hour days, {plan['clusters']} group(s) of related files."]
+    for week in range(1, plan["weeks"] + 1):
+        blocks = [block for day in plan["days"] if day["week"] == week for block in day["files"]]
+        meetings = [name for day in plan["days"] if day["week"] == week for name, _ in day["meetings"]]
+        hours = defaultdict(float)
+        for block in blocks:
+            hours[block["file"]] += block["hours"]
+        heaviest = sorted(hours, key=lambda path: (-hours[path], path))[:PLAN_SUMMARY_FILES]
+        directories = sorted({os.path.dirname(block["file"]) for block in blocks})
+        lines.append(
+            f"Week {week}: {len(hours)} file(s), {sum(hours.values()):g}h of review in {len(directories)} folder(s) ({', '.join(directories[:PLAN_SUMMARY_FILES])}{', ...' if len(directories) > PLAN_SUMMARY_FILES else ''}); "
+            f"heaviest: {', '.join(f'{path} ({hours[path]:g}h)' for path in heaviest) or 'none'}; meetings: {', '.join(meetings) or 'none'}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,89 @@
+import os
+import re
+import math
+from utils.parsing import parse_source
+
+# Files whose local pre-score is at or below this get a local verdict instead of an LLM call, 0 (the default) sends every file
+PRESCORE_THRESHOLD = int(os.getenv('PRESCORE_THRESHOLD', 0))
+
+# Structural features of each language, matched on comment-free code.
+# "functions" only counts functions with a body, so interfaces and trait/extern declarations weigh nothing.
+FEATURES = {
+    'evm': {
+        'functions': re.compile(r'\b(?:function|constructor|fallback|receive)\b[^;{]*\{'),
+        'branches': re.compile(r'\b(?:if|for|while|do|catch|require|assert|revert)\b|&&|\|\||\?'),
+        'external_calls': re.compile(r'\.(?:call|delegatecall|staticcall|send|transfer|transferFrom|safeTransfer|safeTransferFrom)\s*[({]|\bI[A-Z]\w*\s*\([^()]*\)\s*\.|\bnew\s+\w+\s*[({]'),
+        'unsafe': re.compile(r'\bassembly\b|\bunchecked\b|\bselfdestruct\b'),
+        'modifiers': re.compile(r'\bmodifier\b|\bonly\w+\b'),
+    },
+    'sol': {
+        'functions': re.compile(r'\bfn\s+\w+[^;{]*\{'),
+        'branches': re.compile(r'\b(?:if|for|while|loop|match|require|require_keys_eq|require_eq|assert|assert_eq)\b|=>|&&|\|\||\?'),
+        'external_calls': re.compile(r'\binvoke(?:_signed)?\s*\(|\bCpiContext::|\bcpi::'),
+        'unsafe': re.compile(r'\bunsafe\b|\btransmute\b|\bAccountInfo\b'),
+        'modifiers': re.compile(r'#\[(?:account|access_control|instruction)\b'),
+    },
+    'move': {
+        'functions': re.compile(r'\bfun\s+\w+[^;{]*\{'),
+        'branches': re.compile(r'\b(?:if|while|loop|assert!|abort)\b|&&|\|\|'),
+        'external_calls': re.compile(r'\b(?:borrow_global_mut|move_to|move_from)\b'),
+        'unsafe': re.compile(r'\bnative\b'),
+        'modifiers': re.compile(r'\bacquires\b|\bpublic\s*\(\s*friend\s*\)|\bentry\b'),
+    },
+    'go': {
+        'functions': re.compile(r'\bfunc\b[^{\n]*\{'),
+        'branches': re.compile(r'\b(?:if|for|switch|case|select)\b|&&|\|\|'),
+        'external_calls': re.compile(r'\bgo\s+\w|\bhttp\.|\bexec\.|\bsql\.'),
+        'unsafe': re.compile(r'\bunsafe\.|\breflect\.'),
+        'modifiers': re.compile(r'\bdefer\b|\brecover\s*\('),
+    },
+    'ts': {
+        'functions': re.compile(r'\bfunction\b[^;{]*\{|=>\s*\{|^\s*(?:(?:public|private|protected|static|async)\s+)*\w+\s*\([^)\n]*\)\s*(?::[^{\n]+)?\{', re.MULTILINE),
+        'branches': re.compile(r'\b(?:if|for|while|case|catch)\b|&&|\|\||\?\?|\?'),
+        'external_calls': re.compile(r'\bfetch\s*\(|\baxios\b|\.sendTransaction\s*\(|\.rpc\s*\('),
+        'unsafe': re.compile(r'\beval\s*\(|\bnew\s+Function\s*\(|\bas\s+any\b'),
+        'modifiers': re.compile(r'^\s*@\w+', re.MULTILINE),
+    },
+}
+
+# Weight of each feature in the pre-score, external calls and unsafe code weigh the most
+WEIGHTS = {'functions': 1, 'branches': 0.5, 'external_calls': 2, 'unsafe': 3, 'modifiers': 1}
+
+# Function to measure the structural features of comment-free code.
+# Functions and branches are counted on the parse tree when a grammar is available.
+def structural_metrics(stripped, language):
+    features = FEATURES.get(language)
+    if features is None:
+        return {}
+    metrics = {name: len(pattern.findall(stripped)) for name, pattern in features.items()}
+    outline = parse_source(stripped, language)
+    if outline is not None:
+        metrics['functions'], metrics['branches'] = outline['functions'], outline['branches']
+    return metrics
+
+# Function to turn structural metrics into a 1-10 triage score, on a log scale so small files stay apart
+def prescore(metrics, code_lines):
+    points = sum(WEIGHTS[name] * count for name, count in metrics.items()) + code_lines / 50
+    return max(1, min(10, 1 + round(math.log2(1 + points))))
+
+# Function to tell whether a file is simple enough to skip the LLM.
+# Files with external calls or unsafe code always go to the LLM, however small they are.
+def is_trivial(score, metrics, threshold=PRESCORE_THRESHOLD):
+    return score <= threshold and not metrics.get('external_calls') and not metrics.get('unsafe')
+
+# Function to describe the metrics behind a local verdict
+def local_rationale(score, metrics, code_lines):
+    if not metrics.get('functions'):
+        shape = "Declarations only (no function bodies)"
+    else:
+        shape = f"{metrics['functions']} function(s) with {metrics.get('branches', 0)} branch(es)"
+    return f"{shape} in {code_lines} line(s) of code, no external calls or unsafe code: scored {score} locally without the LLM."
+
+# Local verdicts over the run
+prescore_stats = {"files": 0, "local": 0}
+
+# Function to summarize how many LLM calls the pre-scorer saved
+def prescore_report():
+    local = prescore_stats["local"]
+    share = local / prescore_stats["files"] * 100 if prescore_stats["files"] else 0
+    return f"Local pre-scoring: {local} of {prescore_stats['files']} file(s) scored without the LLM ({share:.0f}%)"
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import functools
+import contextvars
+from contextlib import asynccontextmanager
+
+# Spans are also exported to an OpenTelemetry collector when an OTLP endpoint is set and the SDK is installed
+OTEL_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')
+OTEL_SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'complexity-analyzer')
+
+# USD per million tokens, as listed by the providers
+MODEL_PRICES = {
+    "claude": {"input": 3.0, "cache_write": 3.75, "cache_read": 0.3, "output": 15.0},
+    "gpt": {"input": 3.0, "cache_write": 0.0, "cache_read": 1.5, "output": 12.0},
+}
+
+# Profile of the project being analyzed and innermost open span, both follow the asyncio tasks of a run
+current_profile = contextvars.ContextVar('current_profile', default=None)
+current_span = contextvars.ContextVar('current_span', default=None)
+
+_tracer = None
+
+# Function to set up (once) the OpenTelemetry tracer, None when export is off or the SDK is missing
+def otel_tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = False
+        if OTEL_ENDPOINT:
+            try:
+                from opentelemetry import trace
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                print("⚠️ OTEL_EXPORTER_OTLP_ENDPOINT is set but the OpenTelemetry SDK is not installed, spans are only written to the run profile")
+            else:
+                provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                trace.set_tracer_provider(provider)
+                _tracer = trace.get_tracer(__name__)
+    return _tracer or None
+
+# Function to send the spans still buffered to the collector before the process exits
+def flush_telemetry():
+    if otel_tracer() is not None:
+        from opentelemetry import trace
+        trace.get_tracer_provider().force_flush()
+
+# Function to pick a percentile out of a list of durations
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+class RunProfile:
+    """Spans recorded during the analysis of one project, summarized per stage."""
+
+    def __init__(self, project):
+        self.project = project
+        self.started = time.time()
+        self.clock = time.monotonic()
+        self.spans = []
+        self.next_id = 0
+
+    def summary(self):
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span["name"], {"count": 0, "failed": 0, "seconds": [], "retries": 0, "repairs": 0, "fallbacks": 0, "hedges": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "cost_usd": 0.0})
+            stage["count"] += 1
+            stage["failed"] += span["status"] != "ok"
+            stage["seconds"].append(span["seconds"])
+            for counter in ("retries", "repairs", "fallbacks", "hedges", "input_tokens", "output_tokens", "cache_read_tokens", "cost_usd"):
+                stage[counter] += span.get(counter, 0)
+        for stage in stages.values():
+            seconds = stage.pop("seconds")
+            stage.update({
+                "total_seconds": round(sum(seconds), 3),
+                "p50_seconds": round(percentile(seconds, 50), 3),
+                "p95_seconds": round(percentile(seconds, 95), 3),
+                "max_seconds": round(max(seconds), 3),
+                "cost_usd": round(stage["cost_usd"], 4),
+            })
+        return stages
+
+    def save(self, output_file):
+        profile = {
+            "project": self.project,
+            "started": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            "wall_seconds": round(time.monotonic() - self.clock, 3),
+            "stages": self.summary(),
+            "spans": self.spans,
+        }
+        with open(output_file, 'w') as f:
+            json.dump(profile, f, indent=2)
+
+    def report(self):
+        lines = [f"Run profile of {self.project.capitalize()} ({time.monotonic() - self.clock:.1f}s):"]
+        for name, stage in sorted(self.summary().items(), key=lambda item: -item[1]["total_seconds"]):
+            tokens = f", {stage['input_tokens']} in / {stage['output_tokens']} out tokens (${stage['cost_usd']:.2f})" if stage["input_tokens"] else ""
+            lines.append(f"  {name}: {stage['count']} x, {stage['total_seconds']:.1f}s total, p50 {stage['p50_seconds']:.2f}s, p95 {stage['p95_seconds']:.2f}s{tokens}")
+        return "\n".join(lines)
+
+# Context manager timing a stage of the run, nested spans pointing to their parent
+@asynccontextmanager
+async def span(name, **attributes):
+    profile = current_profile.get()
+    parent = current_span.get()
+    record = {"name": name, "parent": parent["id"] if parent else None, **attributes}
+    if profile is not None:
+        record["id"] = profile.next_id
+        profile.next_id += 1
+        record["start"] = round(time.monotonic() - profile.clock, 3)
+    else:
+        record["id"] = None
+    token = current_span.set(record)
+    tracer = otel_tracer()
+    otel_span = tracer.start_span(name, attributes={key: value for key, value in attributes.items() if value is not None}) if tracer is not None else None
+    otel_token = None
+    if otel_span is not None:
+        from opentelemetry import trace, context
+        otel_token = context.attach(trace.set_span_in_context(otel_span))
+    started = time.monotonic()
+    record["status"] = "ok"
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "error"
+        raise
+    finally:
+        record["seconds"] = round(time.monotonic() - started, 3)
+        current_span.reset(token)
+        if profile is not None:
+            profile.spans.append(record)
+        if otel_span is not None:
+            from opentelemetry import context
+            otel_span.set_attributes({key: value for key, value in record.items() if isinstance(value, (int, float, str)) and key not in ("name", "id", "parent", "start")})
+            otel_span.end()
+            context.detach(otel_token)
+
+# Decorator recording a span around a coroutine function, which fails when it returns None
+def traced(name):
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            file_path = kwargs.get('file_path', args[0] if args and isinstance(args[0], str) else None)
+            async with span(name, file=file_path) as record:
+                result = await function(*args, **kwargs)
+                if result is None:
+                    record["status"] = "failed"
+                return result
+        return wrapper
+    return decorate
+
+# Function to add a counter (retries, repairs, fallbacks, hedges) to the innermost open span
+def note(counter, amount=1):
+    record = current_span.get()
+    if record is not None:
+        record[counter] = record.get(counter, 0) + amount
+
+# Function to charge the tokens of a provider response to the innermost open span
+def add_tokens(provider, input_tokens, output_tokens, cache_write_tokens=0, cache_read_tokens=0):
+    record = current_span.get()
+    if record is None:
+        return
+    prices = MODEL_PRICES.get(provider, {})
+    note("input_tokens", input_tokens + cache_write_tokens + cache_read_tokens)
+    note("output_tokens", output_tokens)
+    note("cache_read_tokens", cache_read_tokens)
+    note("cost_usd", (
+        input_tokens * prices.get("input", 0) + cache_write_tokens * prices.get("cache_write", 0)
+        + cache_read_tokens * prices.get("cache_read", 0) + output_tokens * prices.get("output", 0)
+    ) / 1_000_000)
@@ -1,11 +1,54 @@
-import aiofiles
+import os
 import json
+import asyncio
+import aiofiles
+
+# Serializes appends from concurrently finishing files
+jsonl_lock = asyncio.Lock()
 
 # Function to save results to a json file
 async def save_results(results, output_file):
     async with aiofiles.open(output_file, 'w') as f:
         json_data = {"complexity_report": results}
         await f.write(json.dumps(json_data, indent=2))
+
+# Function to append a single file result to a JSONL report as soon as it is available
+async def append_result(result, jsonl_file):
+    async with jsonl_lock:
+        async with aiofiles.open(jsonl_file, 'a') as f:
+            await f.write(json.dumps(result) + '\n')
+            await f.flush()
+            os.fsync(f.fileno())
+
+# Function to turn a JSONL report into the usual {"complexity_report": [...]} file, one entry at a time
+async def compact_results(jsonl_file, output_file, order=None):
+    # First pass: remember where the latest record of each file starts
+    offsets = {}
+    async with aiofiles.open(jsonl_file, 'rb') as f:
+        offset = 0
+        async for line in f:
+            try:
+                offsets[json.loads(line)['file']] = offset
+            except (json.JSONDecodeError, KeyError, UnicodeDecodeError):
+                # A crash can leave a truncated last line behind
+                pass
+            offset += len(line)
+
+    files = [file_path for file_path in order if file_path in offsets] if order is not None else list(offsets)
+
+    # Second pass: stream the records in report order
+    tmp_file = f'{output_file}.tmp'
+    async with aiofiles.open(jsonl_file, 'rb') as source, aiofiles.open(tmp_file, 'w') as f:
+        await f.write('{\n  "complexity_report": [' if files else '{\n  "complexity_report": []\n}')
+        for index, file_path in enumerate(files):
+            await source.seek(offsets[file_path])
+            entry = json.loads(await source.readline())
+            indented = '\n'.join('    ' + line for line in json.dumps(entry, indent=2).splitlines())
+            await f.write(('\n' if index == 0 else ',\n') + indented)
+        if files:
+            await f.write('\n  ]\n}')
+    os.replace(tmp_file, output_file)
+    return len(files)
         
 # Function to save summary to a txt file
 async def save_summary(total_cloc, avg_complexity, avg_complexity_fv, median_complexity, time_estimate, output_file, program_counter, PROJECT_NAME):
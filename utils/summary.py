@@ -1,10 +1,15 @@
 import statistics
+from llm.structured import parse_score
 
 # Function to calculate summary statistics
 async def calculate_summary_statistics(results):
     try:
-        # Extract complexity scores, using 0 if 'score' key is missing
-        complexity_scores = [float(result.get('score_manual', 0)) for result in results]
+        # Exact copies share their representative's lines and verdict, they are counted once
+        results = [result for result in results if result.get('duplicate_kind') != "exact"]
+        
+        # Extract complexity scores, using 0 if 'score' key is missing. Scores are read tolerantly, reports
+        # written before scores were typed may hold answers like "7/10"
+        complexity_scores = [float(parse_score(result.get('score_manual', 0), low=0)) for result in results]
         
         # Calculate total lines of code, using 0 if 'nloc' key is missing
         total_cloc = sum(int(result.get('ncloc', 0)) for result in results)
@@ -17,8 +22,8 @@ async def calculate_summary_statistics(results):
         mid = len(sorted_scores) // 2
         median_complexity = (sorted_scores[mid] if len(sorted_scores) % 2 != 0 else (sorted_scores[mid - 1] + sorted_scores[mid]) / 2) if sorted_scores else 0
         
-        # Extract formal verification complexity scores, using 0 if 'score_fv' key is missing
-        complexity_scores_fv = [float(result.get('score_fv', 0)) for result in results]
+        # Extract formal verification complexity scores, using 0 if 'score_fv' key is missing or unscored (null)
+        complexity_scores_fv = [float(parse_score(result.get('score_fv') or 0, low=0)) for result in results]
         
         # Filter out scores that are 0
         complexity_scores_fv = [score for score in complexity_scores_fv if score != 0]
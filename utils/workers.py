@@ -0,0 +1,75 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# Function to run coroutines with at most `limit` of them in flight, results come back in input order
+async def gather_bounded(coros, limit):
+    semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+class FairLimiter:
+    """
+    Concurrency budget shared by several projects.
+
+    Freed slots are handed to waiting projects in round-robin order, so a project that
+    queued hundreds of files first can't starve the ones queued after it.
+    """
+
+    def __init__(self, limit):
+        self.available = max(1, int(limit))
+        self.waiters = OrderedDict()
+
+    async def acquire(self, key):
+        if self.available > 0 and not self.waiters:
+            self.available -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over right as we got cancelled, pass it on
+                self.release()
+            else:
+                queue = self.waiters.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self.waiters[key]
+            raise
+
+    def release(self):
+        while self.waiters:
+            key, queue = next(iter(self.waiters.items()))
+            waiter = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(key)
+            else:
+                del self.waiters[key]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.available += 1
+
+    @asynccontextmanager
+    async def slot(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+# Function to run coroutines under a shared FairLimiter, results come back in input order
+async def gather_fair(coros, limiter, key):
+    async def run(coro):
+        async with limiter.slot(key):
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))